@@ -0,0 +1,204 @@
+import re
+import json
+import threading
+import contextlib
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import tap_google_sheets.client as client_module
+from tap_google_sheets.xlsx_export import XLSX_MIME_TYPE
+from benchmarks.generator import get_column_index
+
+# Local stand-in of the Google APIs used by the GoogleClient, serving a SyntheticSpreadsheet:
+#   POST /token: OAuth token endpoint
+#   GET /drive/v3/files/{spreadsheet_id}: file metadata
+#   GET /drive/v3/files/{spreadsheet_id}/export: XLSX export of the spreadsheet
+#   GET /v4/spreadsheets/{spreadsheet_id}: spreadsheet metadata, and grid data of the `ranges` with includeGridData
+#   GET /v4/spreadsheets/{spreadsheet_id}/values/{range}: values of a range
+#   GET /v4/spreadsheets/{spreadsheet_id}/values:batchGet: values of the `ranges`
+
+# 'Sheet 1'!A2:J200, 'Sheet 1'!1:2, 'Sheet 1'!A2:A or Sheet1!1:1
+RANGE_PATTERN = re.compile(r"^(?:'(?P<quoted>(?:[^']|'')+)'|(?P<title>[^!]+))!(?P<from_column>[A-Z]*)(?P<from_row>\d*):(?P<to_column>[A-Z]*)(?P<to_row>\d*)$")
+
+
+def parse_range(sheet_range):
+    """
+    Parse a range in A1 notation: (sheet title, from row, to row, from column index, to column index)
+    """
+    match = RANGE_PATTERN.match(sheet_range)
+    if not match:
+        raise ValueError(sheet_range)
+    title = match.group('title') or match.group('quoted').replace("''", "'")
+    from_column = get_column_index(match.group('from_column')) if match.group('from_column') else 1
+    to_column = get_column_index(match.group('to_column')) if match.group('to_column') else None
+    return title, int(match.group('from_row') or 1), int(match.group('to_row') or 10 ** 9), from_column, to_column
+
+
+def get_endpoint(url):
+    """
+    Endpoint of a request, to count the requests: token, files, export, spreadsheets, values or batchGet
+    """
+    path = urllib.parse.urlsplit(url).path
+    if path == '/token':
+        return 'token'
+    if path.startswith('/drive/v3/files/') and path.endswith('/export'):
+        return 'export'
+    if path.startswith('/drive/v3/files/'):
+        return 'files'
+    if path.endswith('/values:batchGet'):
+        return 'batchGet'
+    if '/values/' in path:
+        return 'values'
+    return 'spreadsheets'
+
+
+class FakeGoogleApi:
+    """
+    HTTP server of the fake Google APIs, in a background thread
+    The requests are counted by endpoint: token, files, export, spreadsheets, values, batchGet
+    The responses of the GET requests are cached, so that a warm-up run excludes the generation of the cells
+        from the response times of the next runs
+    """
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self.requests = Counter()
+        # url: (status code, response body)
+        self.responses = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.base_url = None
+
+    def count(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def get_sheet_index(self, title):
+        return self.spreadsheet.sheet_titles.index(title)
+
+    def get_response(self, method, url):
+        """
+        Return the status code and the JSON response of a request, or the bytes of a file
+        """
+        parsed_url = urllib.parse.urlsplit(url)
+        path = urllib.parse.unquote(parsed_url.path)
+        query = urllib.parse.parse_qs(parsed_url.query)
+        spreadsheet_id = self.spreadsheet.spreadsheet_id
+        if method == 'POST' and path == '/token':
+            return 200, {'access_token': 'benchmark_token', 'expires_in': 3600, 'token_type': 'Bearer'}
+        if path == '/drive/v3/files/{}'.format(spreadsheet_id):
+            return 200, self.spreadsheet.get_file_metadata()
+        if path == '/drive/v3/files/{}/export'.format(spreadsheet_id):
+            return 200, self.spreadsheet.get_xlsx()
+        if path == '/v4/spreadsheets/{}'.format(spreadsheet_id):
+            if query.get('includeGridData') != ['true']:
+                return 200, self.spreadsheet.get_spreadsheet_metadata()
+            sheets = []
+            for sheet_range in query.get('ranges', []):
+                title, from_row, to_row, from_column, to_column = parse_range(sheet_range)
+                sheet_index = self.get_sheet_index(title)
+                sheets.append({
+                    'properties': self.spreadsheet.get_sheet_properties(sheet_index),
+                    'data': [self.spreadsheet.get_grid_data(sheet_index, from_row, to_row, from_column, to_column)]})
+            return 200, {'spreadsheetId': spreadsheet_id, 'sheets': sheets}
+        if path == '/v4/spreadsheets/{}/values:batchGet'.format(spreadsheet_id):
+            formatted = query.get('valueRenderOption', ['FORMATTED_VALUE']) == ['FORMATTED_VALUE']
+            value_ranges = []
+            for sheet_range in query.get('ranges', []):
+                title, from_row, to_row, from_column, to_column = parse_range(sheet_range)
+                value_range = {'range': sheet_range, 'majorDimension': 'ROWS'}
+                values = self.spreadsheet.get_values(self.get_sheet_index(title), from_row, to_row, from_column, to_column, formatted)
+                if values:
+                    value_range['values'] = values
+                value_ranges.append(value_range)
+            return 200, {'spreadsheetId': spreadsheet_id, 'valueRanges': value_ranges}
+        values_prefix = '/v4/spreadsheets/{}/values/'.format(spreadsheet_id)
+        if path.startswith(values_prefix):
+            # the sheet titles are encoded with quote_plus in the paths
+            sheet_range = urllib.parse.unquote_plus(parsed_url.path)[len(values_prefix):]
+            title, from_row, to_row, from_column, to_column = parse_range(sheet_range)
+            formatted = query.get('valueRenderOption', ['FORMATTED_VALUE']) == ['FORMATTED_VALUE']
+            value_range = {'range': sheet_range, 'majorDimension': 'ROWS'}
+            values = self.spreadsheet.get_values(self.get_sheet_index(title), from_row, to_row, from_column, to_column, formatted)
+            if values:
+                value_range['values'] = values
+            return 200, value_range
+        return 404, {'error': {'code': 404, 'message': 'Requested entity was not found.', 'status': 'NOT_FOUND'}}
+
+    def get_response_body(self, method, url):
+        """
+        Return the status code and the body of the response of a request
+        """
+        if method == 'GET' and url in self.responses:
+            self.count(get_endpoint(url))
+            return self.responses[url]
+        self.count(get_endpoint(url))
+        try:
+            status_code, response = self.get_response(method, url)
+        except ValueError as err:
+            status_code, response = 400, {'error': {'code': 400, 'message': 'Unable to parse range: {}'.format(err)}}
+        body = response if isinstance(response, bytes) else json.dumps(response).encode('utf-8')
+        if method == 'GET':
+            with self.lock:
+                self.responses[url] = (status_code, body)
+        return status_code, body
+
+    def get_handler_class(self):
+        fake_api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # the headers and the body are written separately, do not wait for the ACK of the headers
+            disable_nagle_algorithm = True
+
+            def respond(self, method):
+                if method == 'POST':
+                    self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status_code, body = fake_api.get_response_body(method, self.path)
+                self.send_response(status_code)
+                # the exports are zip files (XLSX), the other responses JSON
+                self.send_header('Content-Type', XLSX_MIME_TYPE if body.startswith(b'PK') else 'application/json; charset=UTF-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.respond('GET')
+
+            def do_POST(self):
+                self.respond('POST')
+
+            def log_message(self, format, *args): # pylint: disable=redefined-builtin
+                pass
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.get_handler_class())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @contextlib.contextmanager
+    def serve(self):
+        """
+        Serve the fake APIs, with the base URLs of the client module pointing to them
+        """
+        base_url = self.start()
+        urls = {
+            'GOOGLE_TOKEN_URI': base_url + '/token',
+            'SHEETS_BASE_URL': base_url + '/v4',
+            'DRIVE_BASE_URL': base_url + '/drive/v3'}
+        saved_urls = {name: getattr(client_module, name) for name in urls}
+        for name, url in urls.items():
+            setattr(client_module, name, url)
+        try:
+            yield self
+        finally:
+            for name, url in saved_urls.items():
+                setattr(client_module, name, url)
+            self.stop()
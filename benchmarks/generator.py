@@ -0,0 +1,239 @@
+import io
+import zipfile
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape, quoteattr
+from tap_google_sheets.number_format import render_formatted_value
+
+# Synthetic spreadsheets for the benchmarks: the cells are computed from their position, so that
+#   a spreadsheet of any size is generated on the fly, and the same spreadsheet is generated for each run.
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Column types: (effectiveValue key, number format of the column)
+COLUMN_TYPES = {
+    'string': ('stringValue', None),
+    'integer': ('numberValue', {'type': 'NUMBER', 'pattern': '0'}),
+    'number': ('numberValue', {'type': 'NUMBER', 'pattern': '#,##0.00'}),
+    'currency': ('numberValue', {'type': 'CURRENCY', 'pattern': '"$"#,##0.00'}),
+    'date': ('numberValue', {'type': 'DATE', 'pattern': 'yyyy-mm-dd'}),
+    'datetime': ('numberValue', {'type': 'DATE_TIME', 'pattern': 'yyyy-mm-dd hh:mm:ss'}),
+    'time': ('numberValue', {'type': 'TIME', 'pattern': 'hh:mm:ss'}),
+    'boolean': ('boolValue', None)
+}
+DEFAULT_TYPES = tuple(COLUMN_TYPES)
+# Blank rows of the grid after the last row with values
+BLANK_ROWS = 100
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}'
+    '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>')
+XLSX_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>')
+
+
+def get_column_letter(column_index):
+    letters = ''
+    while column_index > 0:
+        column_index, remainder = divmod(column_index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def get_column_index(column_letter):
+    column_index = 0
+    for letter in column_letter:
+        column_index = column_index * 26 + ord(letter) - 64
+    return column_index
+
+
+def render_serial_number(value, pattern):
+    """
+    Formatted value of a date, date-time or time serial number
+    """
+    dttm = EXCEL_EPOCH + timedelta(seconds=round(value * 86400))
+    if pattern == 'yyyy-mm-dd':
+        return dttm.strftime('%Y-%m-%d')
+    if pattern == 'hh:mm:ss':
+        return dttm.strftime('%H:%M:%S')
+    return dttm.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class SyntheticSpreadsheet:
+    """
+    Spreadsheet of `sheets` sheets, each with a header row and `rows` rows of `columns` columns
+    The column types cycle through `types` (a list of COLUMN_TYPES keys), the type mix of the sheets
+    """
+    def __init__(self, spreadsheet_id='benchmark', sheets=3, rows=1000, columns=10, types=DEFAULT_TYPES):
+        for column_type in types:
+            if column_type not in COLUMN_TYPES:
+                raise Exception('INVALID COLUMN TYPE: {}'.format(column_type))
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_titles = ['Sheet {}'.format(index + 1) for index in range(sheets)]
+        self.rows = rows
+        self.columns = columns
+        self.column_types = [types[index % len(types)] for index in range(columns)]
+        self.modified_time = '2022-01-01T00:00:00.000Z'
+
+    def get_header(self, column_index):
+        return '{}_{}'.format(self.column_types[column_index - 1], column_index)
+
+    def get_unformatted_value(self, sheet_index, row, column_index):
+        """
+        Unformatted value of a data cell (row >= 2), as returned with valueRenderOption = UNFORMATTED_VALUE
+        """
+        column_type = self.column_types[column_index - 1]
+        seed = row * 7919 + column_index * 104729 + sheet_index * 1299709
+        if column_type == 'string':
+            return 'value {}'.format(seed % 100003)
+        if column_type == 'integer':
+            return seed % 100003
+        if column_type in ('number', 'currency'):
+            return (seed % 10000019) / 100
+        if column_type == 'date':
+            return 43831 + seed % 3650
+        if column_type == 'datetime':
+            return 43831 + (seed % 3650000) / 1000
+        if column_type == 'time':
+            return (seed % 86400) / 86400
+        return seed % 2 == 0
+
+    def get_cell(self, sheet_index, row, column_index):
+        """
+        (formatted value, unformatted value, effectiveValue key, number format) of a cell
+        """
+        if row == 1:
+            header = self.get_header(column_index)
+            return header, header, 'stringValue', None
+        value_key, number_format = COLUMN_TYPES[self.column_types[column_index - 1]]
+        value = self.get_unformatted_value(sheet_index, row, column_index)
+        if number_format and number_format['type'] in ('DATE', 'DATE_TIME', 'TIME'):
+            formatted_value = render_serial_number(value, number_format['pattern'])
+        else:
+            formatted_value = render_formatted_value(value, number_format)
+        return formatted_value, value, value_key, number_format
+
+    def get_row_count(self):
+        return self.rows + 1 + BLANK_ROWS
+
+    def get_sheet_properties(self, sheet_index):
+        return {
+            'sheetId': sheet_index,
+            'title': self.sheet_titles[sheet_index],
+            'index': sheet_index,
+            'sheetType': 'GRID',
+            'gridProperties': {'rowCount': self.get_row_count(), 'columnCount': self.columns}}
+
+    def get_file_metadata(self):
+        """
+        Drive v3 files.get
+        """
+        return {
+            'id': self.spreadsheet_id,
+            'name': 'Benchmark spreadsheet',
+            'createdTime': '2021-01-01T00:00:00.000Z',
+            'modifiedTime': self.modified_time,
+            'version': '1'}
+
+    def get_spreadsheet_metadata(self):
+        """
+        Sheets v4 spreadsheets.get without grid data
+        """
+        return {
+            'spreadsheetId': self.spreadsheet_id,
+            'properties': {'title': 'Benchmark spreadsheet', 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+            'sheets': [{'properties': self.get_sheet_properties(index)} for index in range(len(self.sheet_titles))],
+            'spreadsheetUrl': 'https://docs.google.com/spreadsheets/d/{}/edit'.format(self.spreadsheet_id)}
+
+    def get_range_cells(self, sheet_index, from_row, to_row, from_column=1, to_column=None):
+        """
+        Rows of cells of a range, without the rows after the last row with values
+        """
+        to_column = min(to_column or self.columns, self.columns)
+        to_row = min(to_row, self.rows + 1)
+        return [[self.get_cell(sheet_index, row, column_index) for column_index in range(from_column, to_column + 1)]
+                for row in range(from_row, to_row + 1)]
+
+    def get_values(self, sheet_index, from_row, to_row, from_column=1, to_column=None, formatted=True):
+        """
+        Sheets v4 spreadsheets.values.get rows of a range
+        """
+        return [[cell[0] if formatted else cell[1] for cell in row]
+                for row in self.get_range_cells(sheet_index, from_row, to_row, from_column, to_column)]
+
+    def get_sheet_xml(self, sheet_index, shared_strings):
+        """
+        XML of a worksheet of the XLSX export, the strings are added to the shared strings
+        """
+        rows = []
+        for row, cells in enumerate(self.get_range_cells(sheet_index, 1, self.rows + 1), start=1):
+            row_cells = []
+            for column_index, (_, value, _, _) in enumerate(cells, start=1):
+                reference = '{}{}'.format(get_column_letter(column_index), row)
+                if isinstance(value, bool):
+                    row_cells.append('<c r="{}" t="b"><v>{}</v></c>'.format(reference, int(value)))
+                elif isinstance(value, str):
+                    index = shared_strings.setdefault(value, len(shared_strings))
+                    row_cells.append('<c r="{}" t="s"><v>{}</v></c>'.format(reference, index))
+                else:
+                    row_cells.append('<c r="{}"><v>{}</v></c>'.format(reference, repr(value)))
+            rows.append('<row r="{}">{}</row>'.format(row, ''.join(row_cells)))
+        return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>{}</sheetData></worksheet>'
+                ).format(''.join(rows))
+
+    def get_xlsx(self):
+        """
+        Drive v3 files.export of the spreadsheet as XLSX: the unformatted values of the cells, with shared strings
+        """
+        shared_strings = {}
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as xlsx:
+            sheet_numbers = range(1, len(self.sheet_titles) + 1)
+            xlsx.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES.format(sheets=''.join(
+                '<Override PartName="/xl/worksheets/sheet{}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'.format(number)
+                for number in sheet_numbers)))
+            xlsx.writestr('_rels/.rels', XLSX_PACKAGE_RELS)
+            xlsx.writestr('xl/workbook.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>{}</sheets></workbook>').format(''.join(
+                    '<sheet name={} sheetId="{}" r:id="rId{}"/>'.format(quoteattr(title), number, number)
+                    for number, title in zip(sheet_numbers, self.sheet_titles))))
+            xlsx.writestr('xl/_rels/workbook.xml.rels', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{}{}</Relationships>').format(''.join(
+                    '<Relationship Id="rId{0}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                    'Target="worksheets/sheet{0}.xml"/>'.format(number) for number in sheet_numbers),
+                    '<Relationship Id="rId{}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+                    'Target="sharedStrings.xml"/>'.format(len(self.sheet_titles) + 1)))
+            for sheet_index, number in enumerate(sheet_numbers):
+                xlsx.writestr('xl/worksheets/sheet{}.xml'.format(number), self.get_sheet_xml(sheet_index, shared_strings))
+            xlsx.writestr('xl/sharedStrings.xml', (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{0}" uniqueCount="{0}">{1}</sst>').format(
+                    len(shared_strings), ''.join('<si><t>{}</t></si>'.format(escape(value)) for value in shared_strings)))
+        return buffer.getvalue()
+
+    def get_grid_data(self, sheet_index, from_row, to_row, from_column=1, to_column=None):
+        """
+        Sheets v4 spreadsheets.get grid data of a range: the formatted, effective value and format of each cell
+        """
+        row_data = []
+        for row in self.get_range_cells(sheet_index, from_row, to_row, from_column, to_column):
+            values = []
+            for formatted_value, value, value_key, number_format in row:
+                cell = {'formattedValue': formatted_value, 'effectiveValue': {value_key: value}}
+                if number_format:
+                    cell['effectiveFormat'] = {'numberFormat': number_format}
+                values.append(cell)
+            row_data.append({'values': values})
+        return {'startRow': from_row - 1, 'rowData': row_data}
@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import contextlib
+from singer.catalog import Catalog
+from singer import metadata, utils
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.rate_limiter import RateLimiter
+from tap_google_sheets.discover import discover
+from tap_google_sheets.sync import sync
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets import message_writer
+import tap_google_sheets.schema as schema
+import tap_google_sheets.transform as internal_transform
+from benchmarks.generator import SyntheticSpreadsheet, DEFAULT_TYPES
+from benchmarks.fake_api import FakeGoogleApi
+
+# Benchmarks of the tap against a SyntheticSpreadsheet served by the FakeGoogleApi:
+#   transform_sheet_data: rows transformed per second, from the values of the pages of the sheets
+#   process_records: records transformed and written per second
+#   discovery: seconds and requests of the discovery
+#   sync: rows synced per second and requests of a full sync, the messages written to /dev/null
+# Each benchmark reports the peak RSS of the process after it ran (the peak of all the benchmarks so far).
+#
+# Usage: python -m benchmarks.run [--sheets 3 --rows 10000 --columns 10 --types string,number,date]
+#   [--config '{"fetch_mode": "local_format"}'] [--baseline benchmarks/baseline.json] [--update-baseline]
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# A benchmark is a regression when its rows per second are lower than the baseline by more than the tolerance
+DEFAULT_TOLERANCE = 0.2
+PAGE_ROWS = 200
+# Arguments of the runs compared to the baseline: the synthetic spreadsheet and the tap config
+BASELINE_ARGS = ('sheets', 'rows', 'columns', 'types', 'config')
+
+BENCHMARK_CONFIG = {
+    'client_id': 'benchmark_client_id',
+    'client_secret': 'benchmark_client_secret',
+    'refresh_token': 'benchmark_refresh_token',
+    'user_agent': 'tap-google-sheets benchmark',
+    'start_date': '2019-01-01T00:00:00Z',
+    # no rate limit against the local API
+    'user_requests_per_minute': 10 ** 9,
+    'project_requests_per_minute': 10 ** 9
+}
+
+
+def get_peak_rss_kb():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+@contextlib.contextmanager
+def redirect_messages():
+    """
+    Write the Singer messages to /dev/null
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            yield
+        finally:
+            message_writer.MESSAGE_WRITER.flush()
+
+
+def get_client(config):
+    return GoogleClient(config['client_id'], config['client_secret'], config['refresh_token'],
+                        config.get('request_timeout'), config['user_agent'], RateLimiter.from_config(config))
+
+
+def select_all(catalog):
+    """
+    Select all the streams of a discovered catalog
+    """
+    for stream in catalog.streams:
+        mdata = metadata.to_map(stream.metadata)
+        mdata = metadata.write(mdata, (), 'selected', True)
+        stream.metadata = metadata.to_list(mdata)
+    return catalog
+
+
+def get_sheets_columns(spreadsheet):
+    """
+    Sheet and columns of each sheet of the spreadsheet, from its sheet_metadata grid data
+    """
+    sheets_columns = []
+    for sheet_index in range(len(spreadsheet.sheet_titles)):
+        sheet = {'properties': spreadsheet.get_sheet_properties(sheet_index), 'data': [spreadsheet.get_grid_data(sheet_index, 1, 2)]}
+        _, columns = schema.get_sheet_schema_columns(sheet)
+        sheets_columns.append((sheet, columns))
+    return sheets_columns
+
+
+def benchmark_transform_sheet_data(spreadsheet, config):
+    """
+    Transform the pages of the sheets, as fetched with the `values` fetch mode
+    """
+    pages = []
+    for sheet, columns in get_sheets_columns(spreadsheet):
+        sheet_index = sheet['properties']['index']
+        for from_row in range(2, spreadsheet.rows + 2, PAGE_ROWS):
+            to_row = from_row + PAGE_ROWS - 1
+            pages.append((sheet, columns, from_row,
+                          spreadsheet.get_values(sheet_index, from_row, to_row),
+                          spreadsheet.get_values(sheet_index, from_row, to_row, formatted=False)))
+    rows = 0
+    start_time = time.perf_counter()
+    for sheet, columns, from_row, sheet_data_rows, unformatted_rows in pages:
+        records, _ = internal_transform.transform_sheet_data(
+            spreadsheet_id=spreadsheet.spreadsheet_id,
+            sheet_id=sheet['properties']['sheetId'],
+            sheet_title=sheet['properties']['title'],
+            from_row=from_row,
+            columns=columns,
+            sheet_data_rows=sheet_data_rows,
+            unformatted_rows=unformatted_rows)
+        rows += len(records)
+    return {'rows': rows, 'seconds': time.perf_counter() - start_time}
+
+
+def benchmark_process_records(spreadsheet, config):
+    """
+    Transform the records of the 1st sheet to their schema and write them
+    """
+    sheet, columns = get_sheets_columns(spreadsheet)[0]
+    sheet_schema, _ = schema.get_sheet_schema_columns(sheet)
+    sheet_title = sheet['properties']['title']
+    mdata = metadata.get_standard_metadata(schema=sheet_schema, key_properties=['__sdc_row'], replication_method='FULL_TABLE')
+    catalog = Catalog.from_dict({'streams': [{'tap_stream_id': sheet_title, 'stream': sheet_title,
+                                              'schema': sheet_schema, 'metadata': mdata}]})
+    records, _ = internal_transform.transform_sheet_data(
+        spreadsheet_id=spreadsheet.spreadsheet_id,
+        sheet_id=sheet['properties']['sheetId'],
+        sheet_title=sheet_title,
+        from_row=2,
+        columns=columns,
+        sheet_data_rows=spreadsheet.get_values(0, 2, spreadsheet.rows + 1),
+        unformatted_rows=spreadsheet.get_values(0, 2, spreadsheet.rows + 1, formatted=False))
+    sheets_load_data = SheetsLoadData(None, spreadsheet.spreadsheet_id, config['start_date'], config)
+    start_time = time.perf_counter()
+    with redirect_messages():
+        rows = sheets_load_data.process_records(catalog, sheet_title, records, utils.now(), 1)
+    return {'rows': rows, 'seconds': time.perf_counter() - start_time}
+
+
+def benchmark_discovery(spreadsheet, config, fake_api):
+    start_time = time.perf_counter()
+    with get_client(config) as client:
+        discover(client, spreadsheet.spreadsheet_id)
+    return {'seconds': time.perf_counter() - start_time}
+
+
+def benchmark_sync(spreadsheet, config, fake_api):
+    """
+    Full sync of all the streams, with a discovered catalog
+    A 1st warm-up sync fills the response cache of the fake API, the 2nd sync is measured
+    """
+    with get_client(config) as client:
+        catalog = select_all(discover(client, spreadsheet.spreadsheet_id))
+    for _ in range(2):
+        fake_api.requests.clear()
+        start_time = time.perf_counter()
+        with get_client(config) as client, redirect_messages():
+            sync(client=client, config=config, catalog=catalog, state={})
+    return {'rows': spreadsheet.rows * len(spreadsheet.sheet_titles), 'seconds': time.perf_counter() - start_time}
+
+
+def run_benchmarks(spreadsheet, config):
+    """
+    Run the benchmarks, return the results of each benchmark
+    """
+    config = dict(BENCHMARK_CONFIG, spreadsheet_id=spreadsheet.spreadsheet_id, **config)
+    results = {}
+    for name, benchmark in (('transform_sheet_data', benchmark_transform_sheet_data),
+                            ('process_records', benchmark_process_records)):
+        results[name] = benchmark(spreadsheet, config)
+        results[name]['peak_rss_kb'] = get_peak_rss_kb()
+    fake_api = FakeGoogleApi(spreadsheet)
+    with fake_api.serve():
+        for name, benchmark in (('discovery', benchmark_discovery), ('sync', benchmark_sync)):
+            fake_api.requests.clear()
+            results[name] = benchmark(spreadsheet, config, fake_api)
+            results[name]['requests'] = sum(fake_api.requests.values())
+            results[name]['requests_by_endpoint'] = dict(fake_api.requests)
+            results[name]['peak_rss_kb'] = get_peak_rss_kb()
+    for result in results.values():
+        if 'rows' in result:
+            result['rows_per_sec'] = round(result['rows'] / result['seconds'], 1) if result['seconds'] else None
+        result['seconds'] = round(result['seconds'], 3)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare the results to the baseline, return the regressions:
+        rows per second lower than the baseline by more than the tolerance, or more requests than the baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        baseline_result = baseline.get(name)
+        if not baseline_result:
+            continue
+        if result.get('rows_per_sec') and baseline_result.get('rows_per_sec') and \
+                result['rows_per_sec'] < baseline_result['rows_per_sec'] * (1 - tolerance):
+            regressions.append('{}: {} rows/sec, baseline: {}'.format(name, result['rows_per_sec'], baseline_result['rows_per_sec']))
+        if result.get('requests') is not None and baseline_result.get('requests') is not None and \
+                result['requests'] > baseline_result['requests']:
+            regressions.append('{}: {} requests, baseline: {}'.format(name, result['requests'], baseline_result['requests']))
+    return regressions
+
+
+def format_results(results, baseline):
+    lines = ['{:<22} {:>14} {:>10} {:>10} {:>14}'.format('benchmark', 'rows/sec', 'seconds', 'requests', 'peak RSS (kB)')]
+    for name, result in results.items():
+        line = '{:<22} {:>14} {:>10} {:>10} {:>14}'.format(
+            name, result.get('rows_per_sec', '-'), result['seconds'], result.get('requests', '-'), result['peak_rss_kb'])
+        baseline_result = baseline.get(name, {})
+        if result.get('rows_per_sec') and baseline_result.get('rows_per_sec'):
+            line += '  {:+.1%} vs baseline'.format(result['rows_per_sec'] / baseline_result['rows_per_sec'] - 1)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of tap-google-sheets against a local fake Google API')
+    parser.add_argument('--sheets', type=int, default=3, help='number of sheets')
+    parser.add_argument('--rows', type=int, default=10000, help='rows per sheet')
+    parser.add_argument('--columns', type=int, default=10, help='columns per sheet')
+    parser.add_argument('--types', default=','.join(DEFAULT_TYPES),
+                        help='column types, cycled through the columns: {}'.format(','.join(DEFAULT_TYPES)))
+    parser.add_argument('--config', default='{}', help='tap config (JSON) merged into the benchmark config')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='path of the baseline results')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='rows/sec slowdown vs the baseline reported as a regression')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spreadsheet = SyntheticSpreadsheet(sheets=args.sheets, rows=args.rows, columns=args.columns,
+                                       types=args.types.split(','))
+    results = run_benchmarks(spreadsheet, json.loads(args.config))
+    run_args = {name: getattr(args, name) for name in BASELINE_ARGS}
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as file:
+            stored_baseline = json.load(file)
+        if stored_baseline.get('args') == run_args:
+            baseline = stored_baseline.get('results', {})
+        else:
+            print('Baseline of other arguments, not compared: {}'.format(stored_baseline.get('args')))
+    print(format_results(results, baseline))
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({'args': run_args, 'results': results}, file, indent=2, sort_keys=True)
+            file.write('\n')
+        return 0
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print('REGRESSION: {}'.format(regression))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,13 +20,22 @@ setup(name='tap-google-sheets',
           ],
           'dev': [
               'ipdb',
+          ],
+          'async': [
+              'aiohttp>=3.8,<4'
+          ],
+          'orjson': [
+              'orjson>=3.6'
+          ],
+          'numpy': [
+              'numpy'
           ]
       },
       entry_points='''
           [console_scripts]
           tap-google-sheets=tap_google_sheets:main
       ''',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
       package_data={
           'tap_google_sheets': [
               'schemas/*.json'
@@ -6,8 +6,13 @@ import argparse
 import singer
 from singer import metadata, utils
 from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.rate_limiter import RateLimiter
+from tap_google_sheets import message_writer
 from tap_google_sheets.discover import discover
 from tap_google_sheets.sync import sync
+from tap_google_sheets.streams import get_config_bool
+from tap_google_sheets.stage_timers import STAGE_TIMERS
+from tap_google_sheets import profiler
 
 LOGGER = singer.get_logger()
 
@@ -24,6 +29,7 @@ def do_discover(client, spreadsheet_id):
 
     LOGGER.info('Starting discover')
     catalog = discover(client, spreadsheet_id)
+    STAGE_TIMERS.log_summary()
     json.dump(catalog.to_dict(), sys.stdout, indent=2)
     LOGGER.info('Finished discover')
 
@@ -31,13 +37,18 @@ def do_discover(client, spreadsheet_id):
 @singer.utils.handle_top_exception(LOGGER)
 def main():
 
+    # the profiling options are not accepted by singer's parse_args
+    sys.argv[1:], profile_dir, profile_memory = profiler.parse_profile_args(sys.argv[1:])
     parsed_args = singer.utils.parse_args(REQUIRED_CONFIG_KEYS)
+    profile_dir = profile_dir or parsed_args.config.get('profile_dir')
+    profile_memory = profile_memory or get_config_bool(parsed_args.config, 'profile_memory')
 
     with GoogleClient(parsed_args.config['client_id'],
                       parsed_args.config['client_secret'],
                       parsed_args.config['refresh_token'],
                       parsed_args.config.get('request_timeout'),
-                      parsed_args.config['user_agent']
+                      parsed_args.config['user_agent'],
+                      RateLimiter.from_config(parsed_args.config)
                       ) as client:
 
         state = {}
@@ -46,14 +57,17 @@ def main():
 
         config = parsed_args.config
         spreadsheet_id = config.get('spreadsheet_id')
+        message_writer.configure(config)
 
-        if parsed_args.discover:
-            do_discover(client, spreadsheet_id)
-        elif parsed_args.catalog:
-            sync(client=client,
-                 config=config,
-                 catalog=parsed_args.catalog,
-                 state=state)
+        with profiler.profiling(profile_dir, profile_memory):
+            if parsed_args.discover:
+                do_discover(client, spreadsheet_id)
+            elif parsed_args.catalog:
+                sync(client=client,
+                     config=config,
+                     catalog=parsed_args.catalog,
+                     state=state)
+                message_writer.MESSAGE_WRITER.flush()
 
 if __name__ == '__main__':
     main()
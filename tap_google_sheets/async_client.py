@@ -0,0 +1,288 @@
+import json
+import time
+import asyncio
+import functools
+import contextvars
+from datetime import datetime, timedelta
+from collections import OrderedDict
+import backoff
+import singer
+from singer import metrics
+from tap_google_sheets import client as sync_client
+from tap_google_sheets.client import Server5xxError, Server429Error, GoogleError, REQUEST_TIMEOUT
+from tap_google_sheets.rate_limiter import RateLimiter
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:
+    aiohttp = None
+
+LOGGER = singer.get_logger()
+
+# Size of the response contents received by the current asyncio task
+BYTES_RECEIVED = contextvars.ContextVar('bytes_received', default=None)
+# Seconds spent decoding the JSON responses received by the current asyncio task
+DECODE_SECONDS = contextvars.ContextVar('decode_seconds', default=None)
+
+if aiohttp:
+    TimeoutErrors = (asyncio.TimeoutError, aiohttp.ServerTimeoutError)
+    ConnectionErrors = (aiohttp.ClientConnectionError,)
+else:
+    TimeoutErrors = (asyncio.TimeoutError,)
+    ConnectionErrors = (ConnectionError,)
+
+
+def raise_for_error(status_code, content, error):
+    """
+    Same as client.raise_for_error, for the status code and the content of an aiohttp response
+    """
+    if status_code < 400:
+        return
+    try:
+        if len(content) == 0:
+            # There is nothing we can do here since Google has neither sent
+            # us a 2xx response nor a response content.
+            return
+        response = json.loads(content)
+        sync_client.raise_for_error_json(status_code, response, error)
+    except (ValueError, TypeError):
+        raise GoogleError(error)
+
+
+def on_exception(wait_gen, exception, max_tries, jitter=backoff.full_jitter, **wait_gen_kwargs):
+    """
+    Same as backoff.on_exception, for coroutine functions
+    (the async support of backoff==1.8.0 relies on asyncio.coroutine, removed in python 3.11)
+    """
+    def decorate(target):
+        @functools.wraps(target)
+        async def retry(*args, **kwargs):
+            wait = wait_gen(**wait_gen_kwargs)
+            tries = 0
+            while True:
+                tries += 1
+                try:
+                    return await target(*args, **kwargs)
+                except exception:
+                    if tries >= max_tries:
+                        LOGGER.error('Giving up {}(...) after {} tries'.format(target.__name__, tries))
+                        raise
+                    seconds = next(wait)
+                    if jitter is not None:
+                        seconds = jitter(seconds)
+                    LOGGER.info('Backing off {}(...) for {:.1f}s'.format(target.__name__, seconds))
+                    await asyncio.sleep(seconds)
+        return retry
+    return decorate
+
+
+class AsyncGoogleClient: # pylint: disable=too-many-instance-attributes
+    """
+    asyncio version of the GoogleClient, built on aiohttp (pip install tap-google-sheets[async]),
+    with the same error mapping, backoff, rate limit and access token refresh.
+    Many requests can be in flight at once under 1 event loop.
+    """
+    def __init__(self,
+                 client_id,
+                 client_secret,
+                 refresh_token,
+                 request_timeout=REQUEST_TIMEOUT,
+                 user_agent=None,
+                 max_connections=100,
+                 rate_limiter=None):
+        if aiohttp is None:
+            raise Exception('aiohttp is required for async requests: pip install tap-google-sheets[async]')
+        self.__client_id = client_id
+        self.__client_secret = client_secret
+        self.__refresh_token = refresh_token
+        self.__user_agent = user_agent
+        self.__access_token = None
+        self.__expires = None
+        self.__session = None
+        self.__token_lock = None
+        # The token buckets are thread-safe, and may be shared with a GoogleClient
+        self.rate_limiter = rate_limiter or RateLimiter.from_config({})
+        self.max_connections = max_connections
+        self.base_url = None
+        # if request_timeout is other than 0,"0" or "" then use request_timeout
+        if request_timeout and float(request_timeout):
+            request_timeout = float(request_timeout)
+        else: # If value is 0,"0" or "" then set default to 300 seconds.
+            request_timeout = REQUEST_TIMEOUT
+        self.request_timeout = request_timeout
+
+    @classmethod
+    def from_config(cls, config, rate_limiter=None):
+        return cls(config['client_id'],
+                   config['client_secret'],
+                   config['refresh_token'],
+                   config.get('request_timeout'),
+                   config['user_agent'],
+                   rate_limiter=rate_limiter or RateLimiter.from_config(config))
+
+    # Backoff request for 5 times at an interval of 10 seconds in case of Timeout or Connection error
+    @on_exception(backoff.constant,
+                  TimeoutErrors + ConnectionErrors,
+                  max_tries=5,
+                  interval=10,
+                  jitter=None) # Interval value not consistent if jitter not None
+    async def __aenter__(self):
+        if self.__session is None:
+            self.__session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections))
+            self.__token_lock = asyncio.Lock()
+        await self.get_access_token()
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.__session.close()
+
+    @on_exception(backoff.expo,
+                  Server5xxError,
+                  max_tries=5,
+                  factor=2)
+    async def get_access_token(self):
+        # The refresh_token never expires and may be used many times to generate each access_token
+        # Since the refresh_token does not expire, it is not included in get access_token response
+        if self.__access_token is not None and self.__expires > datetime.utcnow():
+            return
+
+        async with self.__token_lock:
+            # Another task may have refreshed the token while this task waited for the lock
+            if self.__access_token is not None and self.__expires > datetime.utcnow():
+                return
+
+            headers = {}
+            if self.__user_agent:
+                headers['User-Agent'] = self.__user_agent
+
+            async with self.__session.post(
+                    url=sync_client.GOOGLE_TOKEN_URI,
+                    headers=headers,
+                    data={
+                        'grant_type': 'refresh_token',
+                        'client_id': self.__client_id,
+                        'client_secret': self.__client_secret,
+                        'refresh_token': self.__refresh_token,
+                    }) as response:
+                content = await response.read()
+                status_code = response.status
+                reason = response.reason
+
+            if status_code >= 500:
+                raise Server5xxError()
+
+            if status_code != 200:
+                raise_for_error(status_code, content, '{} Client Error: {} for url: {}'.format(
+                    status_code, reason, sync_client.GOOGLE_TOKEN_URI))
+
+            data = json.loads(content)
+            self.__access_token = data['access_token']
+            self.__expires = datetime.utcnow() + timedelta(seconds=data['expires_in'])
+            LOGGER.info('Authorized, token expires = {}'.format(self.__expires))
+
+    async def call_rate_limiter(self, method):
+        """
+        Call a method of the rate limiter, in a worker thread when its buckets are shared through SQLite:
+            their transactions wait for the database lock (up to 60 seconds), which must not block the event loop
+        """
+        if self.rate_limiter.shared:
+            return await asyncio.get_running_loop().run_in_executor(None, method)
+        return method()
+
+    # Backoff request for 5 times at an interval of 10 seconds when we get Timeout error
+    @on_exception(backoff.constant,
+                  TimeoutErrors,
+                  max_tries=5,
+                  interval=10,
+                  jitter=None) # Interval value not consistent if jitter not None
+    @on_exception(backoff.expo,
+                  (Server5xxError, Server429Error) + ConnectionErrors,
+                  max_tries=7,
+                  factor=3,
+                  jitter=None)
+    async def request(self, method, path=None, url=None, api=None, **kwargs):
+        # Wait for a token of the rate limiter, the rate slows down after a 429 response
+        rate_limit_wait = await self.call_rate_limiter(self.rate_limiter.reserve)
+        if rate_limit_wait > 0:
+            await asyncio.sleep(rate_limit_wait)
+        await self.get_access_token()
+        base_url = sync_client.get_base_url(api)
+        self.base_url = base_url
+
+        if not url and path:
+            url = '{}/{}'.format(base_url, path)
+
+        # endpoint = stream_name (from sync.py API call)
+        endpoint = kwargs.pop('endpoint', None)
+        LOGGER.info('{} URL = {}'.format(endpoint, url))
+
+        # params are passed in the querystring as they are, without encoding (same as requests)
+        params = kwargs.pop('params', None)
+        if params:
+            url = '{}?{}'.format(url, params)
+
+        if 'headers' not in kwargs:
+            kwargs['headers'] = {}
+        kwargs['headers']['Authorization'] = 'Bearer {}'.format(self.__access_token)
+
+        if self.__user_agent:
+            kwargs['headers']['User-Agent'] = self.__user_agent
+
+        if method == 'POST':
+            kwargs['headers']['Content-Type'] = 'application/json'
+
+        with metrics.http_request_timer(endpoint) as timer:
+            # The paths and querystrings are already encoded by the streams, do not let aiohttp re-encode them
+            async with self.__session.request(method, URL(url, encoded=True), **kwargs) as response:
+                content = await response.read()
+                status_code = response.status
+                reason = response.reason
+            timer.tags[metrics.Tag.http_status_code] = status_code
+            timer.tags['rate_limit_wait'] = round(rate_limit_wait, 3)
+
+        bytes_received = BYTES_RECEIVED.get()
+        if bytes_received is not None:
+            bytes_received.append(len(content))
+
+        if status_code >= 500:
+            raise Server5xxError()
+
+        #Use retry functionality in backoff to wait and retry if
+        #response code equals 429 because rate limit has been exceeded
+        if status_code == 429:
+            await self.call_rate_limiter(self.rate_limiter.throttled)
+            raise Server429Error(json.loads(content).get("error", {}).get("message", "Rate limit exceeded"))
+
+        if status_code != 200:
+            raise_for_error(status_code, content, '{} Client Error: {} for url: {}'.format(status_code, reason, url))
+
+        await self.call_rate_limiter(self.rate_limiter.succeeded)
+        # Ensure keys and rows are ordered as received from API
+        start_time = time.perf_counter()
+        data = json.loads(content, object_pairs_hook=OrderedDict)
+        decode_seconds = DECODE_SECONDS.get()
+        if decode_seconds is not None:
+            decode_seconds.append(time.perf_counter() - start_time)
+        return data
+
+    async def get(self, path, api, **kwargs):
+        return await self.request(method='GET', path=path, api=api, **kwargs)
+
+    async def post(self, path, api, **kwargs):
+        return await self.request(method='POST', path=path, api=api, **kwargs)
+
+
+async def get_with_size(async_client, **kwargs):
+    """
+    GET with the async client, return the response and the size of the response content
+    """
+    bytes_received = []
+    token = BYTES_RECEIVED.set(bytes_received)
+    try:
+        data = await async_client.get(**kwargs)
+    finally:
+        BYTES_RECEIVED.reset(token)
+    return data, sum(bytes_received)
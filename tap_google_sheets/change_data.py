@@ -0,0 +1,147 @@
+import hashlib
+import sqlite3
+import simplejson as json
+import singer
+
+LOGGER = singer.get_logger()
+
+# Change data mode (change_data_db): the hash of each record of the sheets is stored in a SQLite database,
+#   keyed by the row number (__sdc_row) or by the value of a key column (change_data_key_column).
+# A sync writes only the records inserted or updated since the previous sync of the sheet,
+#   and with change_data_deletes a tombstone record (__sdc_deleted_at) for each key not found anymore.
+
+ROW_KEY_COLUMN = '__sdc_row'
+DELETED_AT_FIELD = '__sdc_deleted_at'
+# Max number of keys in the IN clause of a query (SQLite default max of 999 host parameters)
+MAX_QUERY_KEYS = 500
+
+
+def get_record_hash(record, key_column=ROW_KEY_COLUMN):
+    """
+    Hash of a record, with the keys sorted
+    With a key column, the row number is not hashed: a row moved by an insert or a delete above it is unchanged
+    """
+    if key_column != ROW_KEY_COLUMN:
+        record = {key: value for key, value in record.items() if key != ROW_KEY_COLUMN}
+    record_json = json.dumps(record, sort_keys=True, default=str, use_decimal=True)
+    return hashlib.blake2b(record_json.encode('utf-8'), digest_size=16).digest()
+
+
+class RowHashIndex:
+    """
+    Index of the record hashes of the sheets of a spreadsheet, stored in a SQLite database.
+    Each sync of a sheet is a pass: the rows seen by the pass are marked with its number,
+        and the rows of the previous passes not seen by the pass are the deleted rows.
+    A sheet resumed from a checkpoint continues the pass of the interrupted sync.
+    """
+    def __init__(self, path, spreadsheet_id, key_column=ROW_KEY_COLUMN):
+        self.spreadsheet_id = spreadsheet_id
+        self.key_column = key_column
+        # sheet_title: number of the pass of the current sync
+        self.passes = {}
+        # sheet_title: rows of the index staged by get_changed_records, until commit_sheet
+        self.staged_rows = {}
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS row_hashes (spreadsheet_id TEXT, sheet_title TEXT, row_key TEXT, '
+                'row_hash BLOB, sync_pass INTEGER, PRIMARY KEY (spreadsheet_id, sheet_title, row_key))')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS sheet_passes (spreadsheet_id TEXT, sheet_title TEXT, sync_pass INTEGER, '
+                'PRIMARY KEY (spreadsheet_id, sheet_title))')
+
+    def get_sync_pass(self, sheet_title):
+        """
+        Number of the last pass of the sheet, None if the sheet is not in the index
+        """
+        row = self.connection.execute(
+            'SELECT sync_pass FROM sheet_passes WHERE spreadsheet_id = ? AND sheet_title = ?',
+            (self.spreadsheet_id, sheet_title)).fetchone()
+        return row[0] if row else None
+
+    def has_sheet(self, sheet_title):
+        return self.get_sync_pass(sheet_title) is not None
+
+    def start_sheet(self, sheet_title, resume=False, full=False):
+        """
+        Start the pass of the sheet's sync, or continue the pass of the interrupted sync when resumed
+        A full pass (all the records written under a new table version) starts from an empty index of the sheet
+        """
+        sync_pass = self.get_sync_pass(sheet_title) or 0
+        if not resume or not sync_pass:
+            sync_pass += 1
+        with self.connection:
+            if full and not resume:
+                self.connection.execute(
+                    'DELETE FROM row_hashes WHERE spreadsheet_id = ? AND sheet_title = ?', (self.spreadsheet_id, sheet_title))
+            self.connection.execute(
+                'INSERT OR REPLACE INTO sheet_passes VALUES (?, ?, ?)', (self.spreadsheet_id, sheet_title, sync_pass))
+        self.passes[sheet_title] = sync_pass
+
+    def get_row_key(self, record):
+        """
+        Key of a record in the index, None for the records without a value in the key column
+        """
+        value = record.get(self.key_column)
+        if value is None or value == '':
+            return None
+        return json.dumps(value, use_decimal=True)
+
+    def get_row_hashes(self, sheet_title, row_keys):
+        row_hashes = {}
+        for index in range(0, len(row_keys), MAX_QUERY_KEYS):
+            chunk = row_keys[index:index + MAX_QUERY_KEYS]
+            row_hashes.update(self.connection.execute(
+                'SELECT row_key, row_hash FROM row_hashes WHERE spreadsheet_id = ? AND sheet_title = ? '
+                'AND row_key IN ({})'.format(', '.join('?' * len(chunk))),
+                [self.spreadsheet_id, sheet_title] + chunk).fetchall())
+        return row_hashes
+
+    def get_changed_records(self, sheet_title, records):
+        """
+        Return the records inserted or updated since the previous sync of the sheet, in order
+        All the records are staged to be stored in the index, marked as seen by the current pass,
+            when commit_sheet is called after the records are written and checkpointed
+        The records without a key are always returned
+        """
+        sync_pass = self.passes[sheet_title]
+        keyed_records = [(self.get_row_key(record), record) for record in records]
+        row_hashes = self.get_row_hashes(sheet_title, [row_key for row_key, _ in keyed_records if row_key is not None])
+        changed_records = []
+        index_rows = self.staged_rows.setdefault(sheet_title, [])
+        for row_key, record in keyed_records:
+            if row_key is None:
+                changed_records.append(record)
+                continue
+            record_hash = get_record_hash(record, self.key_column)
+            if row_hashes.get(row_key) != record_hash:
+                changed_records.append(record)
+            index_rows.append((self.spreadsheet_id, sheet_title, row_key, record_hash, sync_pass))
+        return changed_records
+
+    def commit_sheet(self, sheet_title):
+        """
+        Store the rows of the sheet staged since the last commit in the index
+        """
+        index_rows = self.staged_rows.pop(sheet_title, None)
+        if index_rows:
+            with self.connection:
+                self.connection.executemany('INSERT OR REPLACE INTO row_hashes VALUES (?, ?, ?, ?, ?)', index_rows)
+
+    def pop_deleted_keys(self, sheet_title):
+        """
+        Return the keys of the rows not seen by the current pass of the sheet, and remove them from the index
+        """
+        sync_pass = self.passes[sheet_title]
+        self.commit_sheet(sheet_title)
+        with self.connection:
+            rows = self.connection.execute(
+                'SELECT row_key FROM row_hashes WHERE spreadsheet_id = ? AND sheet_title = ? AND sync_pass < ?',
+                (self.spreadsheet_id, sheet_title, sync_pass)).fetchall()
+            self.connection.execute(
+                'DELETE FROM row_hashes WHERE spreadsheet_id = ? AND sheet_title = ? AND sync_pass < ?',
+                (self.spreadsheet_id, sheet_title, sync_pass))
+        return [json.loads(row_key, use_decimal=True) for row_key, in rows]
+
+    def close(self):
+        self.connection.close()
@@ -1,16 +1,22 @@
+import time
+import threading
 from datetime import datetime, timedelta
 from collections import OrderedDict
 import backoff
 import requests
 import singer
 from singer import metrics
-from singer import utils
 from requests.exceptions import Timeout, ConnectionError
+from tap_google_sheets.rate_limiter import RateLimiter
 
 BASE_URL = 'https://www.googleapis.com'
 GOOGLE_TOKEN_URI = 'https://oauth2.googleapis.com/token'
+SHEETS_BASE_URL = 'https://sheets.googleapis.com/v4'
+DRIVE_BASE_URL = 'https://www.googleapis.com/drive/v3'
 LOGGER = singer.get_logger()
 REQUEST_TIMEOUT = 300
+# Size of the chunks of the downloaded files
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
 class Server5xxError(Exception):
     pass
@@ -119,24 +125,39 @@ def raise_for_error(response):
             # Fetch the status code from the response object itself.
             status_code = response.status_code
             response = response.json()
-            if ('error' in response) or ('errorCode' in response):
-                # To form the error message, first, check for the message. If the message is not available, check for `error_description` in response.
-                # If both are not available, raise an Unknown Error.
-                message = 'HTTP-error-code: %s %s: %s' % (status_code, response.get('error', str(error)),
-                                      response.get('message',  response.get('error_description', 'Unknown Error')))
-                ex = get_exception_for_error_code(status_code)
-                raise ex(message)
-            raise GoogleError(error)
+            raise_for_error_json(status_code, response, error)
         except (ValueError, TypeError):
             raise GoogleError(error)
 
+def raise_for_error_json(status_code, response, error):
+    """
+    Raise the exception mapped to the status code, with the error message from the json content of the response
+    """
+    if ('error' in response) or ('errorCode' in response):
+        # To form the error message, first, check for the message. If the message is not available, check for `error_description` in response.
+        # If both are not available, raise an Unknown Error.
+        message = 'HTTP-error-code: %s %s: %s' % (status_code, response.get('error', str(error)),
+                              response.get('message',  response.get('error_description', 'Unknown Error')))
+        ex = get_exception_for_error_code(status_code)
+        raise ex(message)
+    raise GoogleError(error)
+
+def get_base_url(api):
+    """
+    Drive API for the 'files' api, else Sheets API
+    """
+    if api == 'files':
+        return DRIVE_BASE_URL
+    return SHEETS_BASE_URL
+
 class GoogleClient: # pylint: disable=too-many-instance-attributes
     def __init__(self,
                  client_id,
                  client_secret,
                  refresh_token,
                  request_timeout=REQUEST_TIMEOUT,
-                 user_agent=None):
+                 user_agent=None,
+                 rate_limiter=None):
         self.__client_id = client_id
         self.__client_secret = client_secret
         self.__refresh_token = refresh_token
@@ -144,6 +165,12 @@ class GoogleClient: # pylint: disable=too-many-instance-attributes
         self.__access_token = None
         self.__expires = None
         self.__session = requests.Session()
+        # the session and the access token are shared by the threads syncing sheets concurrently
+        self.__token_lock = threading.Lock()
+        self.__thread_local = threading.local()
+        # Rate Limit: https://developers.google.com/sheets/api/limits
+        #   60 read requests per minute per user, 300 per minute per project
+        self.rate_limiter = rate_limiter or RateLimiter.from_config({})
         self.base_url = None
         # if request_timeout is other than 0,"0" or "" then use request_timeout
         if request_timeout and float(request_timeout):
@@ -163,6 +190,7 @@ class GoogleClient: # pylint: disable=too-many-instance-attributes
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
+        self.rate_limiter.log_summary()
         self.__session.close()
 
     @backoff.on_exception(backoff.expo,
@@ -175,6 +203,14 @@ class GoogleClient: # pylint: disable=too-many-instance-attributes
         if self.__access_token is not None and self.__expires > datetime.utcnow():
             return
 
+        with self.__token_lock:
+            self.refresh_access_token()
+
+    def refresh_access_token(self):
+        # Another thread may have refreshed the token while this thread waited for the lock
+        if self.__access_token is not None and self.__expires > datetime.utcnow():
+            return
+
         headers = {}
         if self.__user_agent:
             headers['User-Agent'] = self.__user_agent
@@ -208,22 +244,61 @@ class GoogleClient: # pylint: disable=too-many-instance-attributes
                           max_tries=5,
                           interval=10,
                           jitter=None) # Interval value not consistent if jitter not None
-    # Rate Limit: https://developers.google.com/sheets/api/limits
-    #   100 request per 100 seconds per User
     @backoff.on_exception(backoff.expo,
                           (Server5xxError, ConnectionError, Server429Error),
                           max_tries=7,
                           factor=3,
                           jitter=None)
-    @utils.ratelimit(100, 100)
     def request(self, method, path=None, url=None, api=None, **kwargs):
+        response = self.send(method, path, url, api, **kwargs)
+        # Ensure keys and rows are ordered as received from API
+        start_time = time.perf_counter()
+        data = response.json(object_pairs_hook=OrderedDict)
+        self.__thread_local.decode_seconds = self.get_decode_seconds() + time.perf_counter() - start_time
+        return data
+
+    # Backoff request for 5 times at an interval of 10 seconds when we get Timeout error
+    @backoff.on_exception(backoff.constant,
+                          (Timeout),
+                          max_tries=5,
+                          interval=10,
+                          jitter=None) # Interval value not consistent if jitter not None
+    @backoff.on_exception(backoff.expo,
+                          (Server5xxError, ConnectionError, Server429Error),
+                          max_tries=7,
+                          factor=3,
+                          jitter=None)
+    def download(self, path, api, file, **kwargs):
+        """
+        GET a file (e.g. a Drive export), streamed to the file object in chunks of DOWNLOAD_CHUNK_SIZE bytes
+        Return the number of bytes written
+        """
+        # a retry downloads the whole file again
+        file.seek(0)
+        file.truncate()
+        response = self.send('GET', path, api=api, stream=True, **kwargs)
+        size = 0
+        with response:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+                size += len(chunk)
+        self.__thread_local.bytes_received = self.get_bytes_received() + size
+        file.flush()
+        return size
+
+    def send(self, method, path=None, url=None, api=None, stream=False, **kwargs):
+        """
+        Send a request, return the response after checking its status code
+        With stream, the content of the response is not read
+        """
+        # Wait for a token of the rate limiter, the rate slows down after a 429 response
+        rate_limit_wait = self.rate_limiter.acquire()
         self.get_access_token()
-        self.base_url = 'https://sheets.googleapis.com/v4'
-        if api == 'files':
-            self.base_url = 'https://www.googleapis.com/drive/v3'
+        base_url = get_base_url(api)
+        self.base_url = base_url
 
         if not url and path:
-            url = '{}/{}'.format(self.base_url, path)
+            url = '{}/{}'.format(base_url, path)
 
         # endpoint = stream_name (from sync.py API call)
         if 'endpoint' in kwargs:
@@ -243,10 +318,17 @@ class GoogleClient: # pylint: disable=too-many-instance-attributes
         if method == 'POST':
             kwargs['headers']['Content-Type'] = 'application/json'
 
+        if stream:
+            kwargs['stream'] = True
+
         with metrics.http_request_timer(endpoint) as timer:
             
             response = self.__session.request(method, url, timeout=self.request_timeout, **kwargs)
             timer.tags[metrics.Tag.http_status_code] = response.status_code
+            timer.tags['rate_limit_wait'] = round(rate_limit_wait, 3)
+
+        if not stream or response.status_code != 200:
+            self.__thread_local.bytes_received = self.get_bytes_received() + len(response.content)
 
         if response.status_code >= 500:
             raise Server5xxError()
@@ -254,13 +336,26 @@ class GoogleClient: # pylint: disable=too-many-instance-attributes
         #Use retry functionality in backoff to wait and retry if
         #response code equals 429 because rate limit has been exceeded
         if response.status_code == 429:
+            self.rate_limiter.throttled()
             raise Server429Error(response.json().get("error",{}).get("message", "Rate limit exceeded"))
 
         if response.status_code != 200:
             raise_for_error(response)
 
-        # Ensure keys and rows are ordered as received from API
-        return response.json(object_pairs_hook=OrderedDict)
+        self.rate_limiter.succeeded()
+        return response
+
+    def get_bytes_received(self):
+        """
+        Size of the response contents received by the current thread
+        """
+        return getattr(self.__thread_local, 'bytes_received', 0)
+
+    def get_decode_seconds(self):
+        """
+        Seconds spent decoding the JSON responses received by the current thread
+        """
+        return getattr(self.__thread_local, 'decode_seconds', 0)
 
     def get(self, path, api, **kwargs):
         return self.request(method='GET', path=path, api=api, **kwargs)
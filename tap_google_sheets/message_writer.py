@@ -0,0 +1,86 @@
+import sys
+import atexit
+import threading
+import simplejson as json
+import singer
+from singer import messages
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOGGER = singer.get_logger()
+
+# Size (in characters) of the RECORD messages buffered before a write to stdout
+DEFAULT_BUFFER_SIZE = 65536
+
+
+def format_message(message):
+    """
+    Serialize a message with orjson when it is installed (pip install tap-google-sheets[orjson]),
+        with simplejson otherwise, and for the messages orjson cannot serialize (Decimal, integers over 64 bits).
+    The non-ASCII characters are written as is (the currency symbols), and the Decimals as numbers.
+    """
+    message_dict = message.asdict()
+    if orjson is not None:
+        try:
+            return orjson.dumps(message_dict).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(message_dict, ensure_ascii=False, use_decimal=True)
+
+
+class MessageWriter:
+    """
+    Write the messages to stdout, with the RECORD messages buffered into large writes.
+    The buffer is written when it is full, and before any other message (SCHEMA, STATE, ACTIVATE_VERSION),
+        so the messages stay in order and a STATE is only written after the records it covers.
+    buffer_size = 0: each message is written and flushed, as singer.write_message.
+    """
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered_size = 0
+        self.lock = threading.Lock()
+
+    def write_message(self, message):
+        line = messages.format_message(message) + '\n'
+        with self.lock:
+            self.buffer.append(line)
+            self.buffered_size += len(line)
+            if not isinstance(message, messages.RecordMessage) or self.buffered_size >= self.buffer_size:
+                self.write_buffer()
+
+    def write_buffer(self):
+        if self.buffer:
+            sys.stdout.write(''.join(self.buffer))
+            self.buffer = []
+            self.buffered_size = 0
+        sys.stdout.flush()
+
+    def flush(self):
+        with self.lock:
+            self.write_buffer()
+
+
+MESSAGE_WRITER = MessageWriter()
+
+
+def configure(config):
+    """
+    Set the buffer size of the messages from the config: message_buffer_size, 0 = no buffer
+    """
+    buffer_size = config.get('message_buffer_size')
+    MESSAGE_WRITER.buffer_size = DEFAULT_BUFFER_SIZE if buffer_size in (None, '') else int(buffer_size)
+    LOGGER.info('Message writer: {}, buffer size: {}'.format(
+        'orjson' if orjson is not None else 'simplejson', MESSAGE_WRITER.buffer_size))
+
+
+# Overwrite the functions of the messages file of the singer module,
+#   to override the ensure_ascii param (the currency symbols were written as ascii values),
+#   and to write the messages (singer.write_record, write_state, write_schema, ...) through the buffer
+messages.format_message = format_message
+messages.write_message = MESSAGE_WRITER.write_message
+singer.write_message = MESSAGE_WRITER.write_message
+atexit.register(MESSAGE_WRITER.flush)
@@ -0,0 +1,237 @@
+import math
+import decimal
+import functools
+
+# Render the formatted value of a cell from its unformatted value and the number format of its column,
+#   the same as the values API with valueRenderOption = FORMATTED_VALUE, for the common patterns:
+#   digits (0 # ?), grouping and scaling (,), decimals (.), percent (%), scientific (E+ E-),
+#   literals ("text", \c, $ - + ( ) : space), locale currencies ([$€-407]) and up to 3 sections (;).
+# Other patterns (dates, fractions, conditions) fall back to the general (automatic) format.
+# Reference: https://developers.google.com/sheets/api/guides/formats
+
+# Patterns of the number format types, when the number format of the column has no pattern (en_US locale)
+DEFAULT_PATTERNS = {
+    'NUMBER': '#,##0.00',
+    'PERCENT': '0.00%',
+    'CURRENCY': '"$"#,##0.00',
+    'SCIENTIFIC': '0.00E+00'
+}
+
+# Number format types rendered with the general format
+#   DATE, TIME, DATE_TIME: the date and time columns are transformed from the unformatted serial numbers
+#   TEXT: a number in a TEXT formatted cell is shown as entered
+GENERAL_FORMAT_TYPES = ('DATE', 'TIME', 'DATE_TIME', 'TEXT')
+
+
+class UnsupportedPatternError(Exception):
+    pass
+
+
+def split_sections(pattern):
+    """
+    Split the pattern into its sections: positive;negative;zero;text
+    """
+    sections = []
+    section = ''
+    in_quotes = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char == ';' and not in_quotes:
+            sections.append(section)
+            section = ''
+            continue
+        section += char
+    sections.append(section)
+    return sections
+
+
+@functools.lru_cache(maxsize=256)
+def parse_section(section):
+    """
+    Parse a section of a pattern to (prefix, number pattern, suffix, percent)
+    The number pattern is the placeholders from the 1st to the last digit placeholder, ie. #,##0.00 or 0.00E+00
+    """
+    tokens = [] # (kind, text)
+    i = 0
+    while i < len(section):
+        char = section[i]
+        if char == '"':
+            end = section.find('"', i + 1)
+            end = len(section) if end == -1 else end
+            tokens.append(('literal', section[i + 1:end]))
+            i = end + 1
+        elif char == '\\':
+            tokens.append(('literal', section[i + 1:i + 2]))
+            i += 2
+        elif char == '_':
+            # width of the next character
+            tokens.append(('literal', ' '))
+            i += 2
+        elif char == '*':
+            # repeat the next character to fill the cell
+            i += 2
+        elif char == '[':
+            end = section.find(']', i)
+            if end == -1:
+                raise UnsupportedPatternError(section)
+            tag = section[i + 1:end]
+            if tag.startswith('$'):
+                # locale currency, ie. [$€-407]
+                tokens.append(('literal', tag[1:].split('-')[0]))
+            elif tag[:1] in ('<', '>', '='):
+                # conditions
+                raise UnsupportedPatternError(section)
+            # colors are not rendered
+            i = end + 1
+        elif char in '0#?,.':
+            tokens.append(('digit', char))
+            i += 1
+        elif char in 'Ee' and section[i + 1:i + 2] in ('+', '-'):
+            tokens.append(('exponent', section[i:i + 2].upper()))
+            i += 2
+        elif char == '%':
+            tokens.append(('percent', char))
+            i += 1
+        elif char.isalpha() or char in '/@':
+            # dates, times, fractions and text
+            raise UnsupportedPatternError(section)
+        else:
+            tokens.append(('literal', char))
+            i += 1
+
+    number_indexes = [index for index, (kind, _) in enumerate(tokens) if kind in ('digit', 'exponent')]
+    if not number_indexes:
+        return ''.join(text for _, text in tokens), '', '', any(kind == 'percent' for kind, _ in tokens)
+    first, last = number_indexes[0], number_indexes[-1]
+    if any(kind not in ('digit', 'exponent') for kind, _ in tokens[first:last + 1]):
+        # literals between the digits
+        raise UnsupportedPatternError(section)
+    prefix = ''.join(text for _, text in tokens[:first])
+    number_pattern = ''.join(text for _, text in tokens[first:last + 1])
+    suffix = ''.join(text for _, text in tokens[last + 1:])
+    return prefix, number_pattern, suffix, any(kind == 'percent' for kind, _ in tokens)
+
+
+def group_thousands(digits):
+    groups = []
+    while len(digits) > 3:
+        groups.insert(0, digits[-3:])
+        digits = digits[:-3]
+    groups.insert(0, digits)
+    return ','.join(groups)
+
+
+def render_digits(value, number_pattern):
+    """
+    Render a positive decimal.Decimal with the placeholders of a number pattern without exponent, ie. #,##0.00
+    """
+    integer_pattern, point, decimal_pattern = number_pattern.partition('.')
+    # Commas after the last integer placeholder scale the number by 1000
+    stripped_integer_pattern = integer_pattern.rstrip(',')
+    value = value.scaleb(-3 * (len(integer_pattern) - len(stripped_integer_pattern)))
+    integer_pattern = stripped_integer_pattern
+
+    min_integer_digits = integer_pattern.count('0')
+    min_decimals = decimal_pattern.count('0')
+    max_decimals = len([char for char in decimal_pattern if char in '0#?'])
+
+    rounded = value.quantize(decimal.Decimal(1).scaleb(-max_decimals), rounding=decimal.ROUND_HALF_UP)
+    integer_digits, _, decimal_digits = '{:f}'.format(rounded).partition('.')
+    while len(decimal_digits) > min_decimals and decimal_digits.endswith('0'):
+        decimal_digits = decimal_digits[:-1]
+    if integer_digits == '0' and min_integer_digits == 0:
+        integer_digits = ''
+    integer_digits = integer_digits.zfill(min_integer_digits)
+    if ',' in integer_pattern and integer_digits:
+        integer_digits = group_thousands(integer_digits)
+    return integer_digits + point + decimal_digits
+
+
+def render_scientific(value, number_pattern):
+    """
+    Render a positive decimal.Decimal with the placeholders of a number pattern with exponent, ie. 0.00E+00
+    """
+    mantissa_pattern, exponent_pattern = number_pattern.split('E', 1)
+    exponent_sign, exponent_pattern = exponent_pattern[0], exponent_pattern[1:]
+    integer_digits = max(len([char for char in mantissa_pattern.partition('.')[0] if char in '0#?']), 1)
+    max_decimals = len([char for char in mantissa_pattern.partition('.')[2] if char in '0#?'])
+
+    exponent = 0
+    if value:
+        exponent = math.floor(value.log10()) - (integer_digits - 1)
+        # rounding the mantissa may carry to the next power of 10
+        rounded = value.scaleb(-exponent).quantize(decimal.Decimal(1).scaleb(-max_decimals), rounding=decimal.ROUND_HALF_UP)
+        if rounded >= decimal.Decimal(10) ** integer_digits:
+            exponent += 1
+    mantissa = render_digits(value.scaleb(-exponent), mantissa_pattern)
+    sign = '-' if exponent < 0 else ('+' if exponent_sign == '+' else '')
+    return '{}E{}{}'.format(mantissa, sign, str(abs(exponent)).zfill(exponent_pattern.count('0')))
+
+
+def render_number(value, pattern):
+    """
+    Render a number (int or float) with a pattern of the Sheets number formats
+    """
+    sections = split_sections(pattern)
+    sign = ''
+    if value < 0 and len(sections) > 1:
+        section = sections[1]
+    elif value == 0 and len(sections) > 2:
+        section = sections[2]
+    else:
+        section = sections[0]
+        if value < 0:
+            sign = '-'
+    prefix, number_pattern, suffix, percent = parse_section(section)
+    if not number_pattern:
+        return sign + prefix
+    number = abs(decimal.Decimal(repr(value)))
+    if percent:
+        number = number.scaleb(2)
+    if 'E' in number_pattern:
+        digits = render_scientific(number, number_pattern)
+    else:
+        digits = render_digits(number, number_pattern)
+    return '{}{}{}{}'.format(sign, prefix, digits, suffix)
+
+
+def render_general(value):
+    """
+    Render a value with the general (automatic) format
+    """
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return '{:.15g}'.format(value).upper()
+    return str(value)
+
+
+def render_formatted_value(value, number_format=None):
+    """
+    Render the formatted value of an unformatted value, with the number format of its column
+    """
+    if value is None or value == '':
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return render_general(value)
+    number_format = number_format or {}
+    number_format_type = number_format.get('type')
+    if number_format_type in GENERAL_FORMAT_TYPES:
+        return render_general(value)
+    pattern = number_format.get('pattern') or DEFAULT_PATTERNS.get(number_format_type)
+    if not pattern:
+        return render_general(value)
+    try:
+        return render_number(value, pattern)
+    except (UnsupportedPatternError, decimal.InvalidOperation):
+        return render_general(value)
@@ -0,0 +1,112 @@
+import singer
+
+LOGGER = singer.get_logger()
+
+# Fixed page size, when no cells budget is configured
+BATCH_ROWS = 200
+# Defaults for the adaptive page size
+MIN_ROWS_PER_REQUEST = 1
+MAX_ROWS_PER_REQUEST = 10000
+TARGET_BYTES_PER_REQUEST = 5 * 1024 * 1024
+TARGET_SECONDS_PER_REQUEST = 10
+# Max growth of the page size between 2 pages
+MAX_GROWTH_FACTOR = 2
+# Max number of column ranges of a page, all in the URL of the values:batchGet API call
+MAX_COLUMN_RANGES = 40
+
+
+def get_config_number(config, key, default, cast=int):
+    """
+    Get a number from the config, use the default if the value is None, 0, "0" or ""
+    """
+    value = config.get(key)
+    if value and cast(value):
+        return cast(value)
+    return default
+
+
+def get_column_ranges(column_indexes, last_column_index, max_ranges=MAX_COLUMN_RANGES):
+    """
+    Turn the indexes of the columns to fetch into the minimal list of contiguous column ranges: (from index, to index)
+    Above max_ranges, the ranges separated by the smallest gaps are merged
+    Return None when all the columns from A to the last column are fetched, or no column
+    """
+    ranges = []
+    for column_index in sorted(set(column_indexes)):
+        if ranges and column_index == ranges[-1][1] + 1:
+            ranges[-1][1] = column_index
+        else:
+            ranges.append([column_index, column_index])
+    while len(ranges) > max(max_ranges, 1):
+        position = min(range(1, len(ranges)), key=lambda index: ranges[index][0] - ranges[index - 1][1])
+        ranges[position - 1][1] = ranges.pop(position)[1]
+    if not ranges or ranges == [[1, last_column_index]]:
+        return None
+    return [tuple(column_range) for column_range in ranges]
+
+
+class PagePlanner:
+    """
+    Plan the number of rows of each page of a sheet.
+    Without a cells budget, every page has BATCH_ROWS rows.
+    With a cells budget, the 1st page has target_cells // columns rows, and each following page
+        is sized from the response time and the payload size measured for the previous pages,
+        so that a request stays under the cells, bytes and seconds budgets.
+    """
+    def __init__(self,
+                 column_count,
+                 target_cells=None,
+                 target_bytes=TARGET_BYTES_PER_REQUEST,
+                 target_seconds=TARGET_SECONDS_PER_REQUEST,
+                 max_rows=MAX_ROWS_PER_REQUEST,
+                 min_rows=MIN_ROWS_PER_REQUEST):
+        self.column_count = max(column_count, 1)
+        self.target_cells = target_cells
+        self.target_bytes = target_bytes
+        self.target_seconds = target_seconds
+        self.max_rows = max(max_rows, 1)
+        self.min_rows = min(max(min_rows, 1), self.max_rows)
+        if target_cells:
+            self.rows = self.clamp(target_cells // self.column_count)
+        else:
+            self.rows = BATCH_ROWS
+
+    @classmethod
+    def from_config(cls, config, columns, grid_properties, column_ranges=None):
+        """
+        Create the page planner of a sheet, the cells of a page are the columns from A to the last column,
+            or the columns of the column ranges fetched
+        """
+        column_count = max([col.get('columnIndex') for col in columns] + [1])
+        if grid_properties.get('columnCount'):
+            column_count = min(column_count, grid_properties.get('columnCount'))
+        if column_ranges:
+            column_count = sum(to_column - from_column + 1 for from_column, to_column in column_ranges)
+        return cls(
+            column_count,
+            target_cells=get_config_number(config, 'target_cells_per_request', None),
+            target_bytes=get_config_number(config, 'target_bytes_per_request', TARGET_BYTES_PER_REQUEST),
+            target_seconds=get_config_number(config, 'target_seconds_per_request', TARGET_SECONDS_PER_REQUEST, float),
+            max_rows=get_config_number(config, 'max_rows_per_request', MAX_ROWS_PER_REQUEST),
+            min_rows=get_config_number(config, 'min_rows_per_request', MIN_ROWS_PER_REQUEST))
+
+    def clamp(self, rows):
+        return int(max(self.min_rows, min(rows, self.max_rows)))
+
+    def observe(self, rows_requested, rows_returned, response_bytes, seconds):
+        """
+        Update the number of rows of the next page from the measures of the last page
+        """
+        if not self.target_cells:
+            return
+        rows = self.target_cells // self.column_count
+        # Bytes budget, from the average payload size of the returned rows
+        if response_bytes and rows_returned:
+            rows = min(rows, self.target_bytes * rows_returned // response_bytes)
+        # Time budget, assuming the response time grows linearly with the rows requested
+        if seconds > 0 and rows_requested:
+            rows = min(rows, int(self.target_seconds * rows_requested / seconds))
+        rows = self.clamp(min(rows, self.rows * MAX_GROWTH_FACTOR))
+        if rows != self.rows:
+            LOGGER.info('Page size changed from {} to {} rows'.format(self.rows, rows))
+        self.rows = rows
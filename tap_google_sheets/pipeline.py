@@ -0,0 +1,66 @@
+import queue
+import singer
+
+LOGGER = singer.get_logger()
+
+# Marks the end of the pages in a PageQueue
+PAGES_DONE = object()
+
+
+class PageQueue:
+    """
+    Bounded queue of pages between a producer thread, which fetches the pages of a sheet,
+    and the main thread, which transforms the pages and writes the records.
+    The producer stops putting pages when the stop_event is set, so that it never blocks
+        on a full queue after the main thread has stopped reading (ie. on an error).
+    """
+    def __init__(self, maxsize, stop_event):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stop_event = stop_event
+
+    def put(self, item):
+        """
+        Put an item in the queue, return False if the sync is stopped before there is room for it
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce(self, pages):
+        """
+        Put the pages from the pages iterator in the queue (run in a worker thread)
+        Exceptions are put in the queue and raised in the main thread
+        """
+        try:
+            for page in pages:
+                if not self.put(page):
+                    return
+        except Exception as err: # pylint: disable=broad-except
+            self.put(err)
+            return
+        self.put(PAGES_DONE)
+
+    def __iter__(self):
+        """
+        Get the pages from the queue, in order (run in the main thread)
+        """
+        while True:
+            item = self.queue.get()
+            if item is PAGES_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def submit_pages(executor, pages, maxsize, stop_event):
+    """
+    Fetch the pages of a sheet in the executor, return the PageQueue to iterate over the pages
+    """
+    page_queue = PageQueue(maxsize, stop_event)
+    executor.submit(page_queue.produce, pages)
+    return page_queue
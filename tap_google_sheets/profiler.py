@@ -0,0 +1,154 @@
+import os
+import re
+import pstats
+import cProfile
+import contextlib
+import tracemalloc
+import singer
+
+LOGGER = singer.get_logger()
+
+# Profiling mode (--profile DIR or the profile_dir config): the discovery or the sync runs under cProfile,
+#   with a profile for each stream (sheet), switched at the currently_syncing boundaries,
+#   and a profile for the rest of the run (__run__).
+# With --profile-memory (or profile_memory), the memory allocations are traced with tracemalloc,
+#   and the top allocations of each stream are reported.
+# Only the main thread is profiled: the pages fetched by the worker threads (max_workers, prefetch_pages)
+#   are not in the profiles, the time waiting for them is.
+
+RUN_SEGMENT = '__run__'
+# Number of functions in the text report of the profiles
+TOP_FUNCTIONS = 40
+# Number of allocation sites in the reports of the memory allocations
+TOP_ALLOCATIONS = 25
+
+PROFILER = None
+
+
+def get_file_name(segment):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', segment)
+
+
+class Profiler:
+    """
+    cProfile and tracemalloc profiles of the segments of a run: the streams, and the rest of the run
+    A segment entered several times (a stream synced in several parts) adds to the same profile
+    """
+    def __init__(self, directory, memory=False):
+        self.directory = directory
+        self.memory = memory
+        # segment: cProfile.Profile, in the order of the segments
+        self.profiles = {}
+        self.segment = None
+        self.snapshot = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.memory:
+            tracemalloc.start()
+        self.switch(None)
+
+    def switch(self, stream_name):
+        """
+        Switch to the profile of a stream, or of the rest of the run (stream_name None)
+        """
+        segment = stream_name or RUN_SEGMENT
+        if segment == self.segment:
+            return
+        self.stop_segment()
+        self.segment = segment
+        if self.memory:
+            tracemalloc.reset_peak()
+            self.snapshot = tracemalloc.take_snapshot()
+        self.profiles.setdefault(segment, cProfile.Profile()).enable()
+
+    def stop_segment(self):
+        if self.segment is None:
+            return
+        self.profiles[self.segment].disable()
+        if self.memory:
+            self.write_memory_report(self.segment)
+        self.segment = None
+
+    def write_memory_report(self, segment):
+        """
+        Append the peak traced memory and the top allocations of the segment since its start to its report
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')])
+        statistics = snapshot.compare_to(self.snapshot, 'lineno')
+        path = os.path.join(self.directory, '{}.allocations.txt'.format(get_file_name(segment)))
+        with open(path, 'a') as file:
+            file.write('Segment: {}, peak traced memory: {:.1f} KiB\n'.format(segment, peak / 1024))
+            for statistic in statistics[:TOP_ALLOCATIONS]:
+                file.write('{}\n'.format(statistic))
+            file.write('\n')
+        self.snapshot = None
+
+    def stop(self):
+        """
+        Write the profile of each segment (.pstats), and the profile of the whole run with a text report
+        """
+        self.stop_segment()
+        if self.memory:
+            tracemalloc.stop()
+        for segment, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(self.directory, '{}.pstats'.format(get_file_name(segment))))
+        stats = pstats.Stats(*self.profiles.values())
+        stats.dump_stats(os.path.join(self.directory, 'all.pstats'))
+        with open(os.path.join(self.directory, 'all.txt'), 'w') as file:
+            stats.stream = file
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            stats.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+        LOGGER.info('Profiles of {} segments written to: {}'.format(len(self.profiles), self.directory))
+
+
+def switch(stream_name):
+    """
+    Switch the profile to a stream (None: the rest of the run), when profiling
+    """
+    if PROFILER:
+        PROFILER.switch(stream_name)
+
+
+@contextlib.contextmanager
+def profiling(directory, memory=False):
+    """
+    Profile the run into the directory, no profiling without a directory
+    """
+    global PROFILER # pylint: disable=global-statement
+    if not directory:
+        yield
+        return
+    PROFILER = Profiler(directory, memory)
+    PROFILER.start()
+    try:
+        yield
+    finally:
+        PROFILER.stop()
+        PROFILER = None
+
+
+def parse_profile_args(args):
+    """
+    Remove the profiling options from the command line arguments, which singer's parse_args does not accept:
+        --profile DIR: write the profiles to DIR
+        --profile-memory: also trace the memory allocations
+    Return the other arguments, the profile directory and the memory option
+    """
+    other_args = []
+    directory = None
+    memory = False
+    args = iter(args)
+    for arg in args:
+        if arg == '--profile':
+            directory = next(args, None)
+        elif arg.startswith('--profile='):
+            directory = arg[len('--profile='):]
+        elif arg == '--profile-memory':
+            memory = True
+        else:
+            other_args.append(arg)
+    return other_args, directory, memory
@@ -0,0 +1,180 @@
+import time
+import sqlite3
+import threading
+import contextlib
+import singer
+from tap_google_sheets.paging import get_config_number
+
+LOGGER = singer.get_logger()
+
+# Read quotas: https://developers.google.com/sheets/api/limits
+#   60 read requests per minute per user per project
+#   300 read requests per minute per project
+USER_REQUESTS_PER_MINUTE = 60
+PROJECT_REQUESTS_PER_MINUTE = 300
+# On a 429 response the rate is halved, down to this fraction of the quota
+MIN_RATE_FRACTION = 0.1
+# Number of successful requests to recover from the min rate to the full quota
+RECOVERY_REQUESTS = 20
+
+
+class TokenBucket:
+    """
+    Token bucket of `requests_per_minute` tokens per minute, holding up to `burst` tokens.
+    A request reserves a token, and waits until the token is refilled when the bucket is empty.
+    The refill rate is adaptive: halved on each 429 response (down to MIN_RATE_FRACTION of the quota),
+        and raised back to the quota step by step with each successful request.
+    """
+    def __init__(self, requests_per_minute, burst=None, clock=time.monotonic):
+        self.max_rate = requests_per_minute / 60.0 # tokens per second
+        self.rate = self.max_rate
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.capacity = burst or requests_per_minute
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @contextlib.contextmanager
+    def synchronized(self):
+        """
+        Hold the bucket, to update its tokens and rate
+        """
+        with self.lock:
+            yield
+
+    def reserve(self):
+        """
+        Take a token, return the seconds to wait before the request may be sent
+        The tokens go negative while requests are waiting, so that they are served in order
+        """
+        with self.synchronized():
+            self.refill(self.clock())
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def throttled(self):
+        with self.synchronized():
+            self.refill(self.clock())
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Do not burst again right after a 429
+            self.tokens = min(self.tokens, 0)
+            LOGGER.warning('Rate limit exceeded, slowing down to {:.1f} requests per minute'.format(self.rate * 60))
+
+    def succeeded(self):
+        with self.synchronized():
+            if self.rate >= self.max_rate:
+                return
+            self.refill(self.clock())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / RECOVERY_REQUESTS)
+            if self.rate >= self.max_rate:
+                LOGGER.info('Rate limit recovered to {:.1f} requests per minute'.format(self.rate * 60))
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket stored in a SQLite database, shared by all the tap processes using the same database path.
+    The tokens and the adaptive rate are read and written in an immediate transaction,
+        which locks the database, so a 429 seen by 1 process slows down all of them.
+    """
+    def __init__(self, path, name, requests_per_minute, burst=None, clock=time.time):
+        super().__init__(requests_per_minute, burst, clock)
+        self.name = name
+        # The connection is shared by the threads of the process, under self.lock
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        with self.transaction():
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL, rate REAL)')
+            self.connection.execute(
+                'INSERT OR IGNORE INTO token_buckets VALUES (?, ?, ?, ?)', (name, self.tokens, self.updated, self.rate))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    @contextlib.contextmanager
+    def synchronized(self):
+        with self.lock, self.transaction():
+            self.tokens, self.updated, rate = self.connection.execute(
+                'SELECT tokens, updated, rate FROM token_buckets WHERE name = ?', (self.name,)).fetchone()
+            # The quota may differ between processes, keep the rate within the quota of this process
+            self.rate = max(self.min_rate, min(rate, self.max_rate))
+            yield
+            self.connection.execute(
+                'UPDATE token_buckets SET tokens = ?, updated = ?, rate = ? WHERE name = ?',
+                (self.tokens, self.updated, self.rate, self.name))
+
+
+class RateLimiter:
+    """
+    Rate limiter of the requests of a client, shared by all its threads (or asyncio tasks).
+    A request takes a token from each bucket (per user and per project quotas), and waits for the slowest one.
+    """
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # The shared buckets block while another process holds the database lock
+        self.shared = any(isinstance(bucket, SharedTokenBucket) for bucket in buckets)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        With a rate_limit_db path, the buckets are shared with the other tap processes using the same path
+        """
+        burst = get_config_number(config, 'rate_limit_burst', None)
+        quotas = [
+            ('user', get_config_number(config, 'user_requests_per_minute', USER_REQUESTS_PER_MINUTE, float)),
+            ('project', get_config_number(config, 'project_requests_per_minute', PROJECT_REQUESTS_PER_MINUTE, float))]
+        path = config.get('rate_limit_db')
+        if path:
+            LOGGER.info('Rate limit shared through {}'.format(path))
+            return cls([SharedTokenBucket(path, name, requests_per_minute, burst) for name, requests_per_minute in quotas])
+        return cls([TokenBucket(requests_per_minute, burst) for name, requests_per_minute in quotas])
+
+    def reserve(self):
+        """
+        Take a token from each bucket, return the seconds to wait before the request may be sent
+        """
+        wait = max([bucket.reserve() for bucket in self.buckets] + [0])
+        with self.lock:
+            self.requests += 1
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds += wait
+        return wait
+
+    def acquire(self):
+        """
+        Wait for a token, return the seconds waited
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self):
+        for bucket in self.buckets:
+            bucket.throttled()
+
+    def succeeded(self):
+        for bucket in self.buckets:
+            bucket.succeeded()
+
+    def log_summary(self):
+        LOGGER.info('Rate limiter: {} of {} requests waited for a token, {:.1f} seconds in total'.format(
+            self.waits, self.requests, self.wait_seconds))
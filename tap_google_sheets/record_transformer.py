@@ -0,0 +1,172 @@
+import decimal
+import singer
+from singer.transform import string_to_datetime
+
+LOGGER = singer.get_logger()
+
+# Compiled record transformer (record_transform = compiled) for the sheet streams:
+#   the schema and the metadata of a stream are compiled once to a converter for each field,
+#   with the same rules as singer's Transformer with the tap's new_transform (streams.py):
+#   the null/type order, date-time, singer.decimal, the ',' of the integer and number strings,
+#   and the strings kept as is for the boolean type.
+# A record the converters cannot transform is transformed by singer's Transformer,
+#   which raises the same error as without the compiled transformer.
+
+
+class NotCompilableError(Exception):
+    pass
+
+
+def compile_type(typ, schema):
+    """
+    Return the converter of a type of a schema: value -> (success, transformed value)
+    """
+    if typ == 'null':
+        def convert(data):
+            if data is None or data == '':
+                return True, None
+            return False, None
+
+    elif schema.get('format') == 'date-time':
+        def convert(data):
+            if data is None or data == '':
+                return False, None
+            data = string_to_datetime(data)
+            if data is None:
+                return False, None
+            return True, data
+
+    elif schema.get('format') == 'singer.decimal':
+        def convert(data):
+            if data is None:
+                return False, None
+            if isinstance(data, (str, float, int)):
+                try:
+                    return True, str(decimal.Decimal(str(data)))
+                except Exception:
+                    return False, None
+            elif isinstance(data, decimal.Decimal):
+                try:
+                    if data.is_snan():
+                        return True, 'NaN'
+                    return True, str(data)
+                except Exception:
+                    return False, None
+            return False, None
+
+    elif typ in ('object', 'array'):
+        # The records of the sheets are flat
+        raise NotCompilableError(typ)
+
+    elif typ == 'string':
+        def convert(data):
+            if data is None:
+                return False, None
+            try:
+                return True, str(data)
+            except Exception:
+                return False, None
+
+    elif typ in ('integer', 'number'):
+        cast = int if typ == 'integer' else float
+        def convert(data):
+            if isinstance(data, str):
+                data = data.replace(',', '')
+            try:
+                return True, cast(data)
+            except Exception:
+                return False, None
+
+    elif typ == 'boolean':
+        def convert(data):
+            # return the data as string itself if the value is of type string
+            if isinstance(data, str):
+                return True, data
+            try:
+                return True, bool(data)
+            except Exception:
+                return False, None
+
+    else:
+        def convert(data):
+            return False, None
+
+    return convert
+
+
+def compile_schema(schema):
+    """
+    Return the converter of a schema: value -> (success, transformed value)
+    """
+    if 'anyOf' in schema:
+        converters = tuple(compile_schema(subschema) for subschema in schema['anyOf'])
+    elif 'type' not in schema:
+        # no typing information, the value is not transformed
+        return lambda data: (True, data)
+    else:
+        types = schema['type']
+        if not isinstance(types, list):
+            types = [types]
+        # null is tried last
+        types = [typ for typ in types if typ != 'null'] + [typ for typ in types if typ == 'null']
+        converters = tuple(compile_type(typ, schema) for typ in types)
+
+    if len(converters) == 1:
+        return converters[0]
+
+    def convert(data):
+        for converter in converters:
+            success, transformed_data = converter(data)
+            if success:
+                return success, transformed_data
+        return False, None
+    return convert
+
+
+def get_filtered_fields(schema, stream_metadata):
+    """
+    Return the fields removed from the records by the metadata: not selected, or unsupported
+    """
+    filtered_fields = set()
+    for field_name in schema.get('properties', {}):
+        field_metadata = stream_metadata.get(('properties', field_name), {})
+        if field_metadata.get('inclusion') == 'automatic':
+            continue
+        if field_metadata.get('selected') is False or field_metadata.get('inclusion') == 'unsupported':
+            filtered_fields.add(field_name)
+    return filtered_fields
+
+
+def compile_record_transformer(schema, stream_metadata):
+    """
+    Compile the schema and the metadata of a stream to a record transformer: record -> transformed record
+    Return None for the schemas that are not compiled (not a flat object), transformed by singer's Transformer
+    """
+    types = schema.get('type')
+    if not isinstance(types, list):
+        types = [types]
+    properties = schema.get('properties')
+    if 'anyOf' in schema or schema.get('patternProperties') or types[0] != 'object' or not properties:
+        return None
+    try:
+        converters = {field_name: compile_schema(field_schema) for field_name, field_schema in properties.items()}
+    except NotCompilableError:
+        return None
+    for field_name in get_filtered_fields(schema, stream_metadata or {}):
+        del converters[field_name]
+
+    def transform(record):
+        """
+        Return the transformed record, or None if a value does not match its schema
+        The fields which are not in the schema (or filtered by the metadata) are removed
+        """
+        result = {}
+        for key, value in record.items():
+            converter = converters.get(key)
+            if converter is None:
+                continue
+            success, result[key] = converter(value)
+            if not success:
+                return None
+        return result
+    return transform
@@ -6,6 +6,13 @@ from tap_google_sheets.streams import STREAMS
 
 LOGGER = singer.get_logger()
 
+# Batched sheet_metadata query: the rows 1 & 2 of many sheets in 1 API call
+#   up to MAX_BATCH_SHEETS sheets (response size) and MAX_BATCH_QUERYSTRING_LENGTH characters of querystring (URL length)
+MAX_BATCH_SHEETS = 50
+MAX_BATCH_QUERYSTRING_LENGTH = 6000
+# Only the cell fields used to create the sheet_json_schema and columns
+BATCH_FIELDS = 'sheets(properties(sheetId,title),data(rowData(values(formattedValue,effectiveValue,effectiveFormat/numberFormat))))'
+
 # Reference:
 # https://github.com/singer-io/getting-started/blob/master/docs/DISCOVERY_MODE.md#Metadata
 
@@ -184,6 +191,7 @@ def get_sheet_schema_columns(sheet):
             # unsupported field description if the field is to be skipped
             col_properties = {'type': ['null', 'string'], 'description': 'Column is unsupported and would be skipped because header is not available'}
             column_gs_type = 'stringValue'
+            column_number_format = {}
             LOGGER.info('WARNING: SKIPPED COLUMN; NO COLUMN HEADER. SHEET: {}, COL: {}, CELL: {}1'.format(
                 sheet_title, column_name, column_letter))
             LOGGER.info('  This column will be skipped during data loading.')
@@ -213,6 +221,9 @@ def get_sheet_schema_columns(sheet):
                 'columnType': column_gs_type,
                 'columnSkipped': column_is_skipped
             }
+            # number format of the 2nd row, to render the formatted values locally (fetch_mode = local_format)
+            if column_number_format:
+                column['columnNumberFormat'] = column_number_format
             columns.append(column)
 
 #             if column_gs_type in {'numberType.DATE_TIME', 'numberType.DATE', 'numberType.TIME', 'numberType'}:
@@ -231,23 +242,55 @@ def get_sheet_schema_columns(sheet):
     return sheet_json_schema, columns
 
 
+# Compare the header row (row 1, formatted values) of a sheet with its columns from the discovery
+#   Return a description of the 1st difference, or None if the header row still matches the columns
+def get_columns_drift(columns, header_row):
+    for column in columns:
+        index = column.get('columnIndex') - 1
+        header_value = '{}'.format(header_row[index]) if index < len(header_row) else ''
+        column_header = '' if column.get('columnSkipped') else column.get('columnName')
+        if header_value != column_header:
+            return 'CELL: {}1, HEADER: {}, COLUMN: {}'.format(column.get('columnLetter'), header_value, column_header)
+
+    # Headers after the last column: the scan stopped at the end of the headers (all the next headers are empty),
+    #   or at 2 consecutive skipped headers (the 2nd one, after the last column, is empty)
+    next_headers = header_row[len(columns):]
+    if columns and columns[-1].get('prior_column_skipped'):
+        next_headers = next_headers[:1]
+    for offset, header_value in enumerate(next_headers):
+        if header_value != '':
+            return 'CELL: {}1, NEW HEADER: {}'.format(colnum_string(len(columns) + offset + 1), header_value)
+    return None
+
+
 # Get Header Row and 1st data row (Rows 1 & 2) from a Sheet on Spreadsheet w/ sheet_metadata query
 #   endpoint: spreadsheets/{spreadsheet_id}
 #   params: includeGridData = true, ranges = '{sheet_title}'!1:2
 # This endpoint includes detailed metadata about each cell - incl. data type, formatting, etc.
 def get_sheet_metadata(sheet, spreadsheet_id, client):
+    path, api, endpoint = get_sheet_metadata_request(sheet, spreadsheet_id)
+    sheet_md_results = client.get(path=path, api=api, endpoint=endpoint)
+    return parse_sheet_metadata(sheet, sheet_md_results)
+
+
+# Return the path, api and endpoint of the sheet_metadata query of a sheet
+def get_sheet_metadata_request(sheet, spreadsheet_id):
     sheet_id = sheet.get('properties', {}).get('sheetId')
     sheet_title = sheet.get('properties', {}).get('title')
     LOGGER.info('sheet_id = {}, sheet_title = {}'.format(sheet_id, sheet_title))
 
     stream_name = 'sheet_metadata'
-    stream_obj = STREAMS.get(stream_name)(client, spreadsheet_id)
+    stream_obj = STREAMS.get(stream_name)(None, spreadsheet_id)
     api = stream_obj.api
     sheet_title_encoded = urllib.parse.quote_plus(sheet_title)
     sheet_title_escaped = re.escape(sheet_title)
     path, _ = stream_obj.get_path(sheet_title_encoded)
+    return path, api, sheet_title_escaped
+
 
-    sheet_md_results = client.get(path=path, api=api, endpoint=sheet_title_escaped)
+# Create sheet_json_schema and columns from the results of the sheet_metadata query of a sheet
+def parse_sheet_metadata(sheet, sheet_md_results):
+    sheet_title = sheet.get('properties', {}).get('title')
     # sheet_metadata: 1st `sheets` node in results
     sheet_metadata = sheet_md_results.get('sheets')[0]
 
@@ -260,3 +303,72 @@ def get_sheet_metadata(sheet, spreadsheet_id, client):
         sheet_json_schema, columns = None, None
 
     return sheet_json_schema, columns
+
+
+
+# Split the sheets into batches for the batched sheet_metadata query
+def get_sheets_metadata_batches(sheets):
+    batches = []
+    batch = []
+    querystring_length = 0
+    for sheet in sheets:
+        sheet_title = sheet.get('properties', {}).get('title')
+        range_length = len("&ranges='{}'!1:2".format(urllib.parse.quote_plus(sheet_title)))
+        if batch and (len(batch) >= MAX_BATCH_SHEETS or querystring_length + range_length > MAX_BATCH_QUERYSTRING_LENGTH):
+            batches.append(batch)
+            batch = []
+            querystring_length = 0
+        batch.append(sheet)
+        querystring_length += range_length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Return the path, api and endpoint of the sheet_metadata query of a batch of sheets
+#   params: includeGridData = true, ranges = '{sheet_title}'!1:2 for each sheet, fields = BATCH_FIELDS
+def get_sheets_metadata_request(sheets, spreadsheet_id):
+    if len(sheets) == 1:
+        return get_sheet_metadata_request(sheets[0], spreadsheet_id)
+    stream_obj = STREAMS.get('sheet_metadata')(None, spreadsheet_id)
+    ranges = ["'{}'!1:2".format(urllib.parse.quote_plus(sheet.get('properties', {}).get('title'))) for sheet in sheets]
+    querystring = '&'.join(['includeGridData=true'] + ['ranges={}'.format(sheet_range) for sheet_range in ranges] +
+                           ['fields={}'.format(BATCH_FIELDS)])
+    path = '{}?{}'.format(stream_obj.path.replace('{spreadsheet_id}', spreadsheet_id), querystring)
+    LOGGER.info('sheet_metadata of {} sheets'.format(len(sheets)))
+    return path, stream_obj.api, 'sheet_metadata'
+
+
+# Create sheet_json_schema and columns of each sheet of a batch from the results of the sheet_metadata query
+def parse_sheets_metadata(sheets, sheets_md_results):
+    # The sheets are returned in the order of the spreadsheet, find them by title
+    sheets_metadata = {}
+    for sheet_metadata in sheets_md_results.get('sheets', []):
+        sheets_metadata[sheet_metadata.get('properties', {}).get('title')] = sheet_metadata
+    sheets_schema_columns = []
+    for sheet in sheets:
+        sheet_title = sheet.get('properties', {}).get('title')
+        sheet_metadata = sheets_metadata.get(sheet_title)
+        if sheet_metadata is None:
+            LOGGER.warning('SKIPPING sheet not found in the sheet_metadata results: {}'.format(sheet_title))
+            sheets_schema_columns.append((None, None))
+        else:
+            sheets_schema_columns.append(parse_sheet_metadata(sheet, {'sheets': [sheet_metadata]}))
+    return sheets_schema_columns
+
+
+# Get sheet_json_schema and columns of each sheet of a batch, with 1 API call
+def get_sheets_metadata_batch(sheets, spreadsheet_id, client):
+    if len(sheets) == 1:
+        return [get_sheet_metadata(sheets[0], spreadsheet_id, client)]
+    path, api, endpoint = get_sheets_metadata_request(sheets, spreadsheet_id)
+    sheets_md_results = client.get(path=path, api=api, endpoint=endpoint)
+    return parse_sheets_metadata(sheets, sheets_md_results)
+
+
+# Get sheet_json_schema and columns of each sheet, with as few API calls as the batches allow
+def get_sheets_metadata(sheets, spreadsheet_id, client):
+    sheets_schema_columns = []
+    for batch in get_sheets_metadata_batches(sheets):
+        sheets_schema_columns.extend(get_sheets_metadata_batch(batch, spreadsheet_id, client))
+    return sheets_schema_columns
@@ -0,0 +1,91 @@
+import time
+import threading
+import contextlib
+from collections import defaultdict
+import singer
+from singer import metrics
+
+LOGGER = singer.get_logger()
+
+STAGE_METRIC = 'stage_duration'
+# Number of the slowest sheets logged in the summary
+SUMMARY_SHEETS = 5
+
+
+class StageTimers:
+    """
+    Time the stages of the discovery and the sync, per sheet and per page:
+        spreadsheet_metadata: the spreadsheet metadata API call
+        schema: the sheet_metadata API calls (and the header rows of the catalog columns)
+        network: the API calls of a page, without the JSON decoding
+        decode: the JSON decoding of the responses of a page
+        render: the rendering of the formatted values of a page (fetch_mode = local_format)
+        transform: transform_sheet_data of a page
+        validate: the transform of the records to their schema (singer Transformer or compiled)
+        write: the serialization and the writing of the RECORD messages
+        sheet: the whole sync of a sheet
+    Each stage timed is emitted as a Singer METRIC timer (stage_duration) with the stage, sheet and page tags,
+        and summed per sheet and stage for the summary of the run.
+    The pages are fetched while other pages are transformed and written (prefetch_pages, max_workers, async_requests),
+        so the sums of the stages of a sheet may exceed the duration of its sync.
+    """
+    def __init__(self):
+        # (sheet, stage): seconds
+        self.totals = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds, sheet=None, page=None):
+        """
+        Emit the duration of a stage, and add it to the totals
+        """
+        tags = {'stage': stage}
+        if sheet is not None:
+            tags['sheet'] = sheet
+        if page is not None:
+            tags['page'] = page
+        metrics.log(LOGGER, metrics.Point('timer', STAGE_METRIC, round(seconds, 6), tags))
+        with self.lock:
+            self.totals[(sheet, stage)] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, stage, sheet=None, page=None):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start_time, sheet, page)
+
+    def get_sheets_totals(self):
+        """
+        Return the duration of each sheet (its `sheet` stage, or the sum of its stages) and of its stages
+        """
+        sheets_totals = defaultdict(dict)
+        with self.lock:
+            for (sheet, stage), seconds in self.totals.items():
+                if sheet is not None:
+                    sheets_totals[sheet][stage] = seconds
+        return {sheet: (stages.get('sheet', sum(stages.values())), stages) for sheet, stages in sheets_totals.items()}
+
+    def log_summary(self):
+        """
+        Log the slowest sheets with their stages, and the total of each stage, then reset the totals
+        """
+        if not self.totals:
+            return
+        sheets_totals = self.get_sheets_totals()
+        slowest_sheets = sorted(sheets_totals.items(), key=lambda item: item[1][0], reverse=True)[:SUMMARY_SHEETS]
+        for sheet, (seconds, stages) in slowest_sheets:
+            LOGGER.info('Slowest sheet: {}, {:.3f} seconds, stages: {}'.format(sheet, seconds, ', '.join(
+                '{} {:.3f}s'.format(stage, stage_seconds) for stage, stage_seconds in
+                sorted(stages.items(), key=lambda item: item[1], reverse=True) if stage != 'sheet')))
+        stages_totals = defaultdict(float)
+        with self.lock:
+            for (_, stage), seconds in self.totals.items():
+                stages_totals[stage] += seconds
+            self.totals.clear()
+        LOGGER.info('Stage durations: {}'.format(', '.join(
+            '{} {:.3f}s'.format(stage, seconds) for stage, seconds in
+            sorted(stages_totals.items(), key=lambda item: item[1], reverse=True))))
+
+
+STAGE_TIMERS = StageTimers()
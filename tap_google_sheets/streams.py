@@ -2,17 +2,36 @@ import json
 import os
 import time
 import re
+import asyncio
+import functools
+import hashlib
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import simplejson as json
 from collections import OrderedDict
 import urllib.parse
 import singer
 import decimal
-from singer import metrics, metadata, Transformer, utils, messages
+from singer import metrics, metadata, Transformer, utils
 from singer.utils import strptime_to_utc, strftime
 from singer.messages import RecordMessage
 from singer.transform import SchemaKey
 import tap_google_sheets.transform as internal_transform
 import tap_google_sheets.schema as schema
+import tap_google_sheets.pipeline as pipeline
+import tap_google_sheets.paging as paging
+import tap_google_sheets.async_client as async_client
+import tap_google_sheets.record_transformer as record_transformer
+import tap_google_sheets.change_data as change_data
+import tap_google_sheets.profiler as profiler
+import tap_google_sheets.xlsx_export as xlsx_export
+from tap_google_sheets.client import GoogleError
+from tap_google_sheets.stage_timers import STAGE_TIMERS
+# imported for its side effect only: it overwrites singer's format_message and write_message
+import tap_google_sheets.message_writer # pylint: disable=unused-import
 
 LOGGER = singer.get_logger()
 
@@ -28,6 +47,7 @@ def update_currently_syncing(state, stream_name):
     else:
         singer.set_currently_syncing(state, stream_name)
     singer.write_state(state)
+    profiler.switch(stream_name)
 
 def write_schema(catalog, stream_name):
     """
@@ -108,13 +128,16 @@ def get_selected_fields(catalog, stream_name):
             pass
     return selected_fields
 
-def new_format_message(message):
-    """To override the ensure_ascii param, overwitten this function"""
-    return json.dumps(message.asdict(), ensure_ascii=False, use_decimal=True)
-
-# To override the ensure_ascii param as while writing record the currency symbols were written as ascii values,
-# overwitten this function of messages file of the singer module
-messages.format_message = new_format_message
+def get_config_bool(config, key, default=False):
+    """
+    Get a boolean from the config, as a boolean or a "true"/"false" string
+    """
+    value = config.get(key)
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        return value.lower() == 'true'
+    return bool(value)
 
 class GoogleSheets:
     stream_name = None
@@ -125,20 +148,28 @@ class GoogleSheets:
     replication_keys = None
     params = None
     state = None
+    # "singer": each record is transformed by singer's Transformer
+    # "compiled": the records of the sheets are transformed by the converters compiled once from the stream's schema and metadata
+    record_transform = "singer"
 
-    def __init__(self, client, spreadsheet_id, start_date=None):
+    def __init__(self, client, spreadsheet_id, start_date=None, config=None):
         self.client = client
         self.config_start_date = start_date
         self.spreadsheet_id = spreadsheet_id
+        self.config = config or {}
+        # stream_name: (stream, record transformer) compiled from the catalog
+        self.record_transformers = {}
 
-    def get_path(self, sheet_title_encoded=""):
+    def get_path(self, sheet_title_encoded="", params=None):
         """
         return path and query string for API Call
         """
+        if params is None:
+            params = self.params
         # Add in querystring parameters and replace {placeholder} variables
         # querystring function ensures parameters are added but not encoded causing API errors
         # create querystring for preparing the request
-        querystring = '&'.join(['%s=%s' % (key, value) for (key, value) in self.params.items()]).replace('{sheet_title}', sheet_title_encoded)
+        querystring = '&'.join(['%s=%s' % (key, value) for (key, value) in params.items()]).replace('{sheet_title}', sheet_title_encoded)
         # create path for preparing the request
         path = '{}?{}'.format(self.path.replace('{spreadsheet_id}', self.spreadsheet_id), querystring)
         # return path and query string
@@ -171,15 +202,49 @@ class GoogleSheets:
 
         return schemas, field_metadata
 
+    def get_record_transformer(self, stream):
+        """
+        Get the record transformer compiled from the stream's schema and metadata, None if it cannot be compiled
+        """
+        cached_stream, transformer = self.record_transformers.get(stream.tap_stream_id, (None, None))
+        if cached_stream is not stream:
+            transformer = record_transformer.compile_record_transformer(
+                stream.schema.to_dict(), metadata.to_map(stream.metadata))
+            if transformer is None:
+                LOGGER.info('Stream: {}, schema not compiled, records are transformed by the singer Transformer'.format(
+                    stream.tap_stream_id))
+            self.record_transformers[stream.tap_stream_id] = (stream, transformer)
+        return transformer
+
     def process_records(self, catalog, stream_name, records, time_extracted, version=None):
         """
         Transform/validate batch of records with schema and sent to target
+        With record_transform = compiled, the records are transformed by the compiled record transformer,
+            and the records not matching the schema by the singer Transformer, which raises the error
+        The time spent writing the records, and transforming them, are added to the write and validate stages
         """
+        start_time = time.perf_counter()
+        write_seconds = 0
         stream = catalog.get_stream(stream_name)
         schema = stream.schema.to_dict()
         stream_metadata = metadata.to_map(stream.metadata)
+        compiled_transform = None
+        if self.record_transform == 'compiled':
+            compiled_transform = self.get_record_transformer(stream)
         with metrics.record_counter(stream_name) as counter:
             for record in records:
+                if compiled_transform:
+                    transformed_record = compiled_transform(record)
+                    if transformed_record is not None:
+                        write_start_time = time.perf_counter()
+                        write_record(
+                            stream_name=stream_name,
+                            record=transformed_record,
+                            time_extracted=time_extracted,
+                            version=version)
+                        write_seconds += time.perf_counter() - write_start_time
+                        counter.increment()
+                        continue
                 # Transform record for Singer.io
                 with Transformer() as transformer:
                     try:
@@ -190,17 +255,23 @@ class GoogleSheets:
                     except Exception as err:
                         LOGGER.error('{}'.format(err))
                         raise RuntimeError(err)
+                    write_start_time = time.perf_counter()
                     write_record(
                         stream_name=stream_name,
                         record=transformed_record,
                         time_extracted=time_extracted,
                         version=version)
+                    write_seconds += time.perf_counter() - write_start_time
                     counter.increment()
-            return counter.value
+            # the counter is reset when its metric is logged, on exit
+            record_count = counter.value
+        STAGE_TIMERS.add('validate', time.perf_counter() - start_time - write_seconds, stream_name)
+        STAGE_TIMERS.add('write', write_seconds, stream_name)
+        return record_count
 
-    def get_data(self, stream_name, range_rows=None):
+    def get_data_request(self, stream_name, range_rows=None, params=None):
         """
-        Call API for the steram and return response
+        Return the path, querystring and endpoint of the API call for the stream
         """
         if not range_rows:
             range_rows = ''
@@ -211,8 +282,15 @@ class GoogleSheets:
         path = self.path.replace(
             '{spreadsheet_id}', self.spreadsheet_id).replace('{sheet_title}', stream_name_encoded).replace(
                 '{range_rows}', range_rows)
+        _, querystring = self.get_path(stream_name_encoded, params)
+        return path, querystring, stream_name_escaped
+
+    def get_data(self, stream_name, range_rows=None, params=None):
+        """
+        Call API for the steram and return response
+        """
+        path, querystring, stream_name_escaped = self.get_data_request(stream_name, range_rows, params)
         api = self.api
-        _, querystring = self.get_path(stream_name_encoded)
         LOGGER.info('URL: {}/{}?{}'.format(self.client.base_url, path, querystring))
         data = {}
         time_extracted = utils.now()
@@ -307,14 +385,16 @@ class SpreadSheetMetadata(GoogleSheets):
         path, querystring = self.get_path()
 
         # GET spreadsheet_metadata, which incl. sheets (basic metadata for each worksheet)
-        spreadsheet_md_results = self.client.get(path=path, params=querystring, api=api, endpoint=self.stream_name)
+        with STAGE_TIMERS.timer('spreadsheet_metadata'):
+            spreadsheet_md_results = self.client.get(path=path, params=querystring, api=api, endpoint=self.stream_name)
 
         sheets = spreadsheet_md_results.get('sheets')
         if sheets:
+            # GET sheet_json_schema for each worksheet, in batches of sheets (from function above)
+            with STAGE_TIMERS.timer('schema'):
+                sheets_schema_columns = schema.get_sheets_metadata(sheets, self.spreadsheet_id, self.client)
             # Loop thru each worksheet in spreadsheet
-            for sheet in sheets:
-                # GET sheet_json_schema for each worksheet (from function above)
-                sheet_json_schema, columns = schema.get_sheet_metadata(sheet, self.spreadsheet_id, self.client)
+            for sheet, (sheet_json_schema, columns) in zip(sheets, sheets_schema_columns):
 
                 # SKIP empty sheets (where sheet_json_schema and columns are None)
                 if sheet_json_schema and columns:
@@ -335,6 +415,9 @@ class SpreadSheetMetadata(GoogleSheets):
                             mdata = metadata.to_map(sheet_mdata)
                             sheet_mdata = metadata.write(mdata, ('properties', column.get('columnName')), 'inclusion', 'unsupported')
                             sheet_mdata = metadata.to_list(mdata)
+                    # store the columns in the catalog, so that the sync does not get the sheet_metadata again
+                    mdata = metadata.to_map(sheet_mdata)
+                    sheet_mdata = metadata.to_list(metadata.write(mdata, (), 'sheet-columns', columns))
                     field_metadata[sheet_title] = sheet_mdata
 
         return schemas, field_metadata
@@ -448,154 +531,1086 @@ class SheetsLoadData(GoogleSheets):
     key_properties = ["spreadsheetId", "sheetId", "loadDate"]
     replication_method = "FULL_TABLE"
     params = {}
+    # "values": 2 calls per page, FORMATTED_VALUE and UNFORMATTED_VALUE
+    # "grid_data": 1 call per page, formattedValue and effectiveValue of each cell
+    # "local_format": 1 call per page, UNFORMATTED_VALUE, the formatted values are rendered from the columns' number formats
+    fetch_mode = "values"
+    grid_data_path = "spreadsheets/{spreadsheet_id}"
+    grid_data_params = {
+        "includeGridData": "true",
+        "ranges": "'{sheet_title}'!{range_rows}",
+        "fields": "sheets(data(rowData(values(formattedValue,effectiveValue))))"
+    }
 
-    def load_data(self, catalog, state, selected_streams, sheets, spreadsheet_time_extracted):
+    # number of worker threads to fetch the sheet's metadata and pages concurrently, 1 = no concurrency
+    max_workers = 1
+    # max number of fetched pages waiting to be written, per sheet
+    #   with max_workers = 1, the pages are prefetched only if prefetch_pages is set
+    prefetch_pages = None
+    concurrent_prefetch_pages = 2
+    # fetch the sheet's metadata and pages with the asyncio client, up to max_in_flight pages at once
+    async_requests = False
+    max_in_flight = 10
+
+    # values:batchGet of the header rows, to check the columns stored in the catalog by the discovery
+    header_rows_path = "spreadsheets/{spreadsheet_id}/values:batchGet"
+    header_rows_params = {
+        "valueRenderOption": "FORMATTED_VALUE",
+        "majorDimension": "ROWS"
+    }
+    max_header_ranges = 100
+    # rows of the samples of each sheet fingerprinted (skip_unchanged_sheets): the 1st rows, and the rows around the last row
+    fingerprint_sample_rows = 100
+    # Drive export (XLSX) of the spreadsheet, downloaded once for the sheets of at least export_min_cells cells (grid rows x columns)
+    export_path = "files/{spreadsheet_id}/export"
+    export_min_cells = None
+
+    def __init__(self, client, spreadsheet_id, start_date=None, config=None):
+        super().__init__(client, spreadsheet_id, start_date, config)
+        # sheet_title: (sheet_schema, columns) from the catalog, checked against the header rows
+        self.catalog_columns = {}
+        # sheet_title: last row number synced by the previous sync (None for the 1st sync) of the append-only sheets
+        self.append_only_sheets = {}
+        # sheet_title: last row number with values synced
+        self.sheet_last_rows = {}
+        # sheet_title: (fingerprint, last row of its samples) of the selected sheets, probed before the sync (skip_unchanged_sheets)
+        self.sheet_fingerprints = {}
+        # sheet_title: {from_row, version} of the sheets interrupted by the previous sync, from the state
+        self.sheet_checkpoints = {}
+        # sheet_title: (columns, column_plan), the column transform plan compiled once per sheet
+        self.column_plans = {}
+        # change data mode: only the records inserted or updated since the previous sync are written,
+        #   with the row hash index opened by load_data
+        self.row_hash_index = None
+        # sheet_title: synced before in change data mode, without activate version messages
+        self.change_data_sheets = {}
+        self.change_data_deletes = get_config_bool(self.config, 'change_data_deletes')
+        self.fetch_mode = self.config.get('fetch_mode') or self.fetch_mode
+        if self.fetch_mode not in ('values', 'grid_data', 'local_format'):
+            raise Exception('INVALID FETCH MODE: {}'.format(self.fetch_mode))
+        self.record_transform = self.config.get('record_transform') or self.record_transform
+        if self.record_transform not in ('singer', 'compiled'):
+            raise Exception('INVALID RECORD TRANSFORM: {}'.format(self.record_transform))
+        # if max_workers is other than 0,"0" or "" then use max_workers
+        if self.config.get('max_workers') and int(self.config.get('max_workers')):
+            self.max_workers = int(self.config.get('max_workers'))
+        if self.config.get('prefetch_pages') and int(self.config.get('prefetch_pages')):
+            self.prefetch_pages = int(self.config.get('prefetch_pages'))
+        self.async_requests = get_config_bool(self.config, 'async_requests')
+        if self.config.get('max_in_flight') and int(self.config.get('max_in_flight')):
+            self.max_in_flight = int(self.config.get('max_in_flight'))
+        # skip the sheets whose fingerprint is unchanged since the previous sync, unless full_refresh
+        self.skip_unchanged_sheets = get_config_bool(self.config, 'skip_unchanged_sheets')
+        self.full_refresh = get_config_bool(self.config, 'full_refresh')
+        if self.config.get('export_min_cells') and int(self.config.get('export_min_cells')):
+            self.export_min_cells = int(self.config.get('export_min_cells'))
+        # fetch only the column ranges of the columns kept in the records, with values:batchGet
+        self.fetch_selected_columns = get_config_bool(self.config, 'fetch_selected_columns')
+        # sheet_title: column ranges (from index, to index) fetched
+        self.column_ranges = {}
+        # workbook of the XLSX export, and the titles of the sheets synced from it
+        self.export_workbook = None
+        self.export_sheets = set()
+        # log each data type warning and empty row, instead of a summary at the end of each sheet
+        internal_transform.DATA_WARNINGS.verbose = get_config_bool(self.config, 'verbose_data_warnings')
+
+    formatted_values_params = {
+        "dateTimeRenderOption": "SERIAL_NUMBER",
+        "valueRenderOption": "FORMATTED_VALUE",
+        "majorDimension": "ROWS"
+    }
+    unformatted_values_params = {
+        "dateTimeRenderOption": "SERIAL_NUMBER",
+        "valueRenderOption": "UNFORMATTED_VALUE",
+        "majorDimension": "ROWS"
+    }
+
+    def get_values_data(self, sheet_title, range_rows):
         """
-        Load sheet's records if that sheet is selected for sync
+        Get the formatted and unformatted values of a range with 2 values API calls
         """
-        self.state = state
-        sheet_metadata = []
-        sheets_loaded = []
-        if sheets:
-            # Loop through sheets (worksheet tabs) in spreadsheet
-            for sheet in sheets:
+        # GET sheet_data for a worksheet tab
+        sheet_data, time_extracted = self.get_data(stream_name=sheet_title, range_rows=range_rows, params=self.formatted_values_params)
+        # Data is returned as a list of arrays, an array of values for each row
+        sheet_data_rows = sheet_data.get('values', [])
+        unformatted_sheet_data, _ = self.get_data(stream_name=sheet_title, range_rows=range_rows, params=self.unformatted_values_params)
+        unformatted_sheet_data_rows = unformatted_sheet_data.get('values', [])
+        return sheet_data_rows, unformatted_sheet_data_rows, time_extracted
+
+    def get_local_format_data(self, sheet_title, range_rows):
+        """
+        Get the unformatted values of a range with 1 values API call
+        The unformatted rows are also returned in place of the formatted rows, which are rendered
+            from the columns' number formats when the page is transformed
+        """
+        unformatted_sheet_data, time_extracted = self.get_data(stream_name=sheet_title, range_rows=range_rows, params=self.unformatted_values_params)
+        unformatted_sheet_data_rows = unformatted_sheet_data.get('values', [])
+        return unformatted_sheet_data_rows, unformatted_sheet_data_rows, time_extracted
+
+    def get_grid_data_request(self, sheet_title, range_rows):
+        """
+        Return the path, querystring and endpoint of the spreadsheets API call for the grid data of a range
+        """
+        sheet_title_escaped = re.escape(sheet_title)
+        sheet_title_encoded = urllib.parse.quote_plus(sheet_title)
+        path = self.grid_data_path.replace('{spreadsheet_id}', self.spreadsheet_id)
+        params = dict(self.grid_data_params)
+        params['ranges'] = params['ranges'].replace('{range_rows}', range_rows)
+        _, querystring = self.get_path(sheet_title_encoded, params)
+        return path, querystring, sheet_title_escaped
+
+    @staticmethod
+    def parse_grid_data(grid_data):
+        """
+        Return the formatted and unformatted rows of the grid data of a range
+        """
+        # 1 range is requested, so the rows are in the 1st `data` node of the 1st sheet
+        sheet_grid_data = next(iter(grid_data.get('sheets', [])), {})
+        data = next(iter(sheet_grid_data.get('data', [])), {})
+        return internal_transform.transform_grid_data_rows(data.get('rowData', []))
+
+    def get_grid_data(self, sheet_title, range_rows):
+        """
+        Get the formatted and unformatted values of a range with 1 spreadsheets API call,
+        using includeGridData and a fields mask for the formattedValue and effectiveValue of each cell
+        """
+        path, querystring, sheet_title_escaped = self.get_grid_data_request(sheet_title, range_rows)
+        LOGGER.info('URL: {}/{}?{}'.format(self.client.base_url, path, querystring))
+        time_extracted = utils.now()
+        grid_data = self.client.get(
+            path=path,
+            api=self.api,
+            params=querystring,
+            endpoint=sheet_title_escaped)
+        sheet_data_rows, unformatted_sheet_data_rows = self.parse_grid_data(grid_data)
+        return sheet_data_rows, unformatted_sheet_data_rows, time_extracted
+
+    def get_page_data(self, sheet_title, range_rows):
+        """
+        Get the formatted and unformatted values of a page of the sheet based on the fetch mode
+        """
+        if self.fetch_mode == 'grid_data':
+            return self.get_grid_data(sheet_title, range_rows)
+        if self.fetch_mode == 'local_format':
+            return self.get_local_format_data(sheet_title, range_rows)
+        return self.get_values_data(sheet_title, range_rows)
+
+    async def get_page_data_async(self, client, sheet_title, sheet_last_col_letter, from_row, to_row):
+        """
+        Get the formatted and unformatted values of a page of the sheet with the async client,
+            fetched again with all the columns when the page of column ranges has a blank row
+        Return the rows, the size of the responses, the response time and the JSON decoding time
+        """
+        start_time = time.time()
+        decode_seconds = []
+        token = async_client.DECODE_SECONDS.set(decode_seconds)
+        try:
+            response_bytes = 0
+            if sheet_title in self.column_ranges:
+                sheet_data_rows, unformatted_sheet_data_rows, response_bytes = await self.fetch_column_ranges_data_async(
+                    client, sheet_title, from_row, to_row)
+            if sheet_title not in self.column_ranges or self.has_blank_rows(unformatted_sheet_data_rows, from_row, to_row):
+                range_rows = 'A{}:{}{}'.format(from_row, sheet_last_col_letter, to_row)
+                sheet_data_rows, unformatted_sheet_data_rows, page_bytes = await self.fetch_page_data_async(client, sheet_title, range_rows)
+                response_bytes += page_bytes
+        finally:
+            async_client.DECODE_SECONDS.reset(token)
+        return sheet_data_rows, unformatted_sheet_data_rows, response_bytes, time.time() - start_time, sum(decode_seconds)
+
+    async def fetch_page_data_async(self, client, sheet_title, range_rows):
+        """
+        Get the formatted and unformatted values of a page of the sheet with the async client, and the size of the responses
+        """
+        if self.fetch_mode == 'grid_data':
+            path, querystring, endpoint = self.get_grid_data_request(sheet_title, range_rows)
+            grid_data, response_bytes = await async_client.get_with_size(
+                client, path=path, api=self.api, params=querystring, endpoint=endpoint)
+            sheet_data_rows, unformatted_sheet_data_rows = self.parse_grid_data(grid_data)
+        elif self.fetch_mode == 'local_format':
+            path, querystring, endpoint = self.get_data_request(sheet_title, range_rows, self.unformatted_values_params)
+            unformatted_sheet_data, response_bytes = await async_client.get_with_size(
+                client, path=path, api=self.api, params=querystring, endpoint=endpoint)
+            unformatted_sheet_data_rows = unformatted_sheet_data.get('values', [])
+            sheet_data_rows = unformatted_sheet_data_rows
+        else:
+            responses = await asyncio.gather(*[
+                async_client.get_with_size(client, path=path, api=self.api, params=querystring, endpoint=endpoint)
+                for path, querystring, endpoint in [
+                    self.get_data_request(sheet_title, range_rows, self.formatted_values_params),
+                    self.get_data_request(sheet_title, range_rows, self.unformatted_values_params)]])
+            (sheet_data, formatted_bytes), (unformatted_sheet_data, unformatted_bytes) = responses
+            sheet_data_rows = sheet_data.get('values', [])
+            unformatted_sheet_data_rows = unformatted_sheet_data.get('values', [])
+            response_bytes = formatted_bytes + unformatted_bytes
+        return sheet_data_rows, unformatted_sheet_data_rows, response_bytes
+
+    def get_column_ranges_params(self):
+        """
+        Params of the values:batchGet API calls of a page of column ranges: formatted and unformatted values,
+            or unformatted values only with local_format
+        """
+        if self.fetch_mode == 'local_format':
+            return [self.unformatted_values_params]
+        return [self.formatted_values_params, self.unformatted_values_params]
+
+    def get_column_ranges_request(self, sheet_title, from_row, to_row, params):
+        """
+        Return the path, querystring and endpoint of the values:batchGet API call for the column ranges of a page
+        """
+        path = self.header_rows_path.replace('{spreadsheet_id}', self.spreadsheet_id)
+        _, querystring = self.get_path(params=params)
+        ranges = '&'.join(["ranges='{}'!{}{}:{}{}".format(
+            urllib.parse.quote_plus(sheet_title), schema.colnum_string(from_column), from_row, schema.colnum_string(to_column), to_row)
+            for from_column, to_column in self.column_ranges[sheet_title]])
+        return path, '{}&{}'.format(ranges, querystring), re.escape(sheet_title)
+
+    @staticmethod
+    def merge_value_ranges(column_ranges, value_ranges):
+        """
+        Stitch the rows of the value ranges of the column ranges back into rows from column A,
+            the columns not fetched are empty
+        """
+        rows = []
+        # the value ranges are returned in the order of the requested ranges
+        for (from_column, _), value_range in zip(column_ranges, value_ranges):
+            for position, values in enumerate(value_range.get('values', [])):
+                if position == len(rows):
+                    rows.append([])
+                if values:
+                    row = rows[position]
+                    row.extend([''] * (from_column - 1 - len(row)))
+                    row.extend(values)
+        return rows
+
+    @staticmethod
+    def has_blank_rows(rows, from_row, to_row):
+        """
+        Return True when a row of the page is blank in the fetched columns, or missing (the last blank rows)
+        """
+        return len(rows) < to_row - from_row + 1 or not all(rows)
+
+    def get_column_ranges_data(self, sheet_title, from_row, to_row):
+        """
+        Get the formatted and unformatted values of the column ranges of a page with values:batchGet
+        """
+        pages_rows = []
+        time_extracted = utils.now()
+        for params in self.get_column_ranges_params():
+            path, querystring, endpoint = self.get_column_ranges_request(sheet_title, from_row, to_row, params)
+            LOGGER.info('URL: {}/{}?{}'.format(self.client.base_url, path, querystring))
+            data = self.client.get(path=path, api=self.api, params=querystring, endpoint=endpoint)
+            pages_rows.append(self.merge_value_ranges(self.column_ranges[sheet_title], data.get('valueRanges', [])))
+        # with local_format, the unformatted rows are also returned in place of the formatted rows
+        return pages_rows[0], pages_rows[-1], time_extracted
+
+    async def fetch_column_ranges_data_async(self, client, sheet_title, from_row, to_row):
+        """
+        Get the formatted and unformatted values of the column ranges of a page with the async client, and the size of the responses
+        """
+        responses = await asyncio.gather(*[
+            async_client.get_with_size(client, path=path, api=self.api, params=querystring, endpoint=endpoint)
+            for path, querystring, endpoint in [
+                self.get_column_ranges_request(sheet_title, from_row, to_row, params) for params in self.get_column_ranges_params()]])
+        pages_rows = [self.merge_value_ranges(self.column_ranges[sheet_title], data.get('valueRanges', [])) for data, _ in responses]
+        return pages_rows[0], pages_rows[-1], sum(response_bytes for _, response_bytes in responses)
+
+    def set_column_ranges(self, catalog, selected_streams, sheets, sheets_schema_columns):
+        """
+        With fetch_selected_columns, set the column ranges of the selected sheets: the columns kept in the records
+            by the catalog metadata, and the change data key column
+        The sheets synced from the export, and the grid_data fetch mode, fetch all the columns
+        """
+        self.column_ranges = {}
+        if not self.fetch_selected_columns or not catalog or self.fetch_mode == 'grid_data':
+            return
+        key_column = self.row_hash_index.key_column if self.row_hash_index else None
+        for sheet, (_, columns) in zip(sheets, sheets_schema_columns):
+            sheet_title = sheet.get('properties', {}).get('title')
+            stream = catalog.get_stream(sheet_title)
+            if not columns or stream is None or sheet_title not in selected_streams or sheet_title in self.export_sheets:
+                continue
+            filtered_fields = record_transformer.get_filtered_fields(stream.schema.to_dict(), metadata.to_map(stream.metadata))
+            column_ranges = paging.get_column_ranges(
+                [col.get('columnIndex') for col in columns
+                 if col.get('columnName') not in filtered_fields or col.get('columnName') == key_column],
+                max(col.get('columnIndex') for col in columns))
+            if column_ranges:
+                self.column_ranges[sheet_title] = column_ranges
+                LOGGER.info('Sheet: {}, fetched columns: {}'.format(sheet_title, ', '.join(
+                    '{}:{}'.format(schema.colnum_string(from_column), schema.colnum_string(to_column))
+                    for from_column, to_column in column_ranges)))
+
+    @staticmethod
+    def add_fetch_stages(sheet_title, from_row, seconds, decode_seconds):
+        """
+        Add the network and decode stages of the fetch of a page
+        """
+        STAGE_TIMERS.add('network', max(seconds - decode_seconds, 0), sheet_title, from_row)
+        STAGE_TIMERS.add('decode', decode_seconds, sheet_title, from_row)
+
+    @staticmethod
+    def get_page_ranges(sheet_max_row, page_planner, from_row=2):
+        """
+        Yields the from_row and to_row of each page of the sheet, the page planner sets the rows of each page
+        """
+        # Initialize paging for 1st batch: rows 2 to page_planner.rows, or a whole page from a later from_row
+        to_row = min(page_planner.rows if from_row == 2 else from_row + page_planner.rows - 1, sheet_max_row)
+
+        # a page of 1 row at the last row of the grid (e.g. a row appended to an append-only sheet) is fetched too
+        while from_row <= sheet_max_row and to_row <= sheet_max_row:
+            yield from_row, to_row
+
+            # Update paging from/to_row for next batch
+            from_row = to_row + 1
+            to_row = min(to_row + page_planner.rows, sheet_max_row)
+
+    def get_sheet_pages(self, sheet_title, sheet_last_col_letter, sheet_max_row, page_planner, start_row=2):
+        """
+        Get the formatted and unformatted values of the sheet, page by page from start_row, until a whole blank page is found
+        Yields from_row, to_row, sheet_data_rows and unformatted_sheet_data_rows for each page
+        The pages of the sheets synced from the export are parsed from the export
+        The pages of the sheets with column ranges with a blank row in the fetched columns are fetched again
+            with all the columns: the whole rows tell the empty rows and the end of the data, as without column ranges
+        """
+        column_ranges = self.column_ranges.get(sheet_title)
+        if sheet_title in self.export_sheets:
+            yield from self.get_export_pages(sheet_title, sheet_last_col_letter, page_planner, start_row)
+            return
+        # Loop thru batches (the page planner sets the rows of each batch)
+        for from_row, to_row in self.get_page_ranges(sheet_max_row, page_planner, start_row):
+            range_rows = 'A{}:{}{}'.format(from_row, sheet_last_col_letter, to_row)
+
+            # GET formatted and unformatted sheet_data for a worksheet tab
+            start_time = time.time()
+            start_bytes = self.client.get_bytes_received()
+            start_decode_seconds = self.client.get_decode_seconds()
+            if column_ranges:
+                sheet_data_rows, unformatted_sheet_data_rows, _ = self.get_column_ranges_data(sheet_title, from_row, to_row)
+            if not column_ranges or self.has_blank_rows(unformatted_sheet_data_rows, from_row, to_row):
+                sheet_data_rows, unformatted_sheet_data_rows, _ = self.get_page_data(sheet_title, range_rows)
+            seconds = time.time() - start_time
+            page_planner.observe(
+                rows_requested=to_row - from_row + 1,
+                rows_returned=len(sheet_data_rows),
+                response_bytes=self.client.get_bytes_received() - start_bytes,
+                seconds=seconds)
+            self.add_fetch_stages(sheet_title, from_row, seconds, self.client.get_decode_seconds() - start_decode_seconds)
+
+            # API does not return the last empty rows in response.
+            # For example, rows 199 and 200 are empty, and a total of 400 rows are there in the sheet. So, in 1st iteration,
+            # to_row = 200, from_row = 2, and 197 rows are returned (1st row contain header value).
+            # sheet_data_rows is no of records return in the current page. If it's a whole blank page then stop looping.
+            # So, in the above case, it syncs records 201 to 400 also even if rows 199 and 200 are blank.
+            # Then when the next batch 401 to 600 is empty, it breaks the loop.
+            yield from_row, to_row, sheet_data_rows, unformatted_sheet_data_rows
+
+            if not sheet_data_rows: # If a whole blank page found, then stop looping.
+                break
+
+    def get_export_pages(self, sheet_title, sheet_last_col_letter, page_planner, start_row=2):
+        """
+        Parse the unformatted values of the sheet from the export, in pages of the page planner's rows from start_row
+        The unformatted rows are also returned in place of the formatted rows, which are rendered
+            from the columns' number formats when the page is transformed (as with local_format)
+        """
+        rows = self.export_workbook.iter_rows(sheet_title, xlsx_export.get_column_index(sheet_last_col_letter))
+        page_rows = page_planner.rows
+        pages = xlsx_export.get_pages(rows, page_rows, start_row)
+        while True:
+            start_time = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                return
+            from_row, unformatted_sheet_data_rows = page
+            STAGE_TIMERS.add('decode', time.perf_counter() - start_time, sheet_title, from_row)
+            yield from_row, from_row + page_rows - 1, unformatted_sheet_data_rows, unformatted_sheet_data_rows
+
+    def start_export(self, selected_streams, sheets):
+        """
+        Download the XLSX export of the spreadsheet when a selected sheet has at least export_min_cells cells,
+            and set the sheets synced from the export
+        If the export fails (e.g. above the export size limit of the Drive API) or a sheet is not found in it,
+            the sheets are fetched with the values API
+        """
+        if not self.export_min_cells:
+            return
+        large_sheets = []
+        for sheet in sheets:
+            sheet_title = sheet.get('properties', {}).get('title')
+            grid_properties = sheet.get('properties', {}).get('gridProperties', {})
+            cells = grid_properties.get('rowCount', 0) * grid_properties.get('columnCount', 0)
+            # the append-only sheets synced before fetch their new rows only
+            if sheet_title in selected_streams and cells >= self.export_min_cells and not self.append_only_sheets.get(sheet_title):
+                large_sheets.append(sheet_title)
+        if not large_sheets:
+            return
+        path = self.export_path.replace('{spreadsheet_id}', self.spreadsheet_id)
+        querystring = 'mimeType={}'.format(urllib.parse.quote_plus(xlsx_export.XLSX_MIME_TYPE))
+        LOGGER.info('Exporting the spreadsheet for the sheets: {}'.format(', '.join(large_sheets)))
+        file = tempfile.TemporaryFile()
+        try:
+            with STAGE_TIMERS.timer('network'):
+                size = self.client.download(path=path, api='files', file=file, params=querystring, endpoint='export')
+            self.export_workbook = xlsx_export.XlsxWorkbook(file)
+            # the strings are parsed once, before the sheets are parsed by the worker threads
+            self.export_workbook.get_shared_strings()
+        except (GoogleError, zipfile.BadZipFile, KeyError) as err:
+            LOGGER.warning('SPREADSHEET EXPORT FAILED, the sheets are fetched with the values API: {}'.format(err))
+            file.close()
+            return
+        LOGGER.info('Spreadsheet exported, size: {} bytes'.format(size))
+        for sheet_title in large_sheets:
+            if sheet_title in self.export_workbook.sheet_paths:
+                self.export_sheets.add(sheet_title)
+            else:
+                LOGGER.warning('Sheet: {}, not found in the export, fetched with the values API'.format(sheet_title))
+
+    def close_export(self):
+        if self.export_workbook:
+            self.export_workbook.close()
+        self.export_workbook = None
+        self.export_sheets = set()
+
+    def start_sheet_sync(self, catalog, sheet):
+        """
+        Start the sync of the sheet's records: write the schema and the initial activate version message
+        Return the activate version message of the sheet
+        """
+        sheet_title = sheet.get('properties', {}).get('title')
+        LOGGER.info('STARTED Syncing Sheet {}'.format(sheet_title))
+        update_currently_syncing(self.state, sheet_title)
+        selected_fields = get_selected_fields(catalog, sheet_title) # --------------------
+        LOGGER.info('Stream: {}, selected_fields: {}'.format(sheet_title, selected_fields))
+        last_integer = int(get_bookmark(self.state, sheet_title, 0))
+        checkpoint = self.sheet_checkpoints.get(sheet_title)
+        if self.row_hash_index and sheet_title not in self.append_only_sheets:
+            self.start_change_data_sync(catalog, sheet_title, last_integer, checkpoint)
+        write_schema(catalog, sheet_title)
+
+        # Emit a Singer ACTIVATE_VERSION message before initial sync (but not subsequent syncs)
+        # everytime after each sheet sync is complete.
+        # This forces hard deletes on the data downstream if fewer records are sent.
+        # https://github.com/singer-io/singer-python/blob/master/singer/messages.py#L137
+        if checkpoint:
+            # sheet interrupted by the previous sync: the rows are added to the table version of the interrupted sync
+            LOGGER.info('RESUMING SYNC, Stream: {}, from row: {}, Activate Version: {}'.format(
+                sheet_title, checkpoint['from_row'], checkpoint['version']))
+            return singer.ActivateVersionMessage(stream=sheet_title, version=checkpoint['version'])
+        if self.append_only_sheets.get(sheet_title):
+            # append-only sheet synced before: the new rows are added to the table version of the previous sync,
+            # without activate version messages
+            LOGGER.info('APPEND-ONLY SYNC, Stream: {}, from row: {}, Activate Version: {}'.format(
+                sheet_title, self.get_sheet_start_row(sheet_title), last_integer))
+            return singer.ActivateVersionMessage(stream=sheet_title, version=last_integer)
+        if self.change_data_sheets.get(sheet_title):
+            # sheet synced before in change data mode: the changed rows are written under the table version of the previous sync,
+            # without activate version messages
+            LOGGER.info('CHANGE DATA SYNC, Stream: {}, Activate Version: {}'.format(sheet_title, last_integer))
+            return singer.ActivateVersionMessage(stream=sheet_title, version=last_integer)
+        activate_version = int(time.time() * 1000)
+        activate_version_message = singer.ActivateVersionMessage(
+                stream=sheet_title,
+                version=activate_version)
+        if last_integer == 0:
+            # initial load, send activate_version before AND after data sync
+            singer.write_message(activate_version_message)
+            LOGGER.info('INITIAL SYNC, Stream: {}, Activate Version: {}'.format(sheet_title, activate_version))
+        return activate_version_message
+
+    def start_change_data_sync(self, catalog, sheet_title, last_integer, checkpoint):
+        """
+        Start the pass of the sheet in the row hash index
+        The sheet is synced in full (with a new table version) until it is in the index and bookmarked,
+            then only its changed rows are written
+        A full sync (e.g. after a reset of the state) writes all the rows, and indexes them again from scratch
+        With change_data_deletes, the __sdc_deleted_at field of the tombstone records is added to the sheet's schema
+        """
+        # a checkpoint under another table version is the checkpoint of an interrupted full sync
+        synced_before = bool(last_integer) and self.row_hash_index.has_sheet(sheet_title) \
+            and (not checkpoint or checkpoint['version'] == last_integer)
+        self.row_hash_index.start_sheet(sheet_title, resume=bool(checkpoint), full=not synced_before)
+        self.change_data_sheets[sheet_title] = synced_before
+        stream = catalog.get_stream(sheet_title)
+        key_column = self.row_hash_index.key_column
+        if key_column not in stream.schema.properties:
+            LOGGER.warning('Sheet: {}, change data key column not found: {}, all the rows are written'.format(
+                sheet_title, key_column))
+        if self.change_data_deletes:
+            stream.schema.properties[change_data.DELETED_AT_FIELD] = singer.Schema(
+                type=['null', 'string'], format='date-time')
+        LOGGER.info('Sheet: {}, change data, synced before: {}, key column: {}'.format(
+            sheet_title, synced_before, key_column))
+
+    def get_column_plan(self, sheet_title, columns):
+        """
+        Get the column transform plan of the sheet, compiled on the 1st page of the sheet and reused for its other pages
+        """
+        cached_columns, column_plan = self.column_plans.get(sheet_title, (None, None))
+        if cached_columns is not columns:
+            column_plan = internal_transform.get_column_plan(sheet_title, columns)
+            self.column_plans[sheet_title] = (columns, column_plan)
+        return column_plan
+
+    def sync_sheet_page(self, catalog, sheet, columns, activate_version_message, page, spreadsheet_time_extracted):
+        """
+        Transform a page of the sheet's values and write the records, return the next row number
+        """
+        sheet_title = sheet.get('properties', {}).get('title')
+        sheet_id = sheet.get('properties', {}).get('sheetId')
+        from_row, to_row, sheet_data_rows, unformatted_sheet_data_rows = page
+        if self.fetch_mode == 'local_format' or sheet_title in self.export_sheets:
+            with STAGE_TIMERS.timer('render', sheet_title, from_row):
+                sheet_data_rows = internal_transform.render_formatted_rows(columns, unformatted_sheet_data_rows)
+        # Transform batch of rows to JSON with keys for each column
+        with STAGE_TIMERS.timer('transform', sheet_title, from_row):
+            sheet_data_transformed, row_num = internal_transform.transform_sheet_data(
+                spreadsheet_id=self.spreadsheet_id,
+                sheet_id=sheet_id,
+                sheet_title=sheet_title,
+                from_row=from_row,
+                columns=columns,
+                sheet_data_rows=sheet_data_rows,
+                unformatted_rows = unformatted_sheet_data_rows,
+                column_plan=self.get_column_plan(sheet_title, columns))
+        if sheet_data_transformed:
+            self.sheet_last_rows[sheet_title] = sheet_data_transformed[-1]['__sdc_row']
+        if sheet_title in self.change_data_sheets:
+            changed_records = self.row_hash_index.get_changed_records(sheet_title, sheet_data_transformed)
+            if self.change_data_sheets[sheet_title]:
+                # write the records inserted or updated since the previous sync only
+                LOGGER.info('Sheet: {}, changed records: {} of {}'.format(
+                    sheet_title, len(changed_records), len(sheet_data_transformed)))
+                sheet_data_transformed = changed_records
+
+        # Process records, send batch of records to target
+        record_count = self.process_records(
+            catalog=catalog,
+            stream_name=sheet_title,
+            records=sheet_data_transformed,
+            time_extracted=spreadsheet_time_extracted,
+            version=activate_version_message.version)
+        LOGGER.info('Sheet: {}, records processed: {}'.format(
+            sheet_title, record_count))
+        if sheet_data_rows:
+            # checkpoint: an interrupted sync of the sheet is resumed from the next page,
+            # after the requested rows (the API does not return the empty rows at the end of the page)
+            self.state.setdefault('sheet_checkpoints', {})[sheet_title] = {
+                'from_row': to_row + 1,
+                'version': activate_version_message.version}
+            singer.write_state(self.state)
+        if sheet_title in self.change_data_sheets:
+            # the hashes of the page's rows are stored once its records are written and checkpointed:
+            # an interrupted sync resumed from the checkpoint does not miss them
+            self.row_hash_index.commit_sheet(sheet_title)
+        return row_num
+
+    def write_deleted_records(self, catalog, sheet, activate_version_message, spreadsheet_time_extracted):
+        """
+        Remove the rows not found by the sync of the sheet from the row hash index,
+            and with change_data_deletes write a tombstone record for each of them
+        """
+        sheet_title = sheet.get('properties', {}).get('title')
+        if not self.change_data_sheets.get(sheet_title):
+            return
+        deleted_keys = self.row_hash_index.pop_deleted_keys(sheet_title)
+        LOGGER.info('Sheet: {}, deleted records: {}'.format(sheet_title, len(deleted_keys)))
+        if not self.change_data_deletes or not deleted_keys:
+            return
+        deleted_at = strftime(utils.now())
+        records = [{
+            '__sdc_spreadsheet_id': self.spreadsheet_id,
+            '__sdc_sheet_id': sheet.get('properties', {}).get('sheetId'),
+            self.row_hash_index.key_column: deleted_key,
+            change_data.DELETED_AT_FIELD: deleted_at} for deleted_key in deleted_keys]
+        self.process_records(
+            catalog=catalog,
+            stream_name=sheet_title,
+            records=records,
+            time_extracted=spreadsheet_time_extracted,
+            version=activate_version_message.version)
+
+    def finish_sheet_sync(self, sheet, activate_version_message, row_num):
+        """
+        Finish the sync of the sheet's records: write the final activate version message and the bookmark
+        Return the sheets_loaded record of the sheet
+        """
+        sheet_title = sheet.get('properties', {}).get('title')
+        sheet_id = sheet.get('properties', {}).get('sheetId')
+        activate_version = activate_version_message.version
+        internal_transform.DATA_WARNINGS.log_sheet_summary(sheet_title)
+        if sheet_title in self.append_only_sheets:
+            # the next sync of the append-only sheet starts after the last row with values
+            self.state.setdefault('last_row_numbers', {})[sheet_title] = self.sheet_last_rows.get(
+                sheet_title, self.get_sheet_start_row(sheet_title) - 1)
+        self.state.get('sheet_checkpoints', {}).pop(sheet_title, None)
+        if sheet_title in self.sheet_fingerprints:
+            self.update_sheet_fingerprint(sheet_title)
+        # End of Stream: Send Activate Version and update State
+        if not self.append_only_sheets.get(sheet_title) and not self.change_data_sheets.get(sheet_title):
+            singer.write_message(activate_version_message)
+        write_bookmark(self.state, sheet_title, activate_version)
+        LOGGER.info('COMPLETE SYNC, Stream: {}, Activate Version: {}'.format(sheet_title, activate_version))
+        LOGGER.info('FINISHED Syncing Sheet {}, Total Rows: {}'.format(
+            sheet_title, row_num - 2)) # subtract 1 for header row
+        update_currently_syncing(self.state, None)
+
+        # SHEETS_LOADED
+        # Add sheet to sheets_loaded
+        sheet_loaded = {}
+        sheet_loaded['spreadsheetId'] = self.spreadsheet_id
+        sheet_loaded['sheetId'] = sheet_id
+        sheet_loaded['title'] = sheet_title
+        sheet_loaded['loadDate'] = strftime(utils.now())
+        sheet_loaded['lastRowNumber'] = row_num
+        return sheet_loaded
+
+    def sync_sheet(self, catalog, sheet, columns, pages, spreadsheet_time_extracted):
+        """
+        Sync the sheet's records from the pages of the sheet, return the sheets_loaded record
+        """
+        with STAGE_TIMERS.timer('sheet', sheet.get('properties', {}).get('title')):
+            activate_version_message = self.start_sheet_sync(catalog, sheet)
+            row_num = self.get_sheet_start_row(sheet.get('properties', {}).get('title'))
+            for page in pages:
+                row_num = self.sync_sheet_page(catalog, sheet, columns, activate_version_message, page, spreadsheet_time_extracted)
+            self.write_deleted_records(catalog, sheet, activate_version_message, spreadsheet_time_extracted)
+            return self.finish_sheet_sync(sheet, activate_version_message, row_num)
+
+    def get_sheet_pages_args(self, sheet, columns):
+        """
+        Determine max range of columns and rows for "paging" through the data
+        """
+        sheet_last_col_index = 1
+        sheet_last_col_letter = 'A'
+        for col in columns:
+            col_index = col.get('columnIndex')
+            col_letter = col.get('columnLetter')
+            if col_index > sheet_last_col_index:
+                sheet_last_col_index = col_index
+                sheet_last_col_letter = col_letter
+        grid_properties = sheet.get('properties').get('gridProperties', {})
+        sheet_max_row = grid_properties.get('rowCount')
+        sheet_title = sheet.get('properties', {}).get('title')
+        page_planner = paging.PagePlanner.from_config(self.config, columns, grid_properties, self.column_ranges.get(sheet_title))
+        return sheet_title, sheet_last_col_letter, sheet_max_row, page_planner, self.get_sheet_start_row(sheet_title)
+
+    def set_append_only_sheets(self, catalog, selected_streams, sheets):
+        """
+        Get the selected sheets with the INCREMENTAL replication method in the catalog: the append-only sheets
+        The append-only sheets synced before are synced from the row after the last row synced (last_row_numbers in the state),
+            instead of the whole sheet under a new table version
+        """
+        self.append_only_sheets = {}
+        if not catalog:
+            return
+        last_row_numbers = self.state.get('last_row_numbers', {})
+        for sheet in sheets:
+            sheet_title = sheet.get('properties', {}).get('title')
+            stream = catalog.get_stream(sheet_title)
+            if sheet_title not in selected_streams or stream is None:
+                continue
+            replication_method = metadata.get(metadata.to_map(stream.metadata), (), 'replication-method') or stream.replication_method
+            if replication_method != 'INCREMENTAL':
+                continue
+            last_row_number = None
+            # the previous sync of the sheet is complete when its table version is bookmarked
+            if get_bookmark(self.state, sheet_title, None):
+                last_row_number = last_row_numbers.get(sheet_title)
+            self.append_only_sheets[sheet_title] = last_row_number
+            LOGGER.info('Sheet: {}, append-only, last row synced: {}'.format(sheet_title, last_row_number))
+
+    def prune_sheet_checkpoints(self, selected_streams, sheets):
+        """
+        Remove the checkpoints of the sheets not selected or not found in the spreadsheet from the state:
+            such a sheet selected again later is synced in full, instead of resumed with a stale table version and row
+        """
+        sheet_checkpoints = self.state.get('sheet_checkpoints')
+        if not sheet_checkpoints:
+            return
+        sheet_titles = set(sheet.get('properties', {}).get('title') for sheet in sheets or [])
+        for sheet_title in list(sheet_checkpoints):
+            if sheet_title not in selected_streams or sheet_title not in sheet_titles:
+                LOGGER.info('Sheet: {}, not synced, checkpoint removed: {}'.format(sheet_title, sheet_checkpoints[sheet_title]))
+                sheet_checkpoints.pop(sheet_title)
+
+    def get_sheet_start_row(self, sheet_title):
+        """
+        Row from which the sheet is synced: the next row of the checkpoint of an interrupted sheet,
+            the row after the last row synced of an append-only sheet, or 2
+        """
+        checkpoint = self.sheet_checkpoints.get(sheet_title)
+        if checkpoint:
+            return checkpoint['from_row']
+        last_row_number = self.append_only_sheets.get(sheet_title)
+        return last_row_number + 1 if last_row_number else 2
+
+    def get_header_rows(self, sheet_titles):
+        """
+        GET the header row (row 1) of the sheets with values:batchGet, up to max_header_ranges sheets per API call
+        Return the header row of each sheet title
+        """
+        header_rows = {}
+        path = self.header_rows_path.replace('{spreadsheet_id}', self.spreadsheet_id)
+        _, querystring = self.get_path(params=self.header_rows_params)
+        for index in range(0, len(sheet_titles), self.max_header_ranges):
+            chunk = sheet_titles[index:index + self.max_header_ranges]
+            ranges = '&'.join(["ranges='{}'!1:1".format(urllib.parse.quote_plus(sheet_title)) for sheet_title in chunk])
+            LOGGER.info('URL: {}/{}?{}&{}'.format(self.client.base_url, path, ranges, querystring))
+            data = self.client.get(
+                path=path,
+                api=self.api,
+                params='{}&{}'.format(ranges, querystring),
+                endpoint='header_rows')
+            # the value ranges are returned in the order of the requested ranges
+            for sheet_title, value_range in zip(chunk, data.get('valueRanges', [])):
+                header_rows[sheet_title] = next(iter(value_range.get('values', [])), [])
+        return header_rows
+
+    def get_sheets_fingerprints(self, sheets, last_rows):
+        """
+        GET the samples of the sheets with values:batchGet: the first fingerprint_sample_rows rows,
+            and fingerprint_sample_rows rows before and after the last row synced (to catch the appended rows)
+        Return the fingerprint of each sheet title: a hash of the sheet's grid size and samples
+        """
+        fingerprints = {}
+        path = self.header_rows_path.replace('{spreadsheet_id}', self.spreadsheet_id)
+        _, querystring = self.get_path(params=self.header_rows_params)
+        sheets_per_call = self.max_header_ranges // 2
+        for index in range(0, len(sheets), sheets_per_call):
+            chunk = sheets[index:index + sheets_per_call]
+            ranges = []
+            for sheet in chunk:
                 sheet_title = sheet.get('properties', {}).get('title')
-                sheet_id = sheet.get('properties', {}).get('sheetId')
+                last_row = last_rows.get(sheet_title, 1)
+                from_row = max(self.fingerprint_sample_rows + 1, last_row - self.fingerprint_sample_rows + 1)
+                for sample_rows in ('1:{}'.format(self.fingerprint_sample_rows),
+                                    '{}:{}'.format(from_row, max(from_row, last_row) + self.fingerprint_sample_rows)):
+                    ranges.append("ranges='{}'!{}".format(urllib.parse.quote_plus(sheet_title), sample_rows))
+            LOGGER.info('URL: {}/{}?{}&{}'.format(self.client.base_url, path, '&'.join(ranges), querystring))
+            data = self.client.get(
+                path=path,
+                api=self.api,
+                params='{}&{}'.format('&'.join(ranges), querystring),
+                endpoint='sheet_fingerprints')
+            # the value ranges are returned in the order of the requested ranges, 2 ranges per sheet
+            value_ranges = data.get('valueRanges', [])
+            for sheet_index, sheet in enumerate(chunk):
+                grid_properties = sheet.get('properties', {}).get('gridProperties', {})
+                samples = [value_range.get('values', []) for value_range in value_ranges[2 * sheet_index:2 * sheet_index + 2]]
+                content = json.dumps([grid_properties.get('rowCount'), grid_properties.get('columnCount'), samples])
+                fingerprints[sheet.get('properties', {}).get('title')] = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return fingerprints
+
+    def get_changed_streams(self, selected_streams, sheets):
+        """
+        Return the selected streams without the sheets whose fingerprint is unchanged since the previous sync
+        The fingerprints of the selected sheets are probed before the sync, and stored when each sheet is synced:
+            a sheet edited while it is synced is synced again by the next sync
+        The interrupted sheets and the append-only sheets are always synced
+        """
+        if not self.skip_unchanged_sheets:
+            return selected_streams
+        previous_fingerprints = self.state.get('sheet_fingerprints', {})
+        fingerprinted_sheets = [
+            sheet for sheet in sheets
+            if sheet.get('properties', {}).get('title') in selected_streams
+            and sheet.get('properties', {}).get('title') not in self.append_only_sheets]
+        if not fingerprinted_sheets:
+            return selected_streams
+        last_rows = {sheet_title: fingerprint.get('last_row', 1) for sheet_title, fingerprint in previous_fingerprints.items()}
+        fingerprints = self.get_sheets_fingerprints(fingerprinted_sheets, last_rows)
+        self.sheet_fingerprints = {
+            sheet_title: (fingerprint, last_rows.get(sheet_title, 1)) for sheet_title, fingerprint in fingerprints.items()}
+        if self.full_refresh:
+            return selected_streams
+        unchanged_sheets = set(
+            sheet_title for sheet_title, fingerprint in fingerprints.items()
+            if sheet_title in previous_fingerprints and sheet_title not in self.sheet_checkpoints
+            and fingerprint == previous_fingerprints[sheet_title].get('fingerprint'))
+        for sheet_title in unchanged_sheets:
+            LOGGER.info('SKIPPING Unchanged Sheet: {}'.format(sheet_title))
+        return [stream_name for stream_name in selected_streams if stream_name not in unchanged_sheets]
+
+    def update_sheet_fingerprint(self, sheet_title):
+        """
+        Store the fingerprint of the synced sheet in the state, as probed before its sync, with the last row of its samples
+        When the sheet's last row moved, only its new last row is stored: the next sync of the sheet fingerprints
+            the rows around it
+        """
+        fingerprint, last_row = self.sheet_fingerprints[sheet_title]
+        sheet_last_row = self.sheet_last_rows.get(sheet_title, 1)
+        sheet_fingerprint = {'last_row': sheet_last_row}
+        if sheet_last_row == last_row:
+            sheet_fingerprint['fingerprint'] = fingerprint
+        self.state.setdefault('sheet_fingerprints', {})[sheet_title] = sheet_fingerprint
+
+    def set_catalog_columns(self, catalog, selected_streams, sheets):
+        """
+        Get the sheet's columns stored in the catalog by the discovery, instead of the sheet_metadata of each sheet
+        The columns of the selected sheets (and of all the sheets, if sheet_metadata is selected) are checked
+            against the header rows, with 1 API call for all the sheets.
+        The sheets whose header row changed since the discovery, or without columns in the catalog
+            (ie. catalogs from older versions), get their sheet_metadata as before.
+        """
+        self.catalog_columns = {}
+        if not catalog:
+            return
+        for sheet in sheets:
+            sheet_title = sheet.get('properties', {}).get('title')
+            stream = catalog.get_stream(sheet_title)
+            if stream is None:
+                continue
+            columns = metadata.to_map(stream.metadata).get((), {}).get('sheet-columns')
+            if columns:
+                self.catalog_columns[sheet_title] = (stream.schema.to_dict(), columns)
+
+        sheet_titles = [sheet_title for sheet_title in self.catalog_columns
+                        if sheet_title in selected_streams or 'sheet_metadata' in selected_streams]
+        if not sheet_titles:
+            return
+        for sheet_title, header_row in self.get_header_rows(sheet_titles).items():
+            drift = schema.get_columns_drift(self.catalog_columns[sheet_title][1], header_row)
+            if drift:
+                LOGGER.warning('HEADER ROW CHANGED SINCE DISCOVERY. SHEET: {}, {}'.format(sheet_title, drift))
+                LOGGER.warning('   Getting the sheet metadata, run the discovery to update the catalog')
+                self.catalog_columns.pop(sheet_title)
+
+    def get_sheets_schema_columns(self, sheets, executor=None):
+        """
+        GET sheet_metadata and columns of the sheets, unless the columns are in the catalog
+        The sheet_metadata is fetched in batches of sheets, concurrently with an executor
+        """
+        batches = schema.get_sheets_metadata_batches(
+            [sheet for sheet in sheets if sheet.get('properties', {}).get('title') not in self.catalog_columns])
+        get_batch = functools.partial(schema.get_sheets_metadata_batch, spreadsheet_id=self.spreadsheet_id, client=self.client)
+        batches_schema_columns = executor.map(get_batch, batches) if executor else map(get_batch, batches)
+        return self.merge_sheets_schema_columns(sheets, batches, batches_schema_columns)
 
-                # GET sheet_metadata and columns
-                sheet_schema, columns = schema.get_sheet_metadata(sheet, self.spreadsheet_id, self.client)
-                # LOGGER.info('sheet_schema: {}'.format(sheet_schema))
+    async def get_sheets_schema_columns_async(self, client, sheets):
+        """
+        GET sheet_metadata and columns of the sheets with the async client, unless the columns are in the catalog
+        """
+        async def get_batch(batch):
+            path, api, endpoint = schema.get_sheets_metadata_request(batch, self.spreadsheet_id)
+            sheets_md_results = await client.get(path=path, api=api, endpoint=endpoint)
+            return schema.parse_sheets_metadata(batch, sheets_md_results)
+
+        batches = schema.get_sheets_metadata_batches(
+            [sheet for sheet in sheets if sheet.get('properties', {}).get('title') not in self.catalog_columns])
+        batches_schema_columns = await asyncio.gather(*[get_batch(batch) for batch in batches])
+        return self.merge_sheets_schema_columns(sheets, batches, batches_schema_columns)
 
+    def merge_sheets_schema_columns(self, sheets, batches, batches_schema_columns):
+        """
+        Return the sheet_schema and columns of each sheet, from the catalog or from the batches of sheet_metadata
+        """
+        sheets_schema_columns = {}
+        for batch, batch_schema_columns in zip(batches, batches_schema_columns):
+            for sheet, schema_columns in zip(batch, batch_schema_columns):
+                sheets_schema_columns[sheet.get('properties', {}).get('title')] = schema_columns
+        sheets_schema_columns.update(self.catalog_columns)
+        return [sheets_schema_columns[sheet.get('properties', {}).get('title')] for sheet in sheets]
+
+    async def sync_sheets_async(self, client, catalog, sheets_columns, spreadsheet_time_extracted):
+        """
+        Sync the selected sheets with the async client, return the sheets_loaded records
+        Up to max_in_flight pages are fetched concurrently, in the order of the sheets and pages,
+            while the pages are transformed and written in order, one sheet after another
+        """
+        sheets_loaded = []
+        sheets_pages = []
+        for sheet, columns in sheets_columns:
+            sheet_title, sheet_last_col_letter, sheet_max_row, page_planner, start_row = self.get_sheet_pages_args(sheet, columns)
+            # the pages of the sheets synced from the export are parsed when the sheet is synced
+            page_ranges = iter(()) if sheet_title in self.export_sheets else self.get_page_ranges(sheet_max_row, page_planner, start_row)
+            sheets_pages.append((sheet_title, sheet_last_col_letter, page_planner, page_ranges))
+        # (sheet index, from_row, to_row, task) of the pages being fetched
+        pending = deque()
+        next_sheet = 0
+
+        def schedule():
+            """
+            Start fetching the next pages, up to max_in_flight pages
+            """
+            nonlocal next_sheet
+            while len(pending) < self.max_in_flight and next_sheet < len(sheets_pages):
+                sheet_title, sheet_last_col_letter, _, page_ranges = sheets_pages[next_sheet]
+                page_range = next(page_ranges, None)
+                if page_range is None:
+                    next_sheet += 1
+                    continue
+                from_row, to_row = page_range
+                task = asyncio.ensure_future(self.get_page_data_async(client, sheet_title, sheet_last_col_letter, from_row, to_row))
+                pending.append((next_sheet, from_row, to_row, task))
+
+        try:
+            for index, (sheet, columns) in enumerate(sheets_columns):
+                page_planner = sheets_pages[index][2]
+                sheet_start_time = time.perf_counter()
+                activate_version_message = self.start_sheet_sync(catalog, sheet)
+                row_num = self.get_sheet_start_row(sheet.get('properties', {}).get('title'))
+                if sheet.get('properties', {}).get('title') in self.export_sheets:
+                    for page in self.get_sheet_pages(*self.get_sheet_pages_args(sheet, columns)):
+                        row_num = self.sync_sheet_page(catalog, sheet, columns, activate_version_message, page, spreadsheet_time_extracted)
+                while True:
+                    schedule()
+                    if not pending or pending[0][0] != index:
+                        break
+                    _, from_row, to_row, task = pending.popleft()
+                    sheet_data_rows, unformatted_sheet_data_rows, response_bytes, seconds, decode_seconds = await task
+                    self.add_fetch_stages(sheet.get('properties', {}).get('title'), from_row, seconds, decode_seconds)
+                    page_planner.observe(
+                        rows_requested=to_row - from_row + 1,
+                        rows_returned=len(sheet_data_rows),
+                        response_bytes=response_bytes,
+                        seconds=seconds)
+                    page = (from_row, to_row, sheet_data_rows, unformatted_sheet_data_rows)
+                    row_num = self.sync_sheet_page(catalog, sheet, columns, activate_version_message, page, spreadsheet_time_extracted)
+                    # If a whole blank page found, then stop fetching the sheet's pages
+                    if not sheet_data_rows:
+                        if next_sheet == index:
+                            next_sheet += 1
+                        while pending and pending[0][0] == index:
+                            pending.popleft()[3].cancel()
+                self.write_deleted_records(catalog, sheet, activate_version_message, spreadsheet_time_extracted)
+                sheets_loaded.append(self.finish_sheet_sync(sheet, activate_version_message, row_num))
+                STAGE_TIMERS.add('sheet', time.perf_counter() - sheet_start_time, sheet.get('properties', {}).get('title'))
+        finally:
+            # cancel the pages being fetched if the sync is interrupted
+            for _, _, _, task in pending:
+                task.cancel()
+            await asyncio.gather(*[task for _, _, _, task in pending], return_exceptions=True)
+        return sheets_loaded
+
+    async def load_data_async(self, catalog, selected_streams, sheets, spreadsheet_time_extracted):
+        """
+        Load sheet's records with the async client, under 1 event loop
+        """
+        sheet_metadata = []
+        sheets_columns = []
+        async with async_client.AsyncGoogleClient.from_config(self.config, self.client.rate_limiter) as client:
+            # GET sheet_metadata and columns of all the sheets
+            with STAGE_TIMERS.timer('schema'):
+                sheets_schema_columns = await self.get_sheets_schema_columns_async(client, sheets)
+            self.set_column_ranges(catalog, selected_streams, sheets, sheets_schema_columns)
+            for sheet, (sheet_schema, columns) in zip(sheets, sheets_schema_columns):
+                sheet_title = sheet.get('properties', {}).get('title')
                 # SKIP empty sheets (where sheet_schema and columns are None)
                 if not sheet_schema or not columns:
                     LOGGER.info('SKIPPING Empty Sheet: {}'.format(sheet_title))
                 else:
                     # Transform sheet_metadata
-                    sheet_metadata_transformed = internal_transform.transform_sheet_metadata(self.spreadsheet_id, sheet, columns)
-                    # LOGGER.info('sheet_metadata_transformed = {}'.format(sheet_metadata_transformed))
-                    sheet_metadata.append(sheet_metadata_transformed)
-
+                    sheet_metadata.append(internal_transform.transform_sheet_metadata(self.spreadsheet_id, sheet, columns))
                     # SHEET_DATA
                     # Should this worksheet tab be synced?
                     if sheet_title in selected_streams:
-                        LOGGER.info('STARTED Syncing Sheet {}'.format(sheet_title))
-                        update_currently_syncing(self.state, sheet_title)
-                        selected_fields = get_selected_fields(catalog, sheet_title) # --------------------
-                        LOGGER.info('Stream: {}, selected_fields: {}'.format(sheet_title, selected_fields))
-                        write_schema(catalog, sheet_title)
-
-                        # Emit a Singer ACTIVATE_VERSION message before initial sync (but not subsequent syncs)
-                        # everytime after each sheet sync is complete.
-                        # This forces hard deletes on the data downstream if fewer records are sent.
-                        # https://github.com/singer-io/singer-python/blob/master/singer/messages.py#L137
-                        last_integer = int(get_bookmark(self.state, sheet_title, 0))
-                        activate_version = int(time.time() * 1000)
-                        activate_version_message = singer.ActivateVersionMessage(
-                                stream=sheet_title,
-                                version=activate_version)
-                        if last_integer == 0:
-                            # initial load, send activate_version before AND after data sync
-                            singer.write_message(activate_version_message)
-                            LOGGER.info('INITIAL SYNC, Stream: {}, Activate Version: {}'.format(sheet_title, activate_version))
-
-                        # Determine max range of columns and rows for "paging" through the data
-                        sheet_last_col_index = 1
-                        sheet_last_col_letter = 'A'
-                        for col in columns:
-                            col_index = col.get('columnIndex')
-                            col_letter = col.get('columnLetter')
-                            if col_index > sheet_last_col_index:
-                                sheet_last_col_index = col_index
-                                sheet_last_col_letter = col_letter
-                        sheet_max_row = sheet.get('properties').get('gridProperties', {}).get('rowCount')
-
-                        # Initialize paging for 1st batch
-                        is_last_row = False
-                        batch_rows = 200
-                        from_row = 2
-                        if sheet_max_row < batch_rows:
-                            to_row = sheet_max_row
-                        else:
-                            to_row = batch_rows
-
-                        # Loop thru batches (each having 200 rows of data)
-                        while not is_last_row and from_row < sheet_max_row and to_row <= sheet_max_row:
-                            range_rows = 'A{}:{}{}'.format(from_row, sheet_last_col_letter, to_row)
-
-                            self.params = {
-                                "dateTimeRenderOption": "SERIAL_NUMBER",
-                                "valueRenderOption": "FORMATTED_VALUE",
-                                "majorDimension": "ROWS"
-                            }
-                            # GET sheet_data for a worksheet tab
-                            sheet_data, time_extracted = self.get_data(stream_name=sheet_title, range_rows=range_rows)
-                            # Data is returned as a list of arrays, an array of values for each row
-                            sheet_data_rows = sheet_data.get('values', [])
-                            self.params = {
-                                "dateTimeRenderOption": "SERIAL_NUMBER",
-                                "valueRenderOption": "UNFORMATTED_VALUE",
-                                "majorDimension": "ROWS"
-                            }
-                            unformatted_sheet_data, _ = self.get_data(stream_name=sheet_title, range_rows=range_rows)
-                            unformatted_sheet_data_rows = unformatted_sheet_data.get('values', [])
-
-                            # Transform batch of rows to JSON with keys for each column
-                            sheet_data_transformed, row_num = internal_transform.transform_sheet_data(
-                                spreadsheet_id=self.spreadsheet_id,
-                                sheet_id=sheet_id,
-                                sheet_title=sheet_title,
-                                from_row=from_row,
-                                columns=columns,
-                                sheet_data_rows=sheet_data_rows, 
-                                unformatted_rows = unformatted_sheet_data_rows)
-
-                            # Here row_num is the addition of from_row and total records get in response(per batch).
-                            # Condition row_num < to_row was checking that if records on the current page are less than expected(to_row) or not.
-                            # If the condition returns true then it was breaking the loop.
-                            # API does not return the last empty rows in response.
-                            # For example, rows 199 and 200 are empty, and a total of 400 rows are there in the sheet. So, in 1st iteration,
-                            # to_row = 200, from_row = 2, row_num = 2(from_row) + 197 = 199(1st row contain header value)
-                            # So, the above condition become true and breaks the loop without syncing records from 201 to 400.
-                            # sheet_data_rows is no of records return in the current page. If it's a whole blank page then stop looping.
-                            # So, in the above case, it syncs records 201 to 400 also even if rows 199 and 200 are blank.
-                            # Then when the next batch 401 to 600 is empty, it breaks the loop.
-                            if not sheet_data_rows: # If a whole blank page found, then stop looping.
-                                is_last_row = True
-
-                            # Process records, send batch of records to target
-                            record_count = self.process_records(
-                                catalog=catalog,
-                                stream_name=sheet_title,
-                                records=sheet_data_transformed,
-                                time_extracted=spreadsheet_time_extracted,
-                                version=activate_version)
-                            LOGGER.info('Sheet: {}, records processed: {}'.format(
-                                sheet_title, record_count))
-
-                            # Update paging from/to_row for next batch
-                            from_row = to_row + 1
-                            if to_row + batch_rows > sheet_max_row:
-                                to_row = sheet_max_row
-                            else:
-                                to_row = to_row + batch_rows
-
-                        # End of Stream: Send Activate Version and update State
-                        singer.write_message(activate_version_message)
-                        write_bookmark(self.state, sheet_title, activate_version)
-                        LOGGER.info('COMPLETE SYNC, Stream: {}, Activate Version: {}'.format(sheet_title, activate_version))
-                        LOGGER.info('FINISHED Syncing Sheet {}, Total Rows: {}'.format(
-                            sheet_title, row_num - 2)) # subtract 1 for header row
-                        update_currently_syncing(self.state, None)
-
-                        # SHEETS_LOADED
-                        # Add sheet to sheets_loaded
-                        sheet_loaded = {}
-                        sheet_loaded['spreadsheetId'] = self.spreadsheet_id
-                        sheet_loaded['sheetId'] = sheet_id
-                        sheet_loaded['title'] = sheet_title
-                        sheet_loaded['loadDate'] = strftime(utils.now())
-                        sheet_loaded['lastRowNumber'] = row_num
-                        sheets_loaded.append(sheet_loaded)
+                        sheets_columns.append((sheet, columns))
+            sheets_loaded = await self.sync_sheets_async(client, catalog, sheets_columns, spreadsheet_time_extracted)
+        return sheet_metadata, sheets_loaded
+
+    def load_data(self, catalog, state, selected_streams, sheets, spreadsheet_time_extracted):
+        """
+        Load sheet's records if that sheet is selected for sync, with the row hash index open in change data mode
+        """
+        if self.config.get('change_data_db'):
+            self.row_hash_index = change_data.RowHashIndex(
+                self.config.get('change_data_db'),
+                self.spreadsheet_id,
+                self.config.get('change_data_key_column') or change_data.ROW_KEY_COLUMN)
+        try:
+            return self.load_sheets_data(catalog, state, selected_streams, sheets, spreadsheet_time_extracted)
+        finally:
+            if self.row_hash_index:
+                self.row_hash_index.close()
+                self.row_hash_index = None
+
+    def load_sheets_data(self, catalog, state, selected_streams, sheets, spreadsheet_time_extracted):
+        """
+        Load sheet's records if that sheet is selected for sync
+        With max_workers > 1, the sheet's metadata and pages are fetched concurrently in a thread pool,
+            while the records of each sheet are written in order by the main thread
+        With prefetch_pages, the next pages of the sheet are fetched in a worker thread
+            while the current page is transformed and written by the main thread
+        With async_requests, the sheet's metadata and pages are fetched with the async client
+        With export_min_cells, the pages of the large sheets are parsed from 1 XLSX export of the spreadsheet
+        With fetch_selected_columns, only the column ranges of the columns kept in the records are fetched
+        The sheet's columns stored in the catalog by the discovery are used instead of the sheet's metadata,
+            while the header row of the sheet is unchanged
+        """
+        self.state = state
+        self.prune_sheet_checkpoints(selected_streams, sheets)
+        self.sheet_checkpoints = dict(self.state.get('sheet_checkpoints', {}))
+        sheet_metadata = []
+        sheets_loaded = []
+        if sheets:
+            self.set_append_only_sheets(catalog, selected_streams, sheets)
+            selected_streams = self.get_changed_streams(selected_streams, sheets)
+            with STAGE_TIMERS.timer('schema'):
+                self.set_catalog_columns(catalog, selected_streams, sheets)
+            self.start_export(selected_streams, sheets)
+        if sheets and self.async_requests:
+            try:
+                sheet_metadata, sheets_loaded = asyncio.run(
+                    self.load_data_async(catalog, selected_streams, sheets, spreadsheet_time_extracted))
+            finally:
+                self.close_export()
+            return sheet_metadata, sheets_loaded
+        if sheets:
+            executor = None
+            stop_event = threading.Event()
+            if self.max_workers > 1 or self.prefetch_pages:
+                executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                sheets_pages = {}
+                if self.max_workers > 1:
+                    # GET sheet_metadata and columns of all the sheets, then start fetching the pages of the selected sheets
+                    with STAGE_TIMERS.timer('schema'):
+                        sheets_schema_columns = self.get_sheets_schema_columns(sheets, executor)
+                    self.set_column_ranges(catalog, selected_streams, sheets, sheets_schema_columns)
+                    for sheet, (sheet_schema, columns) in zip(sheets, sheets_schema_columns):
+                        sheet_title = sheet.get('properties', {}).get('title')
+                        if sheet_schema and columns and sheet_title in selected_streams:
+                            sheets_pages[sheet_title] = pipeline.submit_pages(
+                                executor,
+                                self.get_sheet_pages(*self.get_sheet_pages_args(sheet, columns)),
+                                self.prefetch_pages or self.concurrent_prefetch_pages,
+                                stop_event)
+                else:
+                    with STAGE_TIMERS.timer('schema'):
+                        sheets_schema_columns = self.get_sheets_schema_columns(sheets)
+                    self.set_column_ranges(catalog, selected_streams, sheets, sheets_schema_columns)
+
+                # Loop through sheets (worksheet tabs) in spreadsheet
+                for sheet, (sheet_schema, columns) in zip(sheets, sheets_schema_columns):
+                    sheet_title = sheet.get('properties', {}).get('title')
+                    # LOGGER.info('sheet_schema: {}'.format(sheet_schema))
+
+                    # SKIP empty sheets (where sheet_schema and columns are None)
+                    if not sheet_schema or not columns:
+                        LOGGER.info('SKIPPING Empty Sheet: {}'.format(sheet_title))
+                    else:
+                        # Transform sheet_metadata
+                        sheet_metadata_transformed = internal_transform.transform_sheet_metadata(self.spreadsheet_id, sheet, columns)
+                        # LOGGER.info('sheet_metadata_transformed = {}'.format(sheet_metadata_transformed))
+                        sheet_metadata.append(sheet_metadata_transformed)
+
+                        # SHEET_DATA
+                        # Should this worksheet tab be synced?
+                        if sheet_title in selected_streams:
+                            pages = sheets_pages.get(sheet_title)
+                            if pages is None:
+                                pages = self.get_sheet_pages(*self.get_sheet_pages_args(sheet, columns))
+                                if executor:
+                                    # prefetch the next pages while the current page is transformed and written
+                                    pages = pipeline.submit_pages(executor, pages, self.prefetch_pages, stop_event)
+                            sheet_loaded = self.sync_sheet(catalog, sheet, columns, pages, spreadsheet_time_extracted)
+                            sheets_loaded.append(sheet_loaded)
+            finally:
+                if executor:
+                    # stop the page producers if the sync is interrupted, and wait for the workers
+                    stop_event.set()
+                    executor.shutdown(wait=True)
+                self.close_export()
 
         return sheet_metadata, sheets_loaded
 
@@ -1,5 +1,7 @@
 import singer
 from tap_google_sheets.streams import STREAMS, SheetsLoadData, write_bookmark, strftime
+import tap_google_sheets.transform as internal_transform
+from tap_google_sheets.stage_timers import STAGE_TIMERS
 
 LOGGER = singer.get_logger()
 
@@ -35,7 +37,8 @@ def sync(client, config, catalog, state):
         # to sync the sheet's data, we need to get "spreadsheet_metadata"
         if stream_name == "spreadsheet_metadata":
             # get the metadata for the whole spreadsheet
-            spreadsheet_metadata, time_extracted = stream_obj.get_data(stream_name=stream_obj.stream_name)
+            with STAGE_TIMERS.timer('spreadsheet_metadata'):
+                spreadsheet_metadata, time_extracted = stream_obj.get_data(stream_name=stream_obj.stream_name)
 
             # if the "spreadsheet_metadata" is selected, then do sync
             if stream_name in selected_streams:
@@ -44,7 +47,7 @@ def sync(client, config, catalog, state):
             # get sheets from the metadata
             sheets = spreadsheet_metadata.get("sheets")
             # class to load sheet's data
-            sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"))
+            sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
 
             # perform sheet's sync and get sheet's metadata and sheet loaded records for "sheet_metadata" and "sheets_loaded" streams
             sheet_metadata_records, sheets_loaded_records = sheets_load_data.load_data(catalog=catalog,
@@ -52,6 +55,8 @@ def sync(client, config, catalog, state):
                                                                                         selected_streams=selected_streams,
                                                                                         sheets=sheets,
                                                                                         spreadsheet_time_extracted=time_extracted)
+            internal_transform.log_dttm_cache_metrics()
+            STAGE_TIMERS.log_summary()
 
         # sync "sheet_metadata" and "sheets_loaded" based on the records from spreadsheet metadata
         elif stream_name in ["sheet_metadata", "sheets_loaded"] and stream_name in selected_streams:
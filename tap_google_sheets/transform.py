@@ -1,12 +1,86 @@
 import math
 import json
-from datetime import datetime, timedelta
+import functools
+import threading
+from datetime import date, datetime, timedelta
 import pytz
 import singer
+from singer import metrics
 from singer.utils import strftime
+from tap_google_sheets.number_format import render_formatted_value
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 LOGGER = singer.get_logger()
 
+SECONDS_PER_DAY = 86400
+EXCEL_EPOCH = 25569 # 1970-01-01T00:00:00Z, Lotus Notes Serial Number for Epoch Start Date
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Seconds since the epoch of the datetimes of python: 0001-01-01T00:00:00 to 9999-12-31T23:59:59
+MIN_EPOCH_SECONDS = (date.min.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY
+MAX_EPOCH_SECONDS = (date.max.toordinal() - EPOCH_ORDINAL + 1) * SECONDS_PER_DAY - 1
+# Number of the distinct (serial number, timezone) conversions kept by excel_to_dttm_str
+DTTM_CACHE_SIZE = 65536
+# Number of the cells of each column given as examples in the data warnings summary of a sheet
+DATA_WARNING_SAMPLES = 3
+
+
+class DataWarnings:
+    """
+    Counters of the possible data type errors (per sheet and column) and of the empty rows (per sheet),
+        with the first cells as examples, logged in 1 summary line at the end of each sheet.
+    verbose: each warning is also logged when it happens (verbose_data_warnings)
+    """
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        # sheet_title: {(col_name, col_type): [count, cells]}
+        self.data_type_errors = {}
+        # sheet_title: [count, row numbers]
+        self.empty_rows = {}
+
+    def data_type_error(self, sheet_title, col_name, col_letter, row_num, col_type):
+        if self.verbose:
+            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
+                sheet_title, col_name, col_letter, row_num, col_type))
+        with self.lock:
+            counter = self.data_type_errors.setdefault(sheet_title, {}).setdefault((col_name, col_type), [0, []])
+            counter[0] += 1
+            if len(counter[1]) < DATA_WARNING_SAMPLES:
+                counter[1].append('{}{}'.format(col_letter, row_num))
+
+    def empty_row(self, sheet_title, row_num):
+        if self.verbose:
+            LOGGER.info('EMPTY ROW: {}, SKIPPING'.format(row_num))
+        with self.lock:
+            counter = self.empty_rows.setdefault(sheet_title, [0, []])
+            counter[0] += 1
+            if len(counter[1]) < DATA_WARNING_SAMPLES:
+                counter[1].append(row_num)
+
+    def log_sheet_summary(self, sheet_title):
+        """
+        Log the counters of the sheet, and reset them
+        """
+        with self.lock:
+            data_type_errors = self.data_type_errors.pop(sheet_title, {})
+            empty_rows = self.empty_rows.pop(sheet_title, None)
+        if empty_rows:
+            LOGGER.info('SHEET: {}, EMPTY ROWS SKIPPED: {}, ROWS: {}{}'.format(
+                sheet_title, empty_rows[0], ', '.join(str(row_num) for row_num in empty_rows[1]),
+                ', ...' if empty_rows[0] > len(empty_rows[1]) else ''))
+        if data_type_errors:
+            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERRORS; SHEET: {}, {}'.format(sheet_title, '; '.join(
+                'COL: {}, TYPE: {}, CELLS: {}, e.g. {}{}'.format(
+                    col_name, col_type, count, ', '.join(cells), ', ...' if count > len(cells) else '')
+                for (col_name, col_type), (count, cells) in data_type_errors.items())))
+
+
+DATA_WARNINGS = DataWarnings()
+
 # Tranform spreadsheet_metadata: add spreadsheetId, sheetUrl, and columns metadata
 def transform_sheet_metadata(spreadsheet_id, sheet, columns):
     # Convert to properties to dict
@@ -47,26 +121,46 @@ def transform_file_metadata(file_metadata):
     file_metadata_arr.append(file_metadata_tf)
     return file_metadata_arr
 
+@functools.lru_cache(maxsize=None)
+def get_timezone(timezone_str):
+    return pytz.timezone(timezone_str)
+
+# Convert Excel Date Serial Number (excel_date_sn) to UTC datetime string, None for out of range values
+# The conversions are memoized, as the date columns repeat a small set of serial numbers
+@functools.lru_cache(maxsize=DTTM_CACHE_SIZE)
+def serial_to_dttm_str(excel_date_sn, timezone_str):
+    if timezone_str == 'UTC':
+        return excel_to_dttm_str_fast(excel_date_sn)
+    tzn = get_timezone(timezone_str)
+    epoch_sec = math.floor((excel_date_sn - EXCEL_EPOCH) * SECONDS_PER_DAY)
+    epoch_dttm = datetime(1970, 1, 1)
+    # For out of range values, it will throw OverflowError
+    try:
+        excel_dttm = epoch_dttm + timedelta(seconds=epoch_sec)
+    except OverflowError:
+        return None
+    utc_dttm = tzn.localize(excel_dttm).astimezone(pytz.utc)
+    return strftime(utc_dttm)
+
 # Convert Excel Date Serial Number (excel_date_sn) to datetime string
 # timezone_str: defaults to UTC (which we assume is the timezone for ALL datetimes)
 def excel_to_dttm_str(string_value, excel_date_sn, timezone_str=None):
     if not timezone_str:
         timezone_str = 'UTC'
-    tzn = pytz.timezone(timezone_str)
-    sec_per_day = 86400
-    excel_epoch = 25569 # 1970-01-01T00:00:00Z, Lotus Notes Serial Number for Epoch Start Date
-    epoch_sec = math.floor((excel_date_sn - excel_epoch) * sec_per_day)
-    epoch_dttm = datetime(1970, 1, 1)
-    # For out of range values, it will throw OverflowError and it would return the string value
-    # as passed in the sheets without any conversion
-    try:
-        excel_dttm = epoch_dttm + timedelta(seconds=epoch_sec)
-    except OverflowError:
+    utc_dttm_str = serial_to_dttm_str(excel_date_sn, timezone_str)
+    # For out of range values, it would return the string value as passed in the sheets without any conversion
+    if utc_dttm_str is None:
         return str(string_value), True
-    utc_dttm = tzn.localize(excel_dttm).astimezone(pytz.utc)
-    utc_dttm_str = strftime(utc_dttm)
     return utc_dttm_str, False
 
+# Log the hits and misses of the datetime conversions cache
+def log_dttm_cache_metrics():
+    cache_info = serial_to_dttm_str.cache_info()
+    with metrics.Counter('dttm_cache_hits') as counter:
+        counter.increment(cache_info.hits)
+    with metrics.Counter('dttm_cache_misses') as counter:
+        counter.increment(cache_info.misses)
+
 
 # transform datetime values in the sheet
 def transform_sheet_datetime_data(value, unformatted_value, sheet_title, col_name, col_letter, row_num, col_type):
@@ -76,8 +170,7 @@ def transform_sheet_datetime_data(value, unformatted_value, sheet_title, col_nam
         datetime_str, _ = excel_to_dttm_str(value, unformatted_value)
         return datetime_str
     else:
-        LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-            sheet_title, col_name, col_letter, row_num, col_type))
+        DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return str(value)
 
 # transform date values in the sheet
@@ -89,8 +182,7 @@ def transform_sheet_date_data(value, unformatted_value, sheet_title, col_name, c
         return_str = date_str if is_error else date_str[:10]
         return return_str
     else:
-        LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-            sheet_title, col_name, col_letter, row_num, col_type))
+        DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return str(value)
 
 # transform time values in the sheet
@@ -102,8 +194,7 @@ def transform_sheet_time_data(value, unformatted_value, sheet_title, col_name, c
             col_val = str(timedelta(seconds=total_secs))
         except ValueError:
             col_val = str(value)
-            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-                sheet_title, col_name, col_letter, row_num, col_type))
+            DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return col_val
     else:
         return str(value)
@@ -125,8 +216,7 @@ def transform_sheet_boolean_data(value, unformatted_value, sheet_title, col_name
             col_val = False
         else:
             col_val = str(value)
-            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-                sheet_title, col_name, col_letter, row, col_type))
+            DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row, col_type)
         return col_val
     elif isinstance(value, int):
         if value in (1, -1):
@@ -135,35 +225,33 @@ def transform_sheet_boolean_data(value, unformatted_value, sheet_title, col_name
             col_val = False
         else:
             col_val = str(value)
-            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-                sheet_title, col_name, col_letter, row, col_type))
+            DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row, col_type)
         return col_val
     elif isinstance(value, float):
         col_val = str(value)
-        LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-            sheet_title, col_name, col_letter, row, col_type))
+        DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row, col_type)
         return col_val
 
 # transform decimal values in the sheet
 def transform_sheet_decimal_data(value, sheet_title, col_name, col_letter, row_num, col_type):
     # Determine float decimal digits
-    decimal_digits = str(value)[::-1].find('.')
+    value_str = str(value)
+    point = value_str.rfind('.')
+    decimal_digits = len(value_str) - point - 1 if point != -1 else -1
     if decimal_digits > 15:
         try:
             # ROUND to multipleOf: 1e-15
             col_val = float(round(value, 15))
         except ValueError:
             col_val = str(value)
-            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-                sheet_title, col_name, col_letter, row_num, col_type))
+            DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return col_val
     else: # decimal_digits <= 15, no rounding
         try:
             col_val = float(value)
         except ValueError:
             col_val = str(value)
-            LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR: SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-                sheet_title, col_name, col_letter, row_num, col_type))
+            DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return col_val
 
 # transform number values in the sheet
@@ -173,8 +261,7 @@ def transform_sheet_number_data(value, sheet_title, col_name, col_letter, row_nu
     elif type(value) == float:
         return transform_sheet_decimal_data(value, sheet_title, col_name, col_letter, row_num, col_type)
     else:
-        LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR: SHEET: {}, COL: {}, CELL: {}{}, TYPE: {} '.format(
-                sheet_title, col_name, col_letter, row_num, col_type))
+        DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return str(value)
 
 # return transformed column the values based on the datatype
@@ -206,49 +293,228 @@ def get_column_value(value, unformatted_value, sheet_title, col_name, col_letter
 
     # BOOLEAN
     elif col_type == 'boolValue':
-        return transform_sheet_boolean_data(value, unformatted_value, sheet_title, col_name, col_letter, col_type, row)
+        return transform_sheet_boolean_data(value, unformatted_value, sheet_title, col_name, col_letter, col_type, row_num)
 
     # OTHER: Convert everything else to a string
     else:
-        LOGGER.info('WARNING: POSSIBLE DATA TYPE ERROR; SHEET: {}, COL: {}, CELL: {}{}, TYPE: {}'.format(
-            sheet_title, col_name, col_letter, row, col_type))
+        DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
         return str(value)
 
+# Get the unformatted value of a grid data cell, as returned by the values API with
+#   valueRenderOption = UNFORMATTED_VALUE and dateTimeRenderOption = SERIAL_NUMBER
+def get_grid_data_unformatted_value(cell):
+    effective_value = cell.get('effectiveValue', {})
+    for key in ('numberValue', 'stringValue', 'boolValue'):
+        if key in effective_value:
+            return effective_value[key]
+    # errorValue: the values API returns the error as a string, ie. #REF!
+    return cell.get('formattedValue', '')
+
+# Transform rowData of the grid data (spreadsheets.get w/ includeGridData) to formatted and unformatted
+#   rows of values, the same as returned by the values API with majorDimension = ROWS
+#   (trailing empty cells and trailing empty rows are not returned)
+def transform_grid_data_rows(row_data):
+    formatted_rows = []
+    unformatted_rows = []
+    for grid_row in row_data:
+        formatted_row = []
+        unformatted_row = []
+        for cell in grid_row.get('values', []):
+            formatted_row.append(cell.get('formattedValue', ''))
+            unformatted_row.append(get_grid_data_unformatted_value(cell))
+        while formatted_row and formatted_row[-1] == '' and unformatted_row[-1] == '':
+            formatted_row.pop()
+            unformatted_row.pop()
+        formatted_rows.append(formatted_row)
+        unformatted_rows.append(unformatted_row)
+    while formatted_rows and formatted_rows[-1] == []:
+        formatted_rows.pop()
+        unformatted_rows.pop()
+    return formatted_rows, unformatted_rows
+
+# Render the formatted rows of values from the unformatted rows, with the number format of each column
+#   (fetch_mode = local_format: the values API is called with valueRenderOption = UNFORMATTED_VALUE only)
+def render_formatted_rows(columns, unformatted_rows):
+    number_formats = [col.get('columnNumberFormat') for col in sorted(columns, key=lambda i: i['columnIndex'])]
+    formatted_rows = []
+    for unformatted_row in unformatted_rows:
+        formatted_rows.append([
+            render_formatted_value(value, number_formats[index] if index < len(number_formats) else None)
+            for index, value in enumerate(unformatted_row)])
+    return formatted_rows
+
+# Return the converter of the values of a column based on the datatype, the same as get_column_value
+#   converter(value, unformatted_value, row_num, row) -> transformed column value
+def get_column_converter(sheet_title, col_name, col_letter, col_type):
+    # Convert dates/times from Lotus Notes Serial Numbers
+    # DATE-TIME
+    if col_type == 'numberType.DATE_TIME':
+        def convert(value, unformatted_value, row_num, row):
+            return transform_sheet_datetime_data(value, unformatted_value, sheet_title, col_name, col_letter, row_num, col_type)
+
+    # DATE
+    elif col_type == 'numberType.DATE':
+        def convert(value, unformatted_value, row_num, row):
+            return transform_sheet_date_data(value, unformatted_value, sheet_title, col_name, col_letter, row_num, col_type)
+
+    # TIME ONLY (NO DATE)
+    elif col_type == 'numberType.TIME':
+        def convert(value, unformatted_value, row_num, row):
+            return transform_sheet_time_data(value, unformatted_value, sheet_title, col_name, col_letter, row_num, col_type)
+
+    # NUMBER (INTEGER AND FLOAT)
+    elif col_type == 'numberType':
+        def convert(value, unformatted_value, row_num, row):
+            return transform_sheet_number_data(unformatted_value, sheet_title, col_name, col_letter, row_num, col_type)
+
+    # STRING
+    elif col_type == 'stringValue':
+        def convert(value, unformatted_value, row_num, row):
+            return str(value)
+
+    # BOOLEAN
+    elif col_type == 'boolValue':
+        def convert(value, unformatted_value, row_num, row):
+            return transform_sheet_boolean_data(value, unformatted_value, sheet_title, col_name, col_letter, col_type, row_num)
+
+    # OTHER: Convert everything else to a string
+    else:
+        def convert(value, unformatted_value, row_num, row):
+            DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
+            return str(value)
+
+    return convert
+
+# Convert the Excel Date Serial Numbers of a column to datetime strings, the same as excel_to_dttm_str (UTC)
+#   None for the out of range values (OverflowError of excel_to_dttm_str)
+def excel_to_dttm_strs(excel_date_sns):
+    if numpy is not None and excel_date_sns:
+        try:
+            return excel_to_dttm_strs_numpy(excel_date_sns)
+        except (OverflowError, ValueError):
+            pass
+    return [serial_to_dttm_str(excel_date_sn, 'UTC') for excel_date_sn in excel_date_sns]
+
+@functools.lru_cache(maxsize=4096)
+def epoch_days_to_date_str(epoch_days):
+    return date.fromordinal(EPOCH_ORDINAL + epoch_days).isoformat()
+
+def excel_to_dttm_str_fast(excel_date_sn):
+    epoch_sec = math.floor((excel_date_sn - EXCEL_EPOCH) * SECONDS_PER_DAY)
+    epoch_days, day_sec = divmod(epoch_sec, SECONDS_PER_DAY)
+    try:
+        date_str = epoch_days_to_date_str(epoch_days)
+    except (ValueError, OverflowError):
+        return None
+    hours, day_sec = divmod(day_sec, 3600)
+    minutes, seconds = divmod(day_sec, 60)
+    return '{}T{:02d}:{:02d}:{:02d}.000000Z'.format(date_str, hours, minutes, seconds)
+
+def excel_to_dttm_strs_numpy(excel_date_sns):
+    epoch_secs = numpy.floor((numpy.asarray(excel_date_sns, dtype=numpy.float64) - EXCEL_EPOCH) * SECONDS_PER_DAY)
+    in_range = (epoch_secs >= MIN_EPOCH_SECONDS) & (epoch_secs <= MAX_EPOCH_SECONDS)
+    dttm_strs = iter(numpy.datetime_as_string(epoch_secs[in_range].astype('int64').astype('datetime64[s]'), unit='s'))
+    return [next(dttm_strs) + '.000000Z' if is_in_range else None for is_in_range in in_range.tolist()]
+
+# Return the converter of the values of a column (a page of the sheet) based on the datatype
+#   converter(values, unformatted_values, row_nums, rows) -> transformed column values
+#   The dates, datetimes and numbers are converted column at a time, the other types cell by cell
+def get_column_values_converter(sheet_title, col_name, col_letter, col_type):
+    # DATE-TIME and DATE
+    if col_type in ('numberType.DATE_TIME', 'numberType.DATE'):
+        is_date = col_type == 'numberType.DATE'
+        def convert_values(values, unformatted_values, row_nums, rows):
+            dttm_strs = iter(excel_to_dttm_strs([
+                unformatted_value for unformatted_value in unformatted_values if isinstance(unformatted_value, (int, float))]))
+            col_vals = []
+            for value, unformatted_value, row_num in zip(values, unformatted_values, row_nums):
+                if isinstance(unformatted_value, (int, float)):
+                    dttm_str = next(dttm_strs)
+                    if dttm_str is None:
+                        # out of range values, the string value as passed in the sheets
+                        col_vals.append(str(value))
+                    else:
+                        col_vals.append(dttm_str[:10] if is_date else dttm_str)
+                else:
+                    DATA_WARNINGS.data_type_error(sheet_title, col_name, col_letter, row_num, col_type)
+                    col_vals.append(str(value))
+            return col_vals
+
+    # NUMBER (INTEGER AND FLOAT)
+    elif col_type == 'numberType':
+        def convert_values(values, unformatted_values, row_nums, rows):
+            col_vals = []
+            for unformatted_value, row_num in zip(unformatted_values, row_nums):
+                if type(unformatted_value) == int:
+                    col_vals.append(unformatted_value)
+                else:
+                    col_vals.append(transform_sheet_number_data(
+                        unformatted_value, sheet_title, col_name, col_letter, row_num, col_type))
+            return col_vals
+
+    else:
+        convert = get_column_converter(sheet_title, col_name, col_letter, col_type)
+        def convert_values(values, unformatted_values, row_nums, rows):
+            return [convert(value, unformatted_value, row_num, row)
+                    for value, unformatted_value, row_num, row in zip(values, unformatted_values, row_nums, rows)]
+
+    return convert_values
+
+# Compile the columns of a sheet to a plan of (column position, column name, column values converter), sorted by columnIndex
+#   The skipped columns are not in the plan
+def get_column_plan(sheet_title, columns):
+    column_plan = []
+    # Create sorted list of columns based on columnIndex
+    cols = sorted(columns, key=lambda i: i['columnIndex'])
+    for position, col in enumerate(cols):
+        if not col.get('columnSkipped'):
+            col_name = col.get('columnName')
+            column_plan.append((position, col_name, get_column_values_converter(
+                sheet_title, col_name, col.get('columnLetter'), col.get('columnType'))))
+    return tuple(column_plan)
+
 # Transform sheet_data: add spreadsheet_id, sheet_id, and row, convert dates/times
 #  Convert from array of values to JSON with column names as keys
-def transform_sheet_data(spreadsheet_id, sheet_id, sheet_title, from_row, columns, sheet_data_rows, unformatted_rows):
+#  The values are converted column at a time, for all the rows of the page
+#  The column plan may be compiled once per sheet with get_column_plan, and passed for each page
+def transform_sheet_data(spreadsheet_id, sheet_id, sheet_title, from_row, columns, sheet_data_rows, unformatted_rows, column_plan=None):
     sheet_data_tf = []
+    # (row_num, row, unformatted_row, row_length) of the non-empty rows
+    page_rows = []
     row_num = from_row
-    # Create sorted list of columns based on columnIndex
-    cols = sorted(columns, key=lambda i: i['columnIndex'])
+    if column_plan is None:
+        column_plan = get_column_plan(sheet_title, columns)
 
     for (row, unformatted_row) in zip(sheet_data_rows, unformatted_rows):
         # If empty row, SKIP
         if row == []:
-            LOGGER.info('EMPTY ROW: {}, SKIPPING'.format(row_num))
+            DATA_WARNINGS.empty_row(sheet_title, row_num)
         else:
-            sheet_data_row_tf = {}
             # Add spreadsheet_id, sheet_id, and row
-            sheet_data_row_tf['__sdc_spreadsheet_id'] = spreadsheet_id
-            sheet_data_row_tf['__sdc_sheet_id'] = sheet_id
-            sheet_data_row_tf['__sdc_row'] = row_num
-            col_num = 1
-            for (value, unformatted_value) in zip(row, unformatted_row):
-                # Select column metadata based on column index
-                col = cols[col_num - 1]
-                col_skipped = col.get('columnSkipped')
-                if not col_skipped:
-                    # Get column metadata
-                    col_name = col.get('columnName')
-                    col_type = col.get('columnType')
-                    col_letter = col.get('columnLetter')
-
-                    # get column value based on the type of the value
-                    col_val = get_column_value(value, unformatted_value, sheet_title, col_name, col_letter, row_num, col_type, row)
-
-                    sheet_data_row_tf[col_name] = col_val
-                col_num = col_num + 1
-            # APPEND non-empty row
-            sheet_data_tf.append(sheet_data_row_tf)
+            sheet_data_tf.append({
+                '__sdc_spreadsheet_id': spreadsheet_id,
+                '__sdc_sheet_id': sheet_id,
+                '__sdc_row': row_num
+            })
+            # values of the columns present in both the formatted and unformatted rows
+            page_rows.append((row_num, row, unformatted_row, min(len(row), len(unformatted_row))))
         row_num = row_num + 1
+
+    for (position, col_name, convert_values) in column_plan:
+        records, values, unformatted_values, row_nums, rows = [], [], [], [], []
+        for sheet_data_row_tf, (row_num_, row, unformatted_row, row_length) in zip(sheet_data_tf, page_rows):
+            if position >= row_length:
+                continue
+            value = row[position]
+            # NULL values; the keys of the records are set in the order of the columns
+            sheet_data_row_tf[col_name] = None
+            if not (value is None or value == ''):
+                records.append(sheet_data_row_tf)
+                values.append(value)
+                unformatted_values.append(unformatted_row[position])
+                row_nums.append(row_num_)
+                rows.append(row)
+        if records:
+            for sheet_data_row_tf, col_val in zip(records, convert_values(values, unformatted_values, row_nums, rows)):
+                sheet_data_row_tf[col_name] = col_val
     return sheet_data_tf, row_num
@@ -0,0 +1,181 @@
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ElementTree
+import singer
+
+LOGGER = singer.get_logger()
+
+# Export mode (export_min_cells): the large sheets are synced from 1 XLSX export of the spreadsheet
+#   (Drive v3 files.export), downloaded to a temporary file instead of fetched page by page with the values API.
+# The rows of a sheet are parsed in a streaming way (iterparse) as the UNFORMATTED_VALUE rows of the values API:
+#   numbers (dates and times as serial numbers), booleans and strings, without the empty cells and rows at the end,
+#   and cut in pages of rows as the values pages.
+
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MAIN_NAMESPACE = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP_NAMESPACE = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELATIONSHIP_NAMESPACE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+CELL_REFERENCE_PATTERN = re.compile(r'^([A-Z]+)(\d+)$')
+# Integers up to 2^53 are exact in a float, as returned by the values API
+MAX_EXACT_INTEGER = 2 ** 53
+
+
+def get_column_index(column_letter):
+    column_index = 0
+    for letter in column_letter:
+        column_index = column_index * 26 + ord(letter) - 64
+    return column_index
+
+
+def parse_number(text):
+    """
+    Number of a cell, an integer when the number is integral (as decoded from the JSON of the values API)
+    """
+    try:
+        return int(text)
+    except ValueError:
+        number = float(text)
+    if number.is_integer() and abs(number) < MAX_EXACT_INTEGER:
+        return int(number)
+    return number
+
+
+def get_text(element):
+    """
+    Text of a string item or inline string: its text, or the text of its rich text runs, without the phonetic runs
+    """
+    text = element.find(MAIN_NAMESPACE + 't')
+    if text is not None:
+        return text.text or ''
+    return ''.join(run.text or '' for run in element.iterfind('{0}r/{0}t'.format(MAIN_NAMESPACE)))
+
+
+def trim_row(values):
+    while values and values[-1] == '':
+        values.pop()
+    return values
+
+
+def trim_rows(rows):
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class XlsxWorkbook:
+    """
+    Sheets of an XLSX file (path or file object, closed with the workbook), with their rows parsed in a streaming way
+    """
+    def __init__(self, file):
+        self.file = file
+        self.zip_file = zipfile.ZipFile(file)
+        # sheet name: path of the sheet's XML in the zip file
+        self.sheet_paths = self.get_sheet_paths()
+        self.shared_strings = None
+
+    def get_sheet_paths(self):
+        with self.zip_file.open('xl/_rels/workbook.xml.rels') as file:
+            targets = {
+                relationship.get('Id'): relationship.get('Target')
+                for relationship in ElementTree.parse(file).getroot().iter(PACKAGE_RELATIONSHIP_NAMESPACE + 'Relationship')}
+        sheet_paths = {}
+        with self.zip_file.open('xl/workbook.xml') as file:
+            for sheet in ElementTree.parse(file).getroot().iter(MAIN_NAMESPACE + 'sheet'):
+                target = targets.get(sheet.get(RELATIONSHIP_NAMESPACE + 'id'))
+                if target:
+                    # targets are relative to xl/, or absolute in the package
+                    sheet_paths[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+        return sheet_paths
+
+    def get_shared_strings(self):
+        """
+        Strings shared by the cells of the sheets, parsed once
+        """
+        if self.shared_strings is None:
+            self.shared_strings = []
+            if 'xl/sharedStrings.xml' in self.zip_file.namelist():
+                with self.zip_file.open('xl/sharedStrings.xml') as file:
+                    for _, element in ElementTree.iterparse(file):
+                        if element.tag == MAIN_NAMESPACE + 'si':
+                            self.shared_strings.append(get_text(element))
+                            element.clear()
+        return self.shared_strings
+
+    def get_cell_value(self, cell):
+        """
+        Unformatted value of a cell, as returned by the values API with UNFORMATTED_VALUE
+        """
+        cell_type = cell.get('t', 'n')
+        if cell_type == 'inlineStr':
+            inline_string = cell.find(MAIN_NAMESPACE + 'is')
+            return get_text(inline_string) if inline_string is not None else ''
+        value = cell.find(MAIN_NAMESPACE + 'v')
+        if value is None or value.text is None:
+            return ''
+        if cell_type == 's':
+            return self.get_shared_strings()[int(value.text)]
+        if cell_type == 'b':
+            return value.text == '1'
+        if cell_type == 'n':
+            return parse_number(value.text)
+        # str (formula string), e (error, e.g. #N/A) and d (ISO 8601 date) cells
+        return value.text
+
+    def iter_rows(self, sheet_name, max_column=None):
+        """
+        Yields the row number and the values of each row of the sheet with cells, up to max_column
+        """
+        row_number = 0
+        sheet_data = None
+        with self.zip_file.open(self.sheet_paths[sheet_name]) as file:
+            for event, element in ElementTree.iterparse(file, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == MAIN_NAMESPACE + 'sheetData':
+                        sheet_data = element
+                    continue
+                if element.tag != MAIN_NAMESPACE + 'row':
+                    continue
+                row_number = int(element.get('r') or row_number + 1)
+                values = []
+                for cell in element.iter(MAIN_NAMESPACE + 'c'):
+                    match = CELL_REFERENCE_PATTERN.match(cell.get('r') or '')
+                    column_index = get_column_index(match.group(1)) if match else len(values) + 1
+                    if max_column and column_index > max_column:
+                        break
+                    values.extend([''] * (column_index - len(values) - 1))
+                    values.append(self.get_cell_value(cell))
+                # remove the parsed rows from the tree
+                sheet_data.clear()
+                yield row_number, trim_row(values)
+
+    def close(self):
+        self.zip_file.close()
+        if hasattr(self.file, 'close'):
+            self.file.close()
+
+
+def get_pages(rows, page_rows, start_row=2):
+    """
+    Yields from_row and the rows of each page of page_rows rows from start_row, as the pages of the values API:
+        the empty rows as [], without the empty rows at the end of the page,
+        until a whole blank page (yielded too) after the last row
+    """
+    from_row = start_row
+    page = []
+    for row_number, values in rows:
+        if row_number < start_row:
+            continue
+        while row_number >= from_row + page_rows:
+            page = trim_rows(page)
+            yield from_row, page
+            if not page:
+                return
+            from_row += page_rows
+            page = []
+        page.extend([[]] * (row_number - from_row - len(page)))
+        page.append(values)
+    page = trim_rows(page)
+    yield from_row, page
+    if page:
+        yield from_row + page_rows, []
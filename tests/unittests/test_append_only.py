@@ -0,0 +1,194 @@
+import re
+import unittest
+from unittest import mock
+from singer import metadata
+from singer.catalog import Catalog
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'a': {'type': ['null', 'string']}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'a', 'columnType': 'stringValue', 'columnSkipped': False}]
+
+def get_sheets(row_count=1000):
+    return [{"properties": {"sheetId": 0, "title": "Sheet1", "gridProperties": {"rowCount": row_count, "columnCount": 1}}}]
+
+def get_catalog(replication_method):
+    mdata = metadata.to_map(metadata.get_standard_metadata(
+        schema=sheet_schema, key_properties=['__sdc_row'], replication_method='FULL_TABLE'))
+    mdata = metadata.write(mdata, (), 'selected', True)
+    if replication_method:
+        mdata = metadata.write(mdata, (), 'replication-method', replication_method)
+    return Catalog.from_dict({'streams': [{'tap_stream_id': 'Sheet1', 'stream': 'Sheet1', 'schema': sheet_schema,
+                                           'metadata': metadata.to_list(mdata)}]})
+
+class FakeSheet:
+    """
+    Values of the rows 2 to last_row of the sheet, but the blank_rows, in a grid of row_count rows
+    The empty rows at the end of a page are not returned, as with the API
+    """
+    def __init__(self, last_row, row_count=1000, blank_rows=()):
+        self.last_row = last_row
+        self.row_count = row_count
+        self.blank_rows = set(blank_rows)
+        self.ranges = []
+
+    def get(self, path, params, api, endpoint):
+        from_row, to_row = map(int, re.search(r"!A(\d+):A(\d+)", path).groups())
+        self.ranges.append((from_row, to_row))
+        values = [[] if row in self.blank_rows else ['row {}'.format(row)]
+                  for row in range(from_row, min(to_row, self.last_row) + 1)]
+        while values and not values[-1]:
+            values.pop()
+        return {'values': values}
+
+@mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value = [sheet_schema, columns])
+@mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+@mock.patch('tap_google_sheets.streams.write_schema')
+@mock.patch('tap_google_sheets.streams.singer.write_state')
+@mock.patch('tap_google_sheets.streams.singer.write_message')
+@mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+class TestAppendOnly(unittest.TestCase):
+
+    def sync(self, catalog, state, fake_sheet, *mocks):
+        mock_process_records, mock_write_message = mocks[:2]
+        mock_process_records.reset_mock()
+        mock_write_message.reset_mock()
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        with mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=fake_sheet.get):
+            sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {"fetch_mode": "local_format"})
+            _, sheets_loaded = sheets_load_data.load_data(catalog, state, ["Sheet1"], get_sheets(fake_sheet.row_count), "time")
+        records = [record for call in mock_process_records.call_args_list for record in call[1]['records']]
+        versions = set(call[1]['version'] for call in mock_process_records.call_args_list)
+        return records, versions, mock_write_message.call_count, sheets_loaded
+
+    def test_append_only_sheet(self, *mocks):
+        """
+        Verify that an append-only sheet is synced from the row after the last row synced,
+        with the table version of the previous sync and without activate version messages
+        """
+        catalog = get_catalog('INCREMENTAL')
+        state = {}
+        fake_sheet = FakeSheet(250)
+        records, versions, activate_versions, _ = self.sync(catalog, state, fake_sheet, *mocks)
+        self.assertEqual([record['__sdc_row'] for record in records], list(range(2, 251)))
+        self.assertEqual(activate_versions, 2)
+        self.assertEqual(state['last_row_numbers'], {'Sheet1': 250})
+        version = state['bookmarks']['Sheet1']
+        self.assertEqual(versions, {version})
+
+        # 10 rows appended
+        fake_sheet = FakeSheet(260)
+        records, versions, activate_versions, sheets_loaded = self.sync(catalog, state, fake_sheet, *mocks)
+        self.assertEqual([record['a'] for record in records], ['row {}'.format(row) for row in range(251, 261)])
+        self.assertEqual(fake_sheet.ranges[0][0], 251)
+        self.assertEqual(activate_versions, 0)
+        self.assertEqual(versions, {version})
+        self.assertEqual(state['bookmarks']['Sheet1'], version)
+        self.assertEqual(state['last_row_numbers'], {'Sheet1': 260})
+
+        # no new rows: 1 blank page
+        fake_sheet = FakeSheet(260)
+        records, _, _, _ = self.sync(catalog, state, fake_sheet, *mocks)
+        self.assertEqual(records, [])
+        self.assertEqual(len(fake_sheet.ranges), 1)
+        self.assertEqual(state['last_row_numbers'], {'Sheet1': 260})
+
+    def test_row_appended_at_grid_edge(self, *mocks):
+        """
+        Verify that a row appended to a full grid, the last row of the grown grid, is synced
+        """
+        catalog = get_catalog('INCREMENTAL')
+        state = {}
+        self.sync(catalog, state, FakeSheet(1000), *mocks)
+        self.assertEqual(state['last_row_numbers'], {'Sheet1': 1000})
+
+        fake_sheet = FakeSheet(1001, row_count=1001)
+        records, _, _, _ = self.sync(catalog, state, fake_sheet, *mocks)
+        self.assertEqual([record['__sdc_row'] for record in records], [1001])
+        self.assertEqual(fake_sheet.ranges, [(1001, 1001)])
+        self.assertEqual(state['last_row_numbers'], {'Sheet1': 1001})
+
+    def test_full_table_sheet(self, *mocks):
+        """
+        Verify that the sheets without the INCREMENTAL replication method are synced from row 2, under a new table version
+        """
+        state = {'bookmarks': {'Sheet1': 1}, 'last_row_numbers': {'Sheet1': 250}}
+        fake_sheet = FakeSheet(260)
+        records, versions, activate_versions, _ = self.sync(get_catalog(None), state, fake_sheet, *mocks)
+        self.assertEqual(len(records), 259)
+        self.assertEqual(fake_sheet.ranges[0], (2, 200))
+        self.assertEqual(activate_versions, 1)
+        self.assertNotEqual(versions, {1})
+
+    def test_resume_from_checkpoint(self, *mocks):
+        """
+        Verify that a checkpoint is written after each page, and an interrupted sheet is resumed from the next page,
+        with the table version of the interrupted sync
+        """
+        state = {}
+        fake_sheet = FakeSheet(1000)
+        get = fake_sheet.get
+        def interrupted_get(path, params, api, endpoint):
+            if len(fake_sheet.ranges) == 2:
+                raise Exception('Interrupted')
+            return get(path, params, api, endpoint)
+        fake_sheet.get = interrupted_get
+        with self.assertRaises(Exception):
+            self.sync(get_catalog(None), state, fake_sheet, *mocks)
+        version = state['sheet_checkpoints']['Sheet1']['version']
+        self.assertEqual(state['sheet_checkpoints'], {'Sheet1': {'from_row': 401, 'version': version}})
+
+        fake_sheet = FakeSheet(1000)
+        records, versions, activate_versions, sheets_loaded = self.sync(get_catalog(None), state, fake_sheet, *mocks)
+        self.assertEqual(fake_sheet.ranges[:2], [(401, 600), (601, 800)])
+        self.assertEqual([record['__sdc_row'] for record in records], list(range(401, 1001)))
+        # only the final activate version message
+        self.assertEqual(activate_versions, 1)
+        self.assertEqual(versions, {version})
+        self.assertEqual(state['bookmarks']['Sheet1'], version)
+        self.assertEqual(state['sheet_checkpoints'], {})
+
+    def test_resume_after_blank_rows(self, *mocks):
+        """
+        Verify that the checkpoint of a page ending in blank rows is the row after the requested page,
+        so that the resumed sync fetches the same pages as an uninterrupted sync
+        """
+        state = {}
+        blank_rows = range(351, 451)
+        fake_sheet = FakeSheet(1000, blank_rows=blank_rows)
+        get = fake_sheet.get
+        def interrupted_get(path, params, api, endpoint):
+            if len(fake_sheet.ranges) == 2:
+                raise Exception('Interrupted')
+            return get(path, params, api, endpoint)
+        fake_sheet.get = interrupted_get
+        with self.assertRaises(Exception):
+            self.sync(get_catalog(None), state, fake_sheet, *mocks)
+        version = state['sheet_checkpoints']['Sheet1']['version']
+        self.assertEqual(state['sheet_checkpoints'], {'Sheet1': {'from_row': 401, 'version': version}})
+
+        fake_sheet = FakeSheet(1000, blank_rows=blank_rows)
+        records, _, _, _ = self.sync(get_catalog(None), state, fake_sheet, *mocks)
+        self.assertEqual(fake_sheet.ranges[:2], [(401, 600), (601, 800)])
+
+        fake_sheet = FakeSheet(1000, blank_rows=blank_rows)
+        full_records, _, _, _ = self.sync(get_catalog(None), {}, fake_sheet, *mocks)
+        self.assertEqual(records, [record for record in full_records if record['__sdc_row'] >= 401])
+
+    def test_prune_checkpoints(self, *mocks):
+        """
+        Verify that the checkpoints of the sheets not selected or not found in the spreadsheet are removed,
+        and a sheet selected again is synced in full under a new table version
+        """
+        state = {'sheet_checkpoints': {'Sheet1': {'from_row': 401, 'version': 1}, 'Deleted': {'from_row': 201, 'version': 2}}}
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {"fetch_mode": "local_format"})
+        sheets_load_data.load_data(get_catalog(None), state, [], get_sheets(), "time")
+        self.assertEqual(state['sheet_checkpoints'], {})
+
+        fake_sheet = FakeSheet(1000)
+        records, versions, activate_versions, _ = self.sync(get_catalog(None), state, fake_sheet, *mocks)
+        self.assertEqual(fake_sheet.ranges[0], (2, 200))
+        self.assertEqual(len(records), 999)
+        self.assertEqual(activate_versions, 2)
+        self.assertNotEqual(versions, {1})
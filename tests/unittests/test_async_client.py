@@ -0,0 +1,160 @@
+import os
+import re
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from tap_google_sheets import async_client
+from tap_google_sheets.async_client import AsyncGoogleClient
+from tap_google_sheets.client import GoogleNotFoundError, GoogleClient
+from tap_google_sheets.streams import SheetsLoadData
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+config = {
+    "client_id": "dummy_client_id",
+    "client_secret": "dummy_client_secret",
+    "refresh_token": "dummy_refresh_token",
+    "user_agent": "dummy_ua",
+    "spreadsheet_id": "id",
+    "start_date": "2019-01-01T00:00:00Z"
+}
+
+def get_sheet(index, row_count):
+    return {"properties": {"sheetId": index, "title": "Sheet{}".format(index), "index": index,
+                           "gridProperties": {"rowCount": row_count, "columnCount": 1}}}
+
+class FakeSheetsServer:
+    """
+    Sheets API and token endpoint served by aiohttp in a background thread
+    Each sheet has 1 `name` column, with values in rows 2 to 500
+    """
+    def __init__(self):
+        self.requests = []
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        self.port = None
+
+    async def token(self, request):
+        return web.json_response({"access_token": "dummy_token", "expires_in": 3600})
+
+    async def sheet_metadata(self, request):
+        self.requests.append(str(request.rel_url))
+        if request.headers.get('Authorization') != 'Bearer dummy_token':
+            return web.json_response({"error": {"code": 401, "message": "unauthorized"}}, status=401)
+        if 'ranges' not in request.query:
+            return web.json_response({"error": "NOT_FOUND", "message": "Requested entity was not found."}, status=404)
+        titles = [re.match(r"'(.*)'!", sheet_range).group(1) for sheet_range in request.query.getall('ranges')]
+        return web.json_response({"sheets": [{
+            "properties": {"title": title},
+            "data": [{"rowData": [
+                {"values": [{"formattedValue": "name"}]},
+                {"values": [{"formattedValue": "a", "effectiveValue": {"stringValue": "a"}}]}]}]} for title in titles]})
+
+    async def values(self, request):
+        self.requests.append(str(request.rel_url))
+        title, from_row, to_row = re.match(r"'(.*)'!A(\d+):A(\d+)", request.match_info['range']).groups()
+        await asyncio.sleep(0.01 * (int(to_row) % 3))
+        rows = [['{}-{}'.format(title, row)] for row in range(int(from_row), min(int(to_row), 500) + 1)]
+        return web.json_response({"values": rows})
+
+    def start(self):
+        app = web.Application()
+        app.router.add_post('/token', self.token)
+        app.router.add_get('/v4/spreadsheets/{spreadsheet_id}', self.sheet_metadata)
+        app.router.add_get('/v4/spreadsheets/{spreadsheet_id}/values/{range}', self.values)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        return 'http://127.0.0.1:{}'.format(self.port)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@unittest.skipUnless(async_client.aiohttp, 'aiohttp is not installed')
+class TestAsyncClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSheetsServer()
+        base_url = self.server.start()
+        self.patches = [
+            mock.patch('tap_google_sheets.client.GOOGLE_TOKEN_URI', base_url + '/token'),
+            mock.patch('tap_google_sheets.client.SHEETS_BASE_URL', base_url + '/v4')]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.server.stop()
+
+    def test_request_and_error_mapping(self):
+        """
+        Verify that the async client gets an access token, and maps the error codes to the same exceptions as the GoogleClient
+        """
+        async def run():
+            async with AsyncGoogleClient.from_config(config) as client:
+                data = await client.get(path="spreadsheets/id", api="sheets", params="ranges='Sheet1'!1:2", endpoint="Sheet1")
+                self.assertEqual(data['sheets'][0]['properties']['title'], 'Sheet1')
+                with self.assertRaises(GoogleNotFoundError) as e:
+                    await client.get(path="spreadsheets/id", api="sheets", endpoint="Sheet1")
+                self.assertEqual(str(e.exception), 'HTTP-error-code: 404 NOT_FOUND: Requested entity was not found.')
+        asyncio.run(run())
+
+    def test_shared_rate_limiter_off_loop(self):
+        """
+        Verify that the rate limiter shared through SQLite is called in a worker thread, not on the event loop
+        """
+        threads = []
+        async def run():
+            async with AsyncGoogleClient.from_config(dict(config, rate_limit_db=os.path.join(directory, 'rate_limit.db'))) as client:
+                reserve = client.rate_limiter.reserve
+                def recorded_reserve():
+                    threads.append(threading.current_thread())
+                    return reserve()
+                client.rate_limiter.reserve = recorded_reserve
+                await client.get(path="spreadsheets/id", api="sheets", params="ranges='Sheet1'!1:2", endpoint="Sheet1")
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run())
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.singer.write_message')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_load_data_async(self, mock_process_records, mock_write_message, mock_write_schema, mocked_get_selected_fields):
+        """
+        Verify that with async_requests the pages of the sheets are fetched concurrently, and written in order
+        """
+        written = []
+        mock_process_records.side_effect = lambda catalog, stream_name, records, time_extracted, version: written.extend(
+            (stream_name, record['__sdc_row'], record['name']) for record in records)
+        async_config = dict(config, async_requests="true", max_in_flight=5)
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", async_config)
+        sheets = [get_sheet(index, 1000) for index in range(3)]
+        sheet_metadata, sheets_loaded = sheets_load_data.load_data({}, {}, ["Sheet0", "Sheet2"], sheets, "time")
+
+        self.assertEqual(written, [("Sheet{}".format(i), row, "Sheet{}-{}".format(i, row)) for i in (0, 2) for row in range(2, 501)])
+        self.assertEqual(len(sheet_metadata), 3)
+        self.assertEqual([sheet['title'] for sheet in sheets_loaded], ["Sheet0", "Sheet2"])
+        # the row number after the blank page 601 to 800, the same as the sync load_data
+        self.assertEqual([sheet['lastRowNumber'] for sheet in sheets_loaded], [601, 601])
+        # 1 batched sheet metadata request, and 2 requests for each page of the synced sheets (until the blank page 601 to 800)
+        values_requests = [request for request in self.server.requests if '/values/' in request]
+        self.assertEqual(len(self.server.requests) - len(values_requests), 1)
+        self.assertTrue(all('valueRenderOption' in request for request in values_requests))
+        for sheet_title in ("Sheet0", "Sheet2"):
+            ranges = sorted(set(re.search(r"!(A\d+:A\d+)", request).group(1) for request in values_requests if sheet_title in request))
+            self.assertIn('A2:A200', ranges)
+            self.assertIn('A601:A800', ranges)
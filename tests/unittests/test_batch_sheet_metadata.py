@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+from tap_google_sheets import schema
+from tap_google_sheets.client import GoogleClient
+
+def get_sheet(title):
+    return {"properties": {"sheetId": 0, "title": title, "gridProperties": {"rowCount": 100, "columnCount": 2}}}
+
+def get_sheet_metadata(title):
+    return {"properties": {"sheetId": 0, "title": title}, "data": [{"rowData": [
+        {"values": [{"formattedValue": "name"}]},
+        {"values": [{"formattedValue": "a", "effectiveValue": {"stringValue": "a"}}]}]}]}
+
+class TestBatchSheetMetadata(unittest.TestCase):
+
+    def test_batches(self):
+        """
+        Verify that the sheets are split in batches by the max sheets and the max querystring length
+        """
+        sheets = [get_sheet("Sheet{}".format(index)) for index in range(120)]
+        self.assertEqual([len(batch) for batch in schema.get_sheets_metadata_batches(sheets)], [50, 50, 20])
+        with mock.patch('tap_google_sheets.schema.MAX_BATCH_QUERYSTRING_LENGTH', 100):
+            # 20 characters per range
+            self.assertEqual([len(batch) for batch in schema.get_sheets_metadata_batches(sheets[:12])], [5, 5, 2])
+
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', return_value={"sheets": [get_sheet_metadata("Sheet 1"), get_sheet_metadata("Sheet0")]})
+    def test_batched_request(self, mocked_get):
+        """
+        Verify that 1 API call gets the rows 1 & 2 of all the sheets, with a fields mask,
+        and the results are returned in the order of the sheets
+        """
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_schema_columns = schema.get_sheets_metadata(
+            [get_sheet("Sheet0"), get_sheet("Sheet 1"), get_sheet("Deleted")], "id", client)
+        self.assertEqual(mocked_get.call_count, 1)
+        self.assertEqual(mocked_get.call_args[1]['path'],
+                         "spreadsheets/id?includeGridData=true&ranges='Sheet0'!1:2&ranges='Sheet+1'!1:2&ranges='Deleted'!1:2"
+                         "&fields=sheets(properties(sheetId,title),data(rowData(values(formattedValue,effectiveValue,effectiveFormat/numberFormat))))")
+        self.assertEqual([columns[0]['columnName'] if columns else None for _, columns in sheets_schema_columns], ['name', 'name', None])
+
+    @mock.patch('tap_google_sheets.schema.get_sheet_metadata', return_value=(None, None))
+    def test_single_sheet(self, mocked_sheet_metadata):
+        """
+        Verify that a batch of 1 sheet uses the sheet_metadata query of the sheet
+        """
+        self.assertEqual(schema.get_sheets_metadata([get_sheet("Sheet0")], "id", None), [(None, None)])
+        self.assertEqual(mocked_sheet_metadata.call_count, 1)
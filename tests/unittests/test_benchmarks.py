@@ -0,0 +1,37 @@
+import unittest
+from benchmarks.generator import SyntheticSpreadsheet
+from benchmarks.fake_api import parse_range
+from benchmarks.run import run_benchmarks, compare_to_baseline
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_parse_range(self):
+        """
+        Verify that the ranges of the API calls are parsed to the sheet title, rows and columns
+        """
+        self.assertEqual(parse_range("'Sheet 1'!A2:J200"), ('Sheet 1', 2, 200, 1, 10))
+        self.assertEqual(parse_range("'It''s'!1:2"), ("It's", 1, 2, 1, None))
+        self.assertEqual(parse_range("Sheet1!AA1:AB"), ('Sheet1', 1, 10 ** 9, 27, 28))
+
+    def test_run_benchmarks(self):
+        """
+        Verify that the benchmarks sync a small synthetic spreadsheet through the fake API
+        """
+        spreadsheet = SyntheticSpreadsheet(sheets=2, rows=250, columns=8)
+        results = run_benchmarks(spreadsheet, {})
+        self.assertEqual(results['transform_sheet_data']['rows'], 500)
+        self.assertEqual(results['process_records']['rows'], 250)
+        # token, spreadsheet metadata and 1 batched sheet_metadata request
+        self.assertEqual(results['discovery']['requests_by_endpoint'], {'token': 1, 'spreadsheets': 2})
+        # 2 values requests for each of the 2 pages of each sheet: rows 2 to 200, and 201 to the last row of the grid (351)
+        self.assertEqual(results['sync']['requests_by_endpoint']['values'], 8)
+        self.assertEqual(results['sync']['rows'], 500)
+
+    def test_compare_to_baseline(self):
+        """
+        Verify that the slower rows per second and the additional requests are regressions
+        """
+        baseline = {'sync': {'rows_per_sec': 1000, 'requests': 10}, 'process_records': {'rows_per_sec': 1000}}
+        self.assertEqual(compare_to_baseline({'sync': {'rows_per_sec': 900, 'requests': 10}}, baseline), [])
+        self.assertEqual(compare_to_baseline({'sync': {'rows_per_sec': 700, 'requests': 11}, 'process_records': {'rows_per_sec': 2000}}, baseline),
+                         ['sync: 700 rows/sec, baseline: 1000', 'sync: 11 requests, baseline: 10'])
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+from singer import metadata
+from singer.catalog import Catalog, CatalogEntry, Schema
+from tap_google_sheets import schema
+from tap_google_sheets.streams import SheetsLoadData, SpreadSheetMetadata
+from tap_google_sheets.client import GoogleClient
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'a': {'type': ['null', 'string']}, 'b': {'type': ['null', 'string']}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'a', 'columnType': 'stringValue', 'columnSkipped': False},
+           {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'b', 'columnType': 'stringValue', 'columnSkipped': False}]
+
+def get_sheet(index):
+    return {"properties": {"sheetId": index, "title": "Sheet{}".format(index), "gridProperties": {"rowCount": 100, "columnCount": 2}}}
+
+def get_catalog(sheet_titles):
+    entries = []
+    for sheet_title in sheet_titles:
+        mdata = metadata.get_standard_metadata(schema=sheet_schema, key_properties=['__sdc_row'], replication_method='FULL_TABLE')
+        mdata = metadata.to_list(metadata.write(metadata.to_map(mdata), (), 'sheet-columns', columns))
+        entries.append(CatalogEntry(stream=sheet_title, tap_stream_id=sheet_title, schema=Schema.from_dict(sheet_schema), metadata=mdata))
+    return Catalog(entries)
+
+class TestCatalogColumns(unittest.TestCase):
+
+    def test_columns_drift(self):
+        """
+        Verify that the header row is compared with the columns, and the new headers after the last column are detected
+        """
+        self.assertIsNone(schema.get_columns_drift(columns, ['a', 'b']))
+        self.assertEqual(schema.get_columns_drift(columns, ['a', 'c']), 'CELL: B1, HEADER: c, COLUMN: b')
+        self.assertEqual(schema.get_columns_drift(columns, ['a']), 'CELL: B1, HEADER: , COLUMN: b')
+        self.assertEqual(schema.get_columns_drift(columns, ['a', 'b', '', 'd']), 'CELL: D1, NEW HEADER: d')
+        # the scan stopped at 2 consecutive skipped headers, C1 and D1
+        skipped_columns = columns + [{'columnIndex': 3, 'columnLetter': 'C', 'columnName': '__sdc_skip_col_03', 'columnType': 'stringValue', 'columnSkipped': True, 'prior_column_skipped': True}]
+        self.assertIsNone(schema.get_columns_drift(skipped_columns, ['a', 'b', '', '', 'e']))
+        self.assertEqual(schema.get_columns_drift(skipped_columns, ['a', 'b', '', 'd']), 'CELL: D1, NEW HEADER: d')
+
+    @mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value=[sheet_schema, columns])
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', return_value={'sheets': [get_sheet(0)]})
+    def test_discovery_stores_columns(self, mocked_get, mocked_sheet_metadata):
+        """
+        Verify that the discovery stores the columns of the sheet in the catalog metadata
+        """
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        _, field_metadata = SpreadSheetMetadata(client, "id").get_schemas()
+        self.assertEqual(metadata.to_map(field_metadata['Sheet0'])[()]['sheet-columns'], columns)
+
+    @mock.patch('tap_google_sheets.streams.schema.get_sheets_metadata_batch', side_effect=lambda sheets, spreadsheet_id, client: [(sheet_schema, columns) for _ in sheets])
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_sync_uses_catalog_columns(self, mock_process_records, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata):
+        """
+        Verify that the sync checks the header rows of the selected sheets with 1 API call, and gets the sheet_metadata
+        only for the sheets whose header row changed, or without columns in the catalog
+        """
+        def get(path, api, params, endpoint):
+            if path.endswith('values:batchGet'):
+                return {'valueRanges': [{'values': [['a', 'b']]}, {'values': [['a', 'c']]}]}
+            return {'values': [['1', '2']]}
+        config = {"spreadsheet_id": "id", "start_date": "2019-01-01T00:00:00Z"}
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        # Sheet2 is not selected, Sheet3 was added after the discovery
+        catalog = get_catalog(["Sheet0", "Sheet1", "Sheet2"])
+        with mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=get) as mocked_get:
+            sheet_metadata, sheets_loaded = sheets_load_data.load_data(
+                catalog, {}, ["Sheet0", "Sheet1"], [get_sheet(index) for index in range(4)], "time")
+
+        header_calls = [call for call in mocked_get.mock_calls if call[2]['path'].endswith('values:batchGet')]
+        self.assertEqual(len(header_calls), 1)
+        self.assertEqual(header_calls[0][2]['params'],
+                         "ranges='Sheet0'!1:1&ranges='Sheet1'!1:1&valueRenderOption=FORMATTED_VALUE&majorDimension=ROWS")
+        # 1 batch of sheet_metadata
+        self.assertEqual([[sheet['properties']['title'] for sheet in call[1][0]] for call in mocked_sheet_metadata.mock_calls], [["Sheet1", "Sheet3"]])
+        self.assertEqual(len(sheet_metadata), 4)
+        self.assertEqual([sheet['title'] for sheet in sheets_loaded], ["Sheet0", "Sheet1"])
@@ -0,0 +1,169 @@
+import os
+import copy
+import re
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from singer import metadata
+from singer.catalog import Catalog
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'id': {'type': ['null', 'string']}, 'name': {'type': ['null', 'string']}}}
+columns = [
+    {'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'id', 'columnType': 'stringValue', 'columnSkipped': False},
+    {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'name', 'columnType': 'stringValue', 'columnSkipped': False}]
+sheets = [{"properties": {"sheetId": 0, "title": "Sheet1", "gridProperties": {"rowCount": 1000, "columnCount": 2}}}]
+
+def get_catalog():
+    mdata = metadata.to_map(metadata.get_standard_metadata(
+        schema=sheet_schema, key_properties=['__sdc_row'], replication_method='FULL_TABLE'))
+    mdata = metadata.write(mdata, (), 'selected', True)
+    return Catalog.from_dict({'streams': [{'tap_stream_id': 'Sheet1', 'stream': 'Sheet1', 'schema': sheet_schema,
+                                           'metadata': metadata.to_list(mdata)}]})
+
+class FakeSheet:
+    """
+    Rows [id, name] of the sheet, from row 2
+    """
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get(self, path, params, api, endpoint):
+        from_row, to_row = map(int, re.search(r"!A(\d+):B(\d+)", path).groups())
+        return {'values': self.rows[from_row - 2:to_row - 1]}
+
+@mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value = [sheet_schema, columns])
+@mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+@mock.patch('tap_google_sheets.streams.write_schema')
+@mock.patch('tap_google_sheets.streams.singer.write_state')
+@mock.patch('tap_google_sheets.streams.singer.write_message')
+@mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+class TestChangeData(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = {"fetch_mode": "local_format", "change_data_db": os.path.join(self.directory, "rows.db")}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def sync(self, config, state, rows, *mocks):
+        mock_process_records, mock_write_message = mocks[:2]
+        mock_process_records.reset_mock()
+        mock_write_message.reset_mock()
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        with mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=FakeSheet(rows).get):
+            sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", config)
+            sheets_load_data.load_data(get_catalog(), state, ["Sheet1"], sheets, "time")
+        records = [record for call in mock_process_records.call_args_list for record in call[1]['records']]
+        versions = set(call[1]['version'] for call in mock_process_records.call_args_list)
+        return records, versions, mock_write_message.call_count
+
+    def test_row_number_key(self, *mocks):
+        """
+        Verify that after the 1st full sync only the inserted and updated rows are written, keyed by row number,
+        with the table version of the 1st sync, without activate version messages, and with the deleted rows' tombstones
+        """
+        config = dict(self.config, change_data_deletes="true")
+        state = {}
+        rows = [[str(row), 'name {}'.format(row)] for row in range(2, 301)]
+        records, versions, activate_versions = self.sync(config, state, rows, *mocks)
+        self.assertEqual(len(records), 299)
+        self.assertEqual(activate_versions, 2)
+        version = state['bookmarks']['Sheet1']
+        self.assertEqual(versions, {version})
+
+        # row 5 updated, the last row deleted, no changes in the other rows
+        rows = rows[:-1]
+        rows[3] = ['5', 'changed']
+        records, versions, activate_versions = self.sync(config, state, rows, *mocks)
+        self.assertEqual([(record['__sdc_row'], record.get('name')) for record in records], [(5, 'changed'), (300, None)])
+        self.assertIsNotNone(records[1]['__sdc_deleted_at'])
+        self.assertEqual(activate_versions, 0)
+        self.assertEqual(versions, {version})
+        self.assertEqual(state['bookmarks']['Sheet1'], version)
+
+        # no changes
+        records, _, _ = self.sync(config, state, rows, *mocks)
+        self.assertEqual(records, [])
+
+    def test_key_column(self, *mocks):
+        """
+        Verify that with a key column, the rows moved by an insert above them are unchanged,
+        and the deleted rows are removed from the index without tombstones by default
+        """
+        config = dict(self.config, change_data_key_column="id")
+        state = {}
+        rows = [['id{}'.format(row), 'name {}'.format(row)] for row in range(2, 301)]
+        records, _, _ = self.sync(config, state, rows, *mocks)
+        self.assertEqual(len(records), 299)
+
+        # a row inserted at the top, a row deleted
+        rows = [['new', 'new name']] + rows[:10] + rows[11:]
+        records, _, _ = self.sync(config, state, rows, *mocks)
+        self.assertEqual([(record['__sdc_row'], record['id']) for record in records], [(2, 'new')])
+
+        # the deleted row added back is an insert
+        rows.append(['id12', 'name 12'])
+        records, _, _ = self.sync(config, state, rows, *mocks)
+        self.assertEqual([record['id'] for record in records], ['id12'])
+
+    def test_state_reset(self, *mocks):
+        """
+        Verify that after a reset of the state, the sheet still in the index is synced in full under a new table version,
+        with its activate version messages, then only its changed rows are written again
+        """
+        config = dict(self.config, change_data_deletes="true")
+        rows = [[str(row), 'name {}'.format(row)] for row in range(2, 301)]
+        self.sync(config, {}, rows, *mocks)
+
+        state = {}
+        records, versions, activate_versions = self.sync(config, state, rows, *mocks)
+        self.assertEqual(len(records), 299)
+        self.assertNotIn('__sdc_deleted_at', records[-1])
+        self.assertEqual(activate_versions, 2)
+        self.assertEqual(versions, {state['bookmarks']['Sheet1']})
+
+        rows[0] = ['2', 'changed']
+        records, _, activate_versions = self.sync(config, state, rows, *mocks)
+        self.assertEqual([(record['__sdc_row'], record['name']) for record in records], [(2, 'changed')])
+        self.assertEqual(activate_versions, 0)
+
+    def test_resume_full_sync(self, *mocks):
+        """
+        Verify that a full sync interrupted after a reset of the state is resumed as a full sync:
+        the remaining rows are written under the table version of the checkpoint, activated at the end
+        """
+        rows = [[str(row), 'name {}'.format(row)] for row in range(2, 301)]
+        state = {}
+        self.sync(self.config, state, rows, *mocks)
+        state['sheet_checkpoints'] = {'Sheet1': {'from_row': 202, 'version': 1}}
+        records, versions, activate_versions = self.sync(self.config, state, rows, *mocks)
+        self.assertEqual(len(records), 99)
+        self.assertEqual(versions, {1})
+        self.assertEqual(activate_versions, 1)
+        self.assertEqual(state['bookmarks']['Sheet1'], 1)
+
+    def test_interrupted_page(self, *mocks):
+        """
+        Verify that the hashes of a page are stored only once its records are checkpointed:
+        the rows of the page interrupted before its checkpoint are written by the next sync, and the index is closed
+        """
+        rows = [[str(row), 'name {}'.format(row)] for row in range(2, 301)]
+        state = {}
+        self.sync(self.config, state, rows, *mocks)
+        rows = [[row[0], 'changed'] for row in rows]
+        def write_state(state):
+            if state.get('sheet_checkpoints'):
+                raise Exception('INTERRUPTED')
+        mocks[2].side_effect = write_state
+        with mock.patch('tap_google_sheets.change_data.RowHashIndex.close') as mock_close:
+            with self.assertRaises(Exception):
+                # the state of the interrupted sync is not emitted
+                self.sync(self.config, copy.deepcopy(state), rows, *mocks)
+            mock_close.assert_called_once()
+        mocks[2].side_effect = None
+        records, _, _ = self.sync(self.config, state, rows, *mocks)
+        self.assertEqual(len(records), 299)
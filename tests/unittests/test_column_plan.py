@@ -0,0 +1,104 @@
+import unittest
+from unittest import mock
+from tap_google_sheets import transform
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+
+columns = [
+    {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'amount', 'columnType': 'numberType', 'columnSkipped': False},
+    {'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'name', 'columnType': 'stringValue', 'columnSkipped': False},
+    {'columnIndex': 3, 'columnLetter': 'C', 'columnName': '__sdc_skip_col_03', 'columnType': 'stringValue', 'columnSkipped': True},
+    {'columnIndex': 4, 'columnLetter': 'D', 'columnName': 'date', 'columnType': 'numberType.DATE', 'columnSkipped': False},
+    {'columnIndex': 5, 'columnLetter': 'E', 'columnName': 'active', 'columnType': 'boolValue', 'columnSkipped': False}]
+
+class TestColumnPlan(unittest.TestCase):
+
+    def test_column_plan(self):
+        """
+        Verify that the plan is sorted by columnIndex, without the skipped columns
+        """
+        column_plan = transform.get_column_plan('Sheet1', columns)
+        self.assertEqual([(position, col_name) for position, col_name, _ in column_plan],
+                         [(0, 'name'), (1, 'amount'), (3, 'date'), (4, 'active')])
+
+    def test_transform_sheet_data_with_column_plan(self):
+        """
+        Verify that the rows are transformed with the plan the same as with the columns
+        """
+        rows = [['a', '1.5', 'skipped', '1/1/2021', 'TRUE'], [], ['b', '', 'skipped'], ['c', '2']]
+        unformatted_rows = [['a', 1.5, 'skipped', 44197, True], [], ['b', '', 'skipped'], ['c']]
+        column_plan = transform.get_column_plan('Sheet1', columns)
+        records, row_num = transform.transform_sheet_data('id', 0, 'Sheet1', 2, columns, rows, unformatted_rows, column_plan)
+        self.assertEqual(row_num, 6)
+        self.assertEqual(records, [
+            {'__sdc_spreadsheet_id': 'id', '__sdc_sheet_id': 0, '__sdc_row': 2, 'name': 'a', 'amount': 1.5, 'date': '2021-01-01', 'active': True},
+            {'__sdc_spreadsheet_id': 'id', '__sdc_sheet_id': 0, '__sdc_row': 4, 'name': 'b', 'amount': None},
+            # the values after the end of the unformatted row are not transformed
+            {'__sdc_spreadsheet_id': 'id', '__sdc_sheet_id': 0, '__sdc_row': 5, 'name': 'c'}])
+        self.assertEqual(transform.transform_sheet_data('id', 0, 'Sheet1', 2, columns, rows, unformatted_rows), (records, row_num))
+
+    @mock.patch('tap_google_sheets.transform.get_column_plan', wraps=transform.get_column_plan)
+    def test_column_plan_compiled_once_per_sheet(self, mocked_get_column_plan):
+        """
+        Verify that the plan of a sheet is compiled once, and compiled again when the columns change
+        """
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {})
+        column_plan = sheets_load_data.get_column_plan('Sheet1', columns)
+        self.assertIs(sheets_load_data.get_column_plan('Sheet1', columns), column_plan)
+        self.assertEqual(mocked_get_column_plan.call_count, 1)
+        sheets_load_data.get_column_plan('Sheet1', columns[:2])
+        self.assertEqual(mocked_get_column_plan.call_count, 2)
+
+class TestColumnarConversion(unittest.TestCase):
+
+    serial_numbers = [44197, 44197.5, 44197.999999, 0, -1, 1.5, True, 25569, -693593, -693594, 2958465.99999, 2958466, 10 ** 12, 10 ** 30]
+
+    def assert_same_as_per_cell(self):
+        for col_type, per_cell in (('numberType.DATE_TIME', transform.transform_sheet_datetime_data),
+                                   ('numberType.DATE', transform.transform_sheet_date_data),
+                                   ('numberType', lambda value, unformatted_value, *args: transform.transform_sheet_number_data(unformatted_value, *args))):
+            unformatted_values = self.serial_numbers + [1 / 3, 0.1 + 0.2, 1e-7, 'text']
+            values = ['value {}'.format(index) for index in range(len(unformatted_values))]
+            row_nums = list(range(2, len(values) + 2))
+            convert_values = transform.get_column_values_converter('Sheet1', 'col', 'A', col_type)
+            self.assertEqual(convert_values(values, unformatted_values, row_nums, values), [
+                per_cell(value, unformatted_value, 'Sheet1', 'col', 'A', row_num, col_type)
+                for value, unformatted_value, row_num in zip(values, unformatted_values, row_nums)])
+
+    def test_same_as_per_cell_functions(self):
+        """
+        Verify that the columns of dates, datetimes and numbers are converted the same as with the per cell functions,
+        including the out of range values
+        """
+        self.assert_same_as_per_cell()
+
+    @mock.patch('tap_google_sheets.transform.numpy', None)
+    def test_same_as_per_cell_functions_without_numpy(self):
+        self.assert_same_as_per_cell()
+
+class TestDatetimeCache(unittest.TestCase):
+
+    def test_same_as_timezone_conversion(self):
+        """
+        Verify that the UTC conversions are the same as the conversions with the timezone
+        """
+        for serial_number in TestColumnarConversion.serial_numbers[:-2]:
+            self.assertEqual(transform.excel_to_dttm_str('value', serial_number),
+                             transform.excel_to_dttm_str('value', serial_number, 'Etc/UTC'))
+        self.assertEqual(transform.excel_to_dttm_str('value', 10 ** 12, 'Etc/UTC'), ('value', True))
+        self.assertEqual(transform.excel_to_dttm_str('value', 44197.25, 'America/New_York'), ('2021-01-01T11:00:00.000000Z', False))
+
+    @mock.patch('tap_google_sheets.transform.metrics.log')
+    def test_cache_metrics(self, mocked_log):
+        """
+        Verify that the repeated serial numbers are converted once, and the hits and misses are logged as metrics
+        """
+        transform.serial_to_dttm_str.cache_clear()
+        convert_values = transform.get_column_values_converter('Sheet1', 'col', 'A', 'numberType.DATE')
+        with mock.patch('tap_google_sheets.transform.numpy', None):
+            self.assertEqual(convert_values(['1/1/2021'] * 3 + ['1/2/2021'], [44197] * 3 + [44198], [2, 3, 4, 5], [[]] * 4),
+                             ['2021-01-01'] * 3 + ['2021-01-02'])
+        transform.log_dttm_cache_metrics()
+        self.assertEqual([(call[0][1].metric, call[0][1].value) for call in mocked_log.call_args_list],
+                         [('dttm_cache_hits', 2), ('dttm_cache_misses', 2)])
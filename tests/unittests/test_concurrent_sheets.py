@@ -0,0 +1,121 @@
+import re
+import time
+import random
+import threading
+import unittest
+from unittest import mock
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets import pipeline
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'name': {'type': ['null', 'string']}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'name', 'columnType': 'stringValue', 'columnSkipped': False}]
+
+def get_sheets(count, row_count):
+    return [{
+        "properties": {
+            "sheetId": index,
+            "title": "Sheet{}".format(index),
+            "index": index,
+            "sheetType": "GRID",
+            "gridProperties": {
+                "rowCount": row_count,
+                "columnCount": 1
+            }
+        }
+    } for index in range(count)]
+
+def mocked_get(path, api, params, endpoint):
+    """
+    Return 1 value per row of the range, after a random delay so that the responses arrive out of order
+    """
+    from_row, to_row = re.search(r'!A(\d+):A(\d+)', path).groups()
+    time.sleep(random.random() / 100)
+    return {'values': [['{}-{}'.format(endpoint, row)] for row in range(int(from_row), int(to_row) + 1)]}
+
+def mocked_get_sheets_metadata_batch(sheets, spreadsheet_id, client):
+    return [(sheet_schema, columns) for _ in sheets]
+
+class TestConcurrentSheets(unittest.TestCase):
+
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=mocked_get)
+    @mock.patch('tap_google_sheets.streams.schema.get_sheets_metadata_batch', side_effect=mocked_get_sheets_metadata_batch)
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.singer.write_message')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_records_written_in_order(self, mock_process_records, mock_write_message, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata, mocked_client_get):
+        """
+        Verify that with max_workers > 1 the pages of all the sheets are fetched,
+        and the records of each sheet are written contiguously and in order
+        """
+        written = []
+        mock_process_records.side_effect = lambda catalog, stream_name, records, time_extracted, version: written.extend(
+            (stream_name, record['__sdc_row']) for record in records)
+        config = {"spreadsheet_id": "id", "start_date": "2019-01-01T00:00:00Z", "max_workers": "4"}
+        sheets = get_sheets(6, 650)
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        sheet_metadata, sheets_loaded = sheets_load_data.load_data({}, {}, ["Sheet{}".format(i) for i in range(6)], sheets, "time")
+
+        expected = [("Sheet{}".format(i), row) for i in range(6) for row in range(2, 651)]
+        self.assertEqual(written, expected)
+        self.assertEqual([sheet['title'] for sheet in sheets_loaded], ["Sheet{}".format(i) for i in range(6)])
+        self.assertEqual(len(sheet_metadata), 6)
+        # 4 pages for each sheet
+        self.assertEqual(mocked_client_get.call_count, 6 * 4 * 2)
+
+    @mock.patch('tap_google_sheets.streams.schema.get_sheets_metadata_batch', side_effect=mocked_get_sheets_metadata_batch)
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.singer.write_message')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_error_stops_workers(self, mock_process_records, mock_write_message, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata):
+        """
+        Verify that an error while fetching a page is raised in the main thread, and the workers are stopped
+        """
+        config = {"spreadsheet_id": "id", "start_date": "2019-01-01T00:00:00Z", "max_workers": 2}
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        with mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=Exception('dummy error')):
+            with self.assertRaises(Exception) as e:
+                sheets_load_data.load_data({}, {}, ["Sheet0", "Sheet1", "Sheet2"], get_sheets(3, 650), "time")
+        self.assertEqual(str(e.exception), 'dummy error')
+
+    def test_page_queue_stops_producer(self):
+        """
+        Verify that the producer does not block on a full queue once the stop event is set
+        """
+        stop_event = threading.Event()
+        page_queue = pipeline.PageQueue(1, stop_event)
+        producer = threading.Thread(target=page_queue.produce, args=(iter(range(10)),))
+        producer.start()
+        self.assertEqual(next(iter(page_queue)), 0)
+        stop_event.set()
+        producer.join(timeout=5)
+        self.assertFalse(producer.is_alive())
+
+    @mock.patch('tap_google_sheets.streams.schema.get_sheets_metadata_batch', side_effect=mocked_get_sheets_metadata_batch)
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.singer.write_message')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_prefetch_pages(self, mock_process_records, mock_write_message, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata):
+        """
+        Verify that with prefetch_pages the pages are fetched in a worker thread, while the records are written in order
+        """
+        written = []
+        fetch_threads = set()
+        def get(path, api, params, endpoint):
+            fetch_threads.add(threading.current_thread())
+            return mocked_get(path, api, params, endpoint)
+        mock_process_records.side_effect = lambda catalog, stream_name, records, time_extracted, version: written.extend(
+            (stream_name, record['__sdc_row']) for record in records)
+        config = {"spreadsheet_id": "id", "start_date": "2019-01-01T00:00:00Z", "prefetch_pages": 1}
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        with mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=get):
+            sheets_load_data.load_data({}, {}, ["Sheet0", "Sheet1"], get_sheets(2, 650), "time")
+
+        self.assertEqual(written, [("Sheet{}".format(i), row) for i in range(2) for row in range(2, 651)])
+        self.assertNotIn(threading.main_thread(), fetch_threads)
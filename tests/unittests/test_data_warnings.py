@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+from tap_google_sheets import transform
+from tap_google_sheets.transform import DataWarnings
+
+columns = [
+    {'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'amount', 'columnType': 'numberType', 'columnSkipped': False},
+    {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'active', 'columnType': 'boolValue', 'columnSkipped': False}]
+rows = [['1', 'TRUE'], [], ['n/a', 'maybe'], [], ['x', 'TRUE'], ['y', 'TRUE'], ['z', 'TRUE']]
+
+class TestDataWarnings(unittest.TestCase):
+
+    @mock.patch('tap_google_sheets.transform.LOGGER.info')
+    def test_summary_of_sheet(self, mocked_logger_info):
+        """
+        Verify that the data type warnings and empty rows are counted per sheet and column,
+        and logged in a summary at the end of the sheet, with the first cells as examples
+        """
+        with mock.patch('tap_google_sheets.transform.DATA_WARNINGS', DataWarnings()):
+            transform.transform_sheet_data('id', 0, 'Sheet1', 2, columns, rows, [[1, True], [], ['n/a', 'maybe'], [], ['x', True], ['y', True], ['z', True]])
+            self.assertEqual(mocked_logger_info.call_count, 0)
+            transform.DATA_WARNINGS.log_sheet_summary('Sheet1')
+            self.assertEqual([call[0][0] for call in mocked_logger_info.call_args_list], [
+                'SHEET: Sheet1, EMPTY ROWS SKIPPED: 2, ROWS: 3, 5',
+                'WARNING: POSSIBLE DATA TYPE ERRORS; SHEET: Sheet1, COL: amount, TYPE: numberType, CELLS: 4, e.g. A4, A6, A7, ...; '
+                'COL: active, TYPE: boolValue, CELLS: 1, e.g. B4'])
+            # the counters are reset
+            mocked_logger_info.reset_mock()
+            transform.DATA_WARNINGS.log_sheet_summary('Sheet1')
+            self.assertEqual(mocked_logger_info.call_count, 0)
+
+    @mock.patch('tap_google_sheets.transform.LOGGER.info')
+    def test_verbose(self, mocked_logger_info):
+        """
+        Verify that each warning is logged in verbose mode
+        """
+        with mock.patch('tap_google_sheets.transform.DATA_WARNINGS', DataWarnings(verbose=True)):
+            transform.transform_sheet_data('id', 0, 'Sheet1', 2, columns, rows[:3], [[1, True], [], ['n/a', 'maybe']])
+            self.assertEqual([call[0][0] for call in mocked_logger_info.call_args_list], [
+                'EMPTY ROW: 3, SKIPPING',
+                'WARNING: POSSIBLE DATA TYPE ERROR; SHEET: Sheet1, COL: amount, CELL: A4, TYPE: numberType',
+                'WARNING: POSSIBLE DATA TYPE ERROR; SHEET: Sheet1, COL: active, CELL: B4, TYPE: boolValue'])
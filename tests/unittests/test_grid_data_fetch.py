@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+from collections import OrderedDict
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.transform import transform_grid_data_rows
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'date': {'type': ['null', 'string']}, 'value': {'type': ['null', 'string'], 'format': 'date'}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'date', 'columnType': 'stringValue', 'columnSkipped': False}, {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'value', 'columnType': 'numberType.DATE', 'columnSkipped': False}]
+
+grid_data = OrderedDict({
+    "sheets": [{
+        "data": [{
+            "rowData": [
+                {"values": [{"formattedValue": "abc", "effectiveValue": {"stringValue": "abc"}},
+                            {"formattedValue": "1/1/2021", "effectiveValue": {"numberValue": 44197}}]},
+                {},
+                {"values": [{"formattedValue": "TRUE", "effectiveValue": {"boolValue": True}},
+                            {}]},
+                {"values": [{"formattedValue": "#REF!", "effectiveValue": {"errorValue": {"type": "REF"}}}]},
+                {"values": [{}, {}]}
+            ]
+        }]
+    }]
+})
+
+class TestGridDataFetch(unittest.TestCase):
+
+    def test_transform_grid_data_rows(self):
+        """
+        Verify that the grid data rows are converted to the formatted and unformatted rows returned by the values API
+        """
+        formatted_rows, unformatted_rows = transform_grid_data_rows(grid_data['sheets'][0]['data'][0]['rowData'])
+        self.assertEqual(formatted_rows, [['abc', '1/1/2021'], [], ['TRUE'], ['#REF!']])
+        self.assertEqual(unformatted_rows, [['abc', 44197], [], [True], ['#REF!']])
+
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', return_value=grid_data)
+    @mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value = [sheet_schema, columns])
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_one_api_call_for_grid_data(self, mock_process_records, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata, mocked_get):
+        """
+        Verify that we make 1 API call for a single page of data with the `grid_data` fetch mode
+        """
+        config = {
+            "spreadsheet_id": "id",
+            "start_date": "2019-01-01T00:00:00Z",
+            "fetch_mode": "grid_data"
+        }
+        sheets = [{
+            "properties": {
+            "sheetId": 1260142713,
+            "title": "Sheet13",
+            "index": 15,
+            "sheetType": "GRID",
+            "gridProperties": {
+                "rowCount": 100,
+                "columnCount": 5
+            }
+            }
+        }]
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        sheets_load_data.load_data({}, {}, ["Sheet13"], sheets, "time")
+        self.assertEqual(mock.call(api='sheets', endpoint='Sheet13', params="includeGridData=true&ranges='Sheet13'!A2:B100&fields=sheets(data(rowData(values(formattedValue,effectiveValue))))", path="spreadsheets/id"), mocked_get.mock_calls[0])
+        # Verify that the get() is called 1 time
+        self.assertEqual(mocked_get.call_count, 1)
+        # Verify that both the formatted and the unformatted values are transformed
+        records = mock_process_records.call_args[1]['records']
+        self.assertEqual(records[0]['date'], 'abc')
+        self.assertEqual(records[0]['value'], '2021-01-01')
+        self.assertEqual([record['__sdc_row'] for record in records], [2, 4, 5])
+
+    def test_invalid_fetch_mode(self):
+        """
+        Verify that an invalid fetch mode raises an exception
+        """
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        with self.assertRaises(Exception) as e:
+            SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {"fetch_mode": "dummy"})
+        self.assertEqual(str(e.exception), 'INVALID FETCH MODE: dummy')
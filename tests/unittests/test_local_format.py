@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+from tap_google_sheets import schema
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.number_format import render_formatted_value
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'price': {'type': ['null', 'string']}, 'code': {'type': ['null', 'string']}, 'date': {'type': ['null', 'string'], 'format': 'date'}, 'active': {'type': ['null', 'boolean', 'string']}}}
+columns = [
+    {'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'price', 'columnType': 'stringValue', 'columnSkipped': False, 'columnNumberFormat': {'type': 'CURRENCY', 'pattern': '"$"#,##0.00'}},
+    {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'code', 'columnType': 'stringValue', 'columnSkipped': False, 'columnNumberFormat': {'type': 'TEXT'}},
+    {'columnIndex': 3, 'columnLetter': 'C', 'columnName': 'date', 'columnType': 'numberType.DATE', 'columnSkipped': False, 'columnNumberFormat': {'type': 'DATE', 'pattern': 'm/d/yyyy'}},
+    {'columnIndex': 4, 'columnLetter': 'D', 'columnName': 'active', 'columnType': 'boolValue', 'columnSkipped': False}]
+
+class TestLocalFormat(unittest.TestCase):
+
+    def test_render_formatted_value(self):
+        """
+        Verify that the formatted values are rendered from the unformatted values and the number formats
+        """
+        self.assertEqual(render_formatted_value(1234.5, {'type': 'CURRENCY', 'pattern': '"$"#,##0.00'}), '$1,234.50')
+        self.assertEqual(render_formatted_value(-1234.5, {'type': 'CURRENCY', 'pattern': '"$"#,##0.00'}), '-$1,234.50')
+        self.assertEqual(render_formatted_value(1234.5, {'type': 'CURRENCY', 'pattern': '#,##0.00\\ [$€-1]'}), '1,234.50 €')
+        self.assertEqual(render_formatted_value(-5, {'type': 'NUMBER', 'pattern': '#,##0.00;(#,##0.00)'}), '(5.00)')
+        self.assertEqual(render_formatted_value(0, {'type': 'NUMBER', 'pattern': '#,##0;-#,##0;"-"'}), '-')
+        self.assertEqual(render_formatted_value(0.1234, {'type': 'PERCENT', 'pattern': '0.0%'}), '12.3%')
+        self.assertEqual(render_formatted_value(0.1234, {'type': 'PERCENT'}), '12.34%')
+        self.assertEqual(render_formatted_value(12345.678, {'type': 'SCIENTIFIC', 'pattern': '0.00E+00'}), '1.23E+04')
+        self.assertEqual(render_formatted_value(1234567, {'type': 'NUMBER', 'pattern': '#,##0,"K"'}), '1,235K')
+        self.assertEqual(render_formatted_value(7, {'type': 'NUMBER', 'pattern': '000'}), '007')
+        # general format: without a number format, text formatted numbers and unsupported patterns
+        self.assertEqual(render_formatted_value(1.5), '1.5')
+        self.assertEqual(render_formatted_value(2.0), '2')
+        self.assertEqual(render_formatted_value(12, {'type': 'TEXT', 'pattern': '@'}), '12')
+        self.assertEqual(render_formatted_value(0.5, {'type': 'NUMBER', 'pattern': '# ?/?'}), '0.5')
+        self.assertEqual(render_formatted_value(True), 'TRUE')
+        self.assertEqual(render_formatted_value('00123', {'type': 'TEXT'}), '00123')
+        self.assertEqual(render_formatted_value(''), '')
+
+    def test_column_number_format(self):
+        """
+        Verify that the number format of the 2nd row is added to the columns
+        """
+        sheet = {"properties": {"title": "Sheet1"}, "data": [{"rowData": [
+            {"values": [{"formattedValue": "price"}, {"formattedValue": "name"}]},
+            {"values": [{"effectiveValue": {"numberValue": 1.5}, "effectiveFormat": {"numberFormat": {"type": "CURRENCY", "pattern": "\"$\"#,##0.00"}}},
+                        {"effectiveValue": {"stringValue": "a"}}]}]}]}
+        _, columns = schema.get_sheet_schema_columns(sheet)
+        self.assertEqual(columns[0]['columnNumberFormat'], {"type": "CURRENCY", "pattern": "\"$\"#,##0.00"})
+        self.assertNotIn('columnNumberFormat', columns[1])
+
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', return_value={'values': [[1234.5, 123, 44197, True], [], ['n/a', '00123', '', 1]]})
+    @mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value = [sheet_schema, columns])
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_one_api_call_for_local_format(self, mock_process_records, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata, mocked_get):
+        """
+        Verify that we make 1 UNFORMATTED_VALUE API call for a single page of data with the `local_format` fetch mode,
+        and the string columns are rendered with their number format
+        """
+        config = {"spreadsheet_id": "id", "start_date": "2019-01-01T00:00:00Z", "fetch_mode": "local_format"}
+        sheets = [{"properties": {"sheetId": 0, "title": "Sheet1", "gridProperties": {"rowCount": 100, "columnCount": 4}}}]
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        sheets_load_data.load_data({}, {}, ["Sheet1"], sheets, "time")
+        self.assertEqual(mocked_get.call_count, 1)
+        self.assertIn('valueRenderOption=UNFORMATTED_VALUE', mocked_get.call_args[1]['params'])
+        records = mock_process_records.call_args[1]['records']
+        self.assertEqual([(record['__sdc_row'], record['price'], record['code'], record['date'], record['active']) for record in records], [
+            (2, '$1,234.50', '123', '2021-01-01', True),
+            (4, 'n/a', '00123', None, True)])
@@ -0,0 +1,67 @@
+import io
+import decimal
+import unittest
+from unittest import mock
+import simplejson as json
+import singer
+from singer.messages import RecordMessage, StateMessage, ActivateVersionMessage
+from tap_google_sheets import message_writer
+from tap_google_sheets.message_writer import MessageWriter, format_message
+
+class TestMessageWriter(unittest.TestCase):
+
+    def test_format_message(self):
+        """
+        Verify that the messages are serialized as with simplejson, ensure_ascii=False and use_decimal=True
+        """
+        for record in ({'price': '€1,234.50', 'count': 3, 'amount': 1.5, 'active': True, 'empty': None},
+                       {'amount': decimal.Decimal('0.10'), 'big': 2 ** 70}):
+            message = RecordMessage(stream='Sheet1', record=record, version=1)
+            self.assertEqual(json.loads(format_message(message), use_decimal=True), json.loads(
+                json.dumps(message.asdict(), ensure_ascii=False, use_decimal=True), use_decimal=True))
+        self.assertIn('€', format_message(RecordMessage(stream='Sheet1', record={'price': '€1'})))
+        self.assertIn('0.10', format_message(RecordMessage(stream='Sheet1', record={'amount': decimal.Decimal('0.10')})))
+
+    @mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_records_buffered_until_other_message(self, mock_stdout):
+        """
+        Verify that the records are buffered, and written in order before a STATE or ACTIVATE_VERSION message
+        """
+        writer = MessageWriter(buffer_size=1000)
+        writer.write_message(RecordMessage(stream='Sheet1', record={'a': 1}))
+        writer.write_message(RecordMessage(stream='Sheet1', record={'a': 2}))
+        self.assertEqual(mock_stdout.getvalue(), '')
+        writer.write_message(StateMessage(value={'bookmarks': {}}))
+        writer.write_message(RecordMessage(stream='Sheet1', record={'a': 3}))
+        writer.write_message(ActivateVersionMessage(stream='Sheet1', version=1))
+        self.assertEqual([json.loads(line)['type'] for line in mock_stdout.getvalue().splitlines()],
+                         ['RECORD', 'RECORD', 'STATE', 'RECORD', 'ACTIVATE_VERSION'])
+
+    @mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_buffer_size(self, mock_stdout):
+        """
+        Verify that the buffer is written when full, and each message is written with buffer size 0
+        """
+        writer = MessageWriter(buffer_size=150)
+        for index in range(10):
+            writer.write_message(RecordMessage(stream='Sheet1', record={'a': index}))
+        self.assertEqual(len(mock_stdout.getvalue().splitlines()), 9)
+        writer.flush()
+        self.assertEqual(len(mock_stdout.getvalue().splitlines()), 10)
+        writer.buffer_size = 0
+        writer.write_message(RecordMessage(stream='Sheet1', record={'a': 10}))
+        self.assertEqual(len(mock_stdout.getvalue().splitlines()), 11)
+
+    @mock.patch('sys.stdout', new_callable=io.StringIO)
+    def test_singer_messages_written_through_buffer(self, mock_stdout):
+        """
+        Verify that the singer functions write through the message writer
+        """
+        message_writer.configure({"message_buffer_size": 1000})
+        try:
+            singer.write_record('Sheet1', {'a': 1})
+            self.assertEqual(mock_stdout.getvalue(), '')
+            singer.write_state({'bookmarks': {}})
+            self.assertEqual(len(mock_stdout.getvalue().splitlines()), 2)
+        finally:
+            message_writer.configure({})
@@ -0,0 +1,94 @@
+import unittest
+from unittest import mock
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.paging import PagePlanner
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'a': {'type': ['null', 'string']}, 'b': {'type': ['null', 'string']}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'a', 'columnType': 'stringValue', 'columnSkipped': False}, {'columnIndex': 2, 'columnLetter': 'B', 'columnName': 'b', 'columnType': 'stringValue', 'columnSkipped': False}]
+
+class TestPagePlanner(unittest.TestCase):
+
+    def test_fixed_page_size(self):
+        """
+        Verify that without a cells budget the page size is 200 rows, whatever the measures
+        """
+        planner = PagePlanner.from_config({}, columns, {"rowCount": 1000, "columnCount": 26})
+        self.assertEqual(planner.rows, 200)
+        planner.observe(rows_requested=200, rows_returned=200, response_bytes=100000000, seconds=100)
+        self.assertEqual(planner.rows, 200)
+
+    def test_initial_page_size_from_cells_budget(self):
+        """
+        Verify that the 1st page size is the cells budget divided by the number of columns, up to the max rows
+        """
+        planner = PagePlanner.from_config({"target_cells_per_request": "10000"}, columns, {"columnCount": 26})
+        self.assertEqual(planner.rows, 5000)
+        planner = PagePlanner.from_config({"target_cells_per_request": 100000, "max_rows_per_request": 8000}, columns, {"columnCount": 26})
+        self.assertEqual(planner.rows, 8000)
+        # the grid has only 1 column
+        planner = PagePlanner.from_config({"target_cells_per_request": 1000}, columns, {"columnCount": 1})
+        self.assertEqual(planner.rows, 1000)
+
+    def test_page_size_from_measures(self):
+        """
+        Verify that the page size shrinks to the bytes and seconds budgets, and grows at most 2x per page
+        """
+        planner = PagePlanner(2, target_cells=20000, target_bytes=100000, target_seconds=10, max_rows=50000)
+        self.assertEqual(planner.rows, 10000)
+        # 100 bytes per row
+        planner.observe(rows_requested=10000, rows_returned=10000, response_bytes=1000000, seconds=1)
+        self.assertEqual(planner.rows, 1000)
+        # 20 seconds for 1000 rows
+        planner.observe(rows_requested=1000, rows_returned=1000, response_bytes=10000, seconds=20)
+        self.assertEqual(planner.rows, 500)
+        # small and fast response
+        planner.observe(rows_requested=500, rows_returned=500, response_bytes=500, seconds=0.1)
+        self.assertEqual(planner.rows, 1000)
+        # 100 KB per row: 1 row
+        planner.observe(rows_requested=1000, rows_returned=1000, response_bytes=100000000, seconds=1)
+        self.assertEqual(planner.rows, 1)
+        # never below the min rows
+        planner = PagePlanner(2, target_cells=20000, target_bytes=100000, min_rows=50)
+        planner.observe(rows_requested=10000, rows_returned=10000, response_bytes=100000000, seconds=1)
+        self.assertEqual(planner.rows, 50)
+
+    def test_wide_sheet(self):
+        """
+        Verify that the pages of a wide sheet stay under the cells budget,
+            and shrink after a large or slow response with the default budgets
+        """
+        wide_columns = [{'columnIndex': index} for index in range(1, 501)]
+        planner = PagePlanner.from_config({"target_cells_per_request": 10000}, wide_columns, {"columnCount": 500})
+        self.assertEqual(planner.rows, 20)
+        # 50 MB for 20 rows: 2 rows under the 5 MB budget
+        planner.observe(rows_requested=20, rows_returned=20, response_bytes=50 * 1024 * 1024, seconds=1)
+        self.assertEqual(planner.rows, 2)
+        # 60 seconds for 2 rows: 1 row, the min rows
+        planner.observe(rows_requested=2, rows_returned=2, response_bytes=1000, seconds=60)
+        self.assertEqual(planner.rows, 1)
+        planner = PagePlanner.from_config(
+            {"target_cells_per_request": 10000, "min_rows_per_request": 10}, wide_columns, {"columnCount": 500})
+        planner.observe(rows_requested=20, rows_returned=20, response_bytes=50 * 1024 * 1024, seconds=60)
+        self.assertEqual(planner.rows, 10)
+
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', return_value={'values': [['a', 'b']]})
+    @mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value = [sheet_schema, columns])
+    @mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.singer.write_message')
+    @mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+    def test_page_ranges(self, mock_process_records, mock_write_message, mock_write_schema, mocked_get_selected_fields, mocked_sheet_metadata, mocked_get):
+        """
+        Verify that the pages are requested with the rows planned from the cells budget
+        """
+        config = {"spreadsheet_id": "id", "start_date": "2019-01-01T00:00:00Z", "target_cells_per_request": 2000}
+        sheets = [{"properties": {"sheetId": 0, "title": "Sheet1", "gridProperties": {"rowCount": 2500, "columnCount": 2}}}]
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets_load_data = SheetsLoadData(client, config.get("spreadsheet_id"), config.get("start_date"), config)
+        sheets_load_data.load_data({}, {}, ["Sheet1"], sheets, "time")
+        paths = [call[2]['path'] for call in mocked_get.mock_calls if call[2].get('path')]
+        self.assertEqual(paths[::2], [
+            "spreadsheets/id/values/'Sheet1'!A2:B1000",
+            "spreadsheets/id/values/'Sheet1'!A1001:B2000",
+            "spreadsheets/id/values/'Sheet1'!A2001:B2500"])
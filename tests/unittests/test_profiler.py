@@ -0,0 +1,64 @@
+import os
+import pstats
+import tempfile
+import unittest
+from unittest import mock
+import tap_google_sheets.profiler as profiler
+from tap_google_sheets.streams import update_currently_syncing
+
+def sync_sheet_1():
+    return sum(range(1000))
+
+def sync_sheet_2():
+    return [str(number) for number in range(1000)]
+
+def get_functions(path):
+    return {function_name for _, _, function_name in pstats.Stats(path).stats}
+
+class TestProfiler(unittest.TestCase):
+
+    def test_parse_profile_args(self):
+        """
+        Verify that the profiling options are removed from the arguments, and the other arguments kept
+        """
+        self.assertEqual(profiler.parse_profile_args(['--config', 'config.json', '--profile', 'profiles', '--profile-memory', '--discover']),
+                         (['--config', 'config.json', '--discover'], 'profiles', True))
+        self.assertEqual(profiler.parse_profile_args(['--profile=profiles', '--config', 'config.json']),
+                         (['--config', 'config.json'], 'profiles', False))
+        self.assertEqual(profiler.parse_profile_args(['--config', 'config.json']), (['--config', 'config.json'], None, False))
+
+    @mock.patch('tap_google_sheets.streams.singer.write_state')
+    def test_profile_per_stream(self, mocked_write_state):
+        """
+        Verify that a profile and an allocations report is written for each stream, switched by update_currently_syncing,
+            and for the rest of the run
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            state = {}
+            with profiler.profiling(directory, memory=True):
+                update_currently_syncing(state, 'Sheet 1')
+                sync_sheet_1()
+                update_currently_syncing(state, None)
+                update_currently_syncing(state, 'Sheet 2')
+                sync_sheet_2()
+                update_currently_syncing(state, None)
+            self.assertIsNone(profiler.PROFILER)
+            self.assertEqual(sorted(os.listdir(directory)), [
+                'Sheet_1.allocations.txt', 'Sheet_1.pstats', 'Sheet_2.allocations.txt', 'Sheet_2.pstats',
+                '__run__.allocations.txt', '__run__.pstats', 'all.pstats', 'all.txt'])
+            sheet_1_functions = get_functions(os.path.join(directory, 'Sheet_1.pstats'))
+            sheet_2_functions = get_functions(os.path.join(directory, 'Sheet_2.pstats'))
+            self.assertIn('sync_sheet_1', sheet_1_functions)
+            self.assertNotIn('sync_sheet_2', sheet_1_functions)
+            self.assertIn('sync_sheet_2', sheet_2_functions)
+            self.assertTrue({'sync_sheet_1', 'sync_sheet_2'} <= get_functions(os.path.join(directory, 'all.pstats')))
+            with open(os.path.join(directory, 'Sheet_2.allocations.txt')) as file:
+                self.assertTrue(file.read().startswith('Segment: Sheet 2, peak traced memory: '))
+
+    def test_no_profiling(self):
+        """
+        Verify that nothing is profiled without a profile directory
+        """
+        with profiler.profiling(None):
+            self.assertIsNone(profiler.PROFILER)
+            profiler.switch('Sheet 1')
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.rate_limiter import TokenBucket, SharedTokenBucket, RateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+def get_response(status_code, json):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.content = b'{}'
+    response.json.return_value = json
+    return response
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_token_bucket_waits(self):
+        """
+        Verify that the requests over the burst wait for the tokens to be refilled, in order
+        """
+        clock = FakeClock()
+        bucket = TokenBucket(60, burst=2, clock=clock)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0, 0, 1, 2])
+        clock.now = 10
+        # the bucket is refilled up to the burst
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 1])
+
+    def test_token_bucket_adapts_to_429(self):
+        """
+        Verify that the rate is halved on a 429, and recovers to the quota after successful requests
+        """
+        clock = FakeClock()
+        bucket = TokenBucket(120, burst=10, clock=clock)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 1)
+        # no burst after a 429
+        self.assertEqual(bucket.reserve(), 1)
+        for _ in range(5):
+            bucket.throttled()
+        self.assertEqual(bucket.rate, 0.2)
+        for _ in range(20):
+            bucket.succeeded()
+        self.assertEqual(bucket.rate, 2)
+
+    def test_rate_limiter_threads(self):
+        """
+        Verify that the tokens are shared by the threads, and the waits are reported
+        """
+        clock = FakeClock()
+        rate_limiter = RateLimiter([TokenBucket(60, burst=10, clock=clock), TokenBucket(120, burst=10, clock=clock)])
+        waits = []
+        threads = [threading.Thread(target=lambda: waits.append(rate_limiter.reserve())) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # the slowest bucket sets the wait
+        self.assertEqual(sorted(waits), [0] * 10 + list(range(1, 11)))
+        self.assertEqual((rate_limiter.requests, rate_limiter.waits, rate_limiter.wait_seconds), (20, 10, 55))
+
+    def test_rate_limiter_from_config(self):
+        rate_limiter = RateLimiter.from_config({"user_requests_per_minute": "30", "project_requests_per_minute": 600, "rate_limit_burst": 5})
+        self.assertEqual([(bucket.max_rate, bucket.capacity) for bucket in rate_limiter.buckets], [(0.5, 5), (10, 5)])
+        rate_limiter = RateLimiter.from_config({})
+        self.assertEqual([(bucket.max_rate, bucket.capacity) for bucket in rate_limiter.buckets], [(1, 60), (5, 300)])
+
+    def test_shared_token_bucket(self):
+        """
+        Verify that the buckets using the same database share the tokens and the adaptive rate
+        """
+        clock = FakeClock()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'rate_limit.db')
+            # 2 buckets, as created by 2 tap processes
+            bucket_1 = SharedTokenBucket(path, 'user', 60, burst=2, clock=clock)
+            bucket_2 = SharedTokenBucket(path, 'user', 60, burst=2, clock=clock)
+            other_bucket = SharedTokenBucket(path, 'project', 60, burst=2, clock=clock)
+            self.assertEqual([bucket_1.reserve(), bucket_2.reserve(), bucket_1.reserve(), bucket_2.reserve()], [0, 0, 1, 2])
+            self.assertEqual(other_bucket.reserve(), 0)
+            bucket_1.throttled()
+            self.assertEqual(bucket_2.reserve(), 6)
+            bucket_2.succeeded()
+            self.assertAlmostEqual(bucket_1.reserve(), 4 / 0.55)
+            for bucket in (bucket_1, bucket_2, other_bucket):
+                bucket.connection.close()
+
+    def test_shared_rate_limiter_from_config(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rate_limiter = RateLimiter.from_config({"rate_limit_db": os.path.join(tmp_dir, 'rate_limit.db')})
+            self.assertEqual([bucket.name for bucket in rate_limiter.buckets], ['user', 'project'])
+            self.assertEqual(rate_limiter.reserve(), 0)
+            for bucket in rate_limiter.buckets:
+                bucket.connection.close()
+
+    @mock.patch('time.sleep')
+    @mock.patch('tap_google_sheets.client.requests.Session.request')
+    @mock.patch('tap_google_sheets.client.GoogleClient.get_access_token')
+    def test_client_slows_down_on_429(self, mock_get_token, mock_request, mock_sleep):
+        """
+        Verify that the client takes a token for each try, and slows down on a 429 response
+        """
+        mock_request.side_effect = [get_response(429, {"error": {"message": "Quota exceeded"}}), get_response(200, {"values": []})]
+        rate_limiter = RateLimiter([TokenBucket(60)])
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", rate_limiter=rate_limiter)
+        self.assertEqual(client.get(path="path", api="sheets"), {"values": []})
+        self.assertEqual(rate_limiter.requests, 2)
+        # halved by the 429, then 1 step up for the successful request
+        self.assertAlmostEqual(rate_limiter.buckets[0].rate, 0.55)
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+from singer import Transformer, metadata
+from singer.catalog import Catalog
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+from tap_google_sheets.record_transformer import compile_record_transformer
+
+schema = {
+    'type': 'object',
+    'additionalProperties': False,
+    'properties': {
+        '__sdc_row': {'type': ['null', 'integer']},
+        'name': {'type': ['null', 'string']},
+        'amount': {'type': ['null', 'integer', 'number']},
+        'decimal': {'anyOf': [{'type': ['null', 'string'], 'format': 'singer.decimal'}, {'type': ['null', 'string']}]},
+        'active': {'type': ['null', 'boolean', 'string']},
+        'updated': {'type': ['null', 'string'], 'format': 'date-time'},
+        'date': {'type': ['null', 'string'], 'format': 'date'},
+        'not_selected': {'type': ['null', 'string']}
+    }
+}
+stream_metadata = metadata.to_map([
+    {'breadcrumb': [], 'metadata': {'selected': True}},
+    {'breadcrumb': ['properties', '__sdc_row'], 'metadata': {'inclusion': 'automatic'}},
+    {'breadcrumb': ['properties', 'not_selected'], 'metadata': {'inclusion': 'available', 'selected': False}}])
+records = [
+    {'__sdc_row': 2, 'name': 'a', 'amount': 1.5, 'decimal': 0.1, 'active': True, 'updated': '2021-01-01T10:00:00Z', 'date': '2021-01-01', 'not_selected': 'x', 'extra': 1},
+    {'__sdc_row': 3, 'name': '', 'amount': '1,234', 'decimal': 'n/a', 'active': 'maybe', 'updated': None, 'date': None},
+    {'__sdc_row': 4, 'name': 12, 'amount': None, 'decimal': None, 'active': 0, 'updated': '', 'date': ''}]
+
+def get_catalog(stream_schema):
+    return Catalog.from_dict({'streams': [{'tap_stream_id': 'Sheet1', 'stream': 'Sheet1', 'schema': stream_schema,
+                                           'metadata': metadata.to_list(stream_metadata)}]})
+
+class TestRecordTransformer(unittest.TestCase):
+
+    def test_same_records_as_singer_transformer(self):
+        """
+        Verify that the compiled transformer returns the same records as the singer Transformer with new_transform
+        """
+        transform = compile_record_transformer(schema, stream_metadata)
+        for record in records:
+            with Transformer() as transformer:
+                expected = transformer.transform(dict(record), schema, stream_metadata)
+            self.assertEqual(transform(dict(record)), expected)
+
+    def test_not_matching_record(self):
+        """
+        Verify that None is returned for a value that does not match its schema, and the not flat schemas are not compiled
+        """
+        transform = compile_record_transformer(schema, stream_metadata)
+        self.assertIsNone(transform({'amount': 'abc'}))
+        self.assertIsNone(compile_record_transformer({'type': 'object', 'properties': {'items': {'type': 'array', 'items': {}}}}, {}))
+
+    @mock.patch('tap_google_sheets.streams.write_record')
+    def test_process_records_compiled(self, mocked_write_record):
+        """
+        Verify that the records written with record_transform = compiled are the same as with the singer Transformer,
+        and a not matching record raises the error of the singer Transformer
+        """
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        catalog = get_catalog(schema)
+        written = {}
+        for record_transform in ('singer', 'compiled'):
+            mocked_write_record.reset_mock()
+            sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {"record_transform": record_transform})
+            self.assertEqual(sheets_load_data.process_records(catalog, 'Sheet1', [dict(record) for record in records], 'time', 1), 3)
+            written[record_transform] = [call[1]['record'] for call in mocked_write_record.call_args_list]
+        self.assertEqual(written['compiled'], written['singer'])
+        with self.assertRaises(RuntimeError):
+            sheets_load_data.process_records(catalog, 'Sheet1', [{'amount': 'abc'}], 'time', 1)
+
+    def test_invalid_record_transform(self):
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        with self.assertRaises(Exception) as e:
+            SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {"record_transform": "fast"})
+        self.assertEqual(str(e.exception), 'INVALID RECORD TRANSFORM: fast')
@@ -0,0 +1,152 @@
+import io
+import json
+import unittest
+import contextlib
+from unittest import mock
+from singer import metadata
+from tap_google_sheets import message_writer
+from tap_google_sheets.discover import discover
+from tap_google_sheets.sync import sync
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.paging import PagePlanner, get_column_ranges
+from benchmarks.generator import SyntheticSpreadsheet
+from benchmarks.fake_api import FakeGoogleApi
+from benchmarks.run import BENCHMARK_CONFIG, get_client, select_all
+
+class SparseSpreadsheet(SyntheticSpreadsheet):
+    """
+    Synthetic spreadsheet whose cells of blank_column are empty in the blank_rows,
+        with the empty cells and rows at the end of the ranges trimmed as the values API does
+    """
+    def __init__(self, blank_column, blank_rows, **kwargs):
+        super().__init__(**kwargs)
+        self.blank_column = blank_column
+        self.blank_rows = blank_rows
+
+    def get_values(self, sheet_index, from_row, to_row, from_column=1, to_column=None, formatted=True):
+        rows = super().get_values(sheet_index, from_row, to_row, from_column, to_column, formatted)
+        for row, values in zip(range(from_row, to_row + 1), rows):
+            if row in self.blank_rows and from_column <= self.blank_column < from_column + len(values):
+                values[self.blank_column - from_column] = ''
+            while values and values[-1] == '':
+                values.pop()
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+def deselect_fields(catalog, fields):
+    """
+    Deselect the fields of the sheets, discovered with the automatic inclusion
+    """
+    for stream in catalog.streams:
+        mdata = metadata.to_map(stream.metadata)
+        for field in fields:
+            if ('properties', field) in mdata:
+                mdata = metadata.write(mdata, ('properties', field), 'inclusion', 'available')
+                mdata = metadata.write(mdata, ('properties', field), 'selected', False)
+        stream.metadata = metadata.to_list(mdata)
+    return catalog
+
+def get_records(spreadsheet, config, deselected_fields):
+    """
+    Sync the sheets of the spreadsheet through the fake API, without the deselected fields,
+        return the records of the sheets and the requests
+    """
+    config = dict(BENCHMARK_CONFIG, spreadsheet_id=spreadsheet.spreadsheet_id, **config)
+    fake_api = FakeGoogleApi(spreadsheet)
+    output = io.StringIO()
+    with fake_api.serve():
+        with get_client(config) as client:
+            catalog = deselect_fields(select_all(discover(client, spreadsheet.spreadsheet_id)), deselected_fields)
+        fake_api.requests.clear()
+        with get_client(config) as client, contextlib.redirect_stdout(output):
+            sync(client=client, config=config, catalog=catalog, state={})
+            message_writer.MESSAGE_WRITER.flush()
+    messages = [json.loads(line) for line in output.getvalue().splitlines()]
+    records = [(message['stream'], message['record']) for message in messages
+               if message['type'] == 'RECORD' and message['stream'] in spreadsheet.sheet_titles]
+    return records, fake_api.requests
+
+class TestSelectedColumns(unittest.TestCase):
+
+    def test_get_column_ranges(self):
+        """
+        Verify that the columns are turned into contiguous ranges, merged over the smallest gaps above the max ranges
+        """
+        self.assertEqual(get_column_ranges([2, 3, 4, 8, 10, 11], 120), [(2, 4), (8, 8), (10, 11)])
+        self.assertEqual(get_column_ranges([2, 3, 4, 8, 10, 11], 120, max_ranges=2), [(2, 4), (8, 11)])
+        self.assertEqual(get_column_ranges([1, 2, 3], 3), None)
+        self.assertEqual(get_column_ranges([1, 2, 3], 5), [(1, 3)])
+        self.assertEqual(get_column_ranges([], 5), None)
+
+    def test_merge_value_ranges(self):
+        """
+        Verify that the rows of the value ranges are stitched back at the position of their columns
+        """
+        value_ranges = [
+            {'range': "'Sheet 1'!B2:C5", 'values': [['b2', 'c2'], [], ['', 'c4']]},
+            {'range': "'Sheet 1'!F2:F5", 'values': [['f2'], [], [], ['f5']]},
+            {'range': "'Sheet 1'!H2:H5"}]
+        self.assertEqual(SheetsLoadData.merge_value_ranges([(2, 3), (6, 6), (8, 8)], value_ranges), [
+            ['', 'b2', 'c2', '', '', 'f2'],
+            [],
+            ['', '', 'c4'],
+            ['', '', '', '', '', 'f5']])
+
+    def test_page_planner_column_ranges(self):
+        """
+        Verify that the cells of a page are the columns of the column ranges
+        """
+        columns = [{'columnIndex': index} for index in range(1, 101)]
+        planner = PagePlanner.from_config({'target_cells_per_request': 10000}, columns, {'columnCount': 100}, [(2, 4), (10, 11)])
+        self.assertEqual(planner.rows, 2000)
+
+    def test_sync_selected_columns(self):
+        """
+        Verify that the records synced with the column ranges are the records synced with all the columns,
+            with values:batchGet API calls instead of the values API calls, except for the pages with blank rows
+        """
+        spreadsheet = SyntheticSpreadsheet(sheets=2, rows=250, columns=12)
+        deselected_fields = ['string_1', 'number_3', 'currency_4', 'date_5', 'boolean_8', 'string_9']
+        expected_records, _ = get_records(spreadsheet, {}, deselected_fields)
+        self.assertNotIn('string_1', expected_records[0][1])
+        for config in ({}, {'fetch_mode': 'local_format'}, {'async_requests': True}):
+            records, requests = get_records(spreadsheet, dict(config, fetch_selected_columns=True), deselected_fields)
+            self.assertEqual(records, expected_records)
+            # the last page of each sheet (rows 201 to 351, blank from row 252), fetched again with all the columns,
+            # with the formatted and unformatted values, or the unformatted values only with local_format
+            self.assertEqual(requests['values'], 2 * (1 if config.get('fetch_mode') == 'local_format' else 2))
+
+    def test_blank_page_stop(self):
+        """
+        Verify that the pages of a large grid with column ranges stop at the 1st whole blank page
+        """
+        spreadsheet = SyntheticSpreadsheet(sheets=1, rows=250, columns=12)
+        deselected_fields = ['string_1', 'number_3']
+        with mock.patch.object(spreadsheet, 'get_row_count', return_value=100000):
+            records, requests = get_records(spreadsheet, {'fetch_selected_columns': True}, deselected_fields)
+            self.assertEqual(len(records), 250)
+            # the header rows, then the formatted and unformatted values of the pages of 200 rows:
+            # 2 to 200, 201 to 400, and the blank page 401 to 600, the last 2 pages fetched again with all the columns
+            self.assertEqual(requests['batchGet'], 1 + 3 * 2)
+            self.assertEqual(requests['values'], 2 * 2)
+            # with the async client, up to max_in_flight pages after the blank page are fetched
+            records, requests = get_records(
+                spreadsheet, {'fetch_selected_columns': True, 'async_requests': True, 'max_in_flight': 2}, deselected_fields)
+            self.assertEqual(len(records), 250)
+            self.assertLessEqual(requests['batchGet'], 1 + (3 + 2) * 2)
+
+    def test_sparse_selected_columns(self):
+        """
+        Verify that the rows whose fetched columns are empty, in a whole page and at the end of the data,
+            are synced as without the column ranges: the pages with blank rows are fetched again with all the columns
+        """
+        spreadsheet = SparseSpreadsheet(blank_column=12, blank_rows=range(150, 431), sheets=1, rows=450, columns=12)
+        # only the last column is fetched, empty from row 150 to row 430
+        deselected_fields = [spreadsheet.get_header(column_index) for column_index in range(1, 12)]
+        expected_records, _ = get_records(spreadsheet, {}, deselected_fields)
+        self.assertEqual(len(expected_records), 450)
+        self.assertNotIn('currency_12', expected_records[300][1])
+        for config in ({}, {'fetch_mode': 'local_format'}, {'async_requests': True}):
+            records, _ = get_records(spreadsheet, dict(config, fetch_selected_columns=True), deselected_fields)
+            self.assertEqual(records, expected_records)
@@ -0,0 +1,116 @@
+import re
+import unittest
+from unittest import mock
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'a': {'type': ['null', 'string']}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'a', 'columnType': 'stringValue', 'columnSkipped': False}]
+
+def get_sheets():
+    return [{"properties": {"sheetId": index, "title": "Sheet{}".format(index), "gridProperties": {"rowCount": 1000, "columnCount": 1}}}
+            for index in range(2)]
+
+class FakeSpreadsheet:
+    """
+    Values of the rows 2 to 300 of each sheet, for the values and values:batchGet API calls
+    """
+    def __init__(self):
+        self.cells = {sheet_title: {row: 'row {}'.format(row) for row in range(2, 301)} for sheet_title in ('Sheet0', 'Sheet1')}
+        self.calls = []
+        # (sheet_title, row, value) of the cells edited while the sheets are synced, after the fingerprints
+        self.edits = []
+
+    def get_rows(self, sheet_title, from_row, to_row):
+        rows = [[self.cells[sheet_title][row]] if row in self.cells[sheet_title] else [] for row in range(from_row, to_row + 1)]
+        while rows and rows[-1] == []:
+            rows.pop()
+        return rows
+
+    def get(self, path, params, api, endpoint):
+        self.calls.append(endpoint)
+        if 'batchGet' in path:
+            return {'valueRanges': [{'values': self.get_rows(sheet_title, int(from_row), int(to_row))}
+                                    for sheet_title, from_row, to_row in re.findall(r"ranges='(\w+)'!(\d+):(\d+)", params)]}
+        for edit_sheet_title, row, value in self.edits:
+            self.cells[edit_sheet_title][row] = value
+        self.edits = []
+        sheet_title, from_row, to_row = re.search(r"'(\w+)'!A(\d+):A(\d+)", path).groups()
+        return {'values': self.get_rows(sheet_title, int(from_row), int(to_row))}
+
+@mock.patch('tap_google_sheets.streams.schema.get_sheets_metadata_batch', side_effect=lambda sheets, **kwargs: [[sheet_schema, columns]] * len(sheets))
+@mock.patch('tap_google_sheets.streams.get_selected_fields', return_value = [])
+@mock.patch('tap_google_sheets.streams.write_schema')
+@mock.patch('tap_google_sheets.streams.singer.write_state')
+@mock.patch('tap_google_sheets.streams.singer.write_message')
+@mock.patch('tap_google_sheets.streams.GoogleSheets.process_records')
+class TestSheetFingerprints(unittest.TestCase):
+
+    def sync(self, spreadsheet, state, config):
+        spreadsheet.calls = []
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        with mock.patch('tap_google_sheets.client.GoogleClient.get', side_effect=spreadsheet.get):
+            sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", dict(config, fetch_mode="local_format"))
+            sheet_metadata, sheets_loaded = sheets_load_data.load_data({}, state, ["Sheet0", "Sheet1"], get_sheets(), "time")
+        self.assertEqual(len(sheet_metadata), 2)
+        return [sheet_loaded['title'] for sheet_loaded in sheets_loaded]
+
+    def test_skip_unchanged_sheets(self, *mocks):
+        """
+        Verify that the sheets whose samples are unchanged are skipped, and the changed sheets are synced
+        """
+        spreadsheet = FakeSpreadsheet()
+        state = {}
+        config = {"skip_unchanged_sheets": "true"}
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet0", "Sheet1"])
+        self.assertEqual({sheet_title: fingerprint['last_row'] for sheet_title, fingerprint in state['sheet_fingerprints'].items()},
+                         {"Sheet0": 300, "Sheet1": 300})
+        # 1 batchGet call for the fingerprints of the sheets, before the sync
+        self.assertEqual(spreadsheet.calls.count('sheet_fingerprints'), 1)
+        self.assertEqual(spreadsheet.calls[0], 'sheet_fingerprints')
+
+        # the last rows moved: the sheets are synced again to fingerprint the rows around their last row
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet0", "Sheet1"])
+
+        # no changes: 1 batchGet call and no values calls
+        self.assertEqual(self.sync(spreadsheet, state, config), [])
+        self.assertEqual(spreadsheet.calls, ['sheet_fingerprints'])
+
+        # a row appended to Sheet1, a cell changed in the 1st rows of Sheet0
+        spreadsheet.cells['Sheet1'][301] = 'row 301'
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet1"])
+        self.assertEqual(state['sheet_fingerprints']['Sheet1']['last_row'], 301)
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet1"])
+        spreadsheet.cells['Sheet0'][5] = 'changed'
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet0"])
+
+        # full refresh
+        self.assertEqual(self.sync(spreadsheet, state, dict(config, full_refresh=True)), ["Sheet0", "Sheet1"])
+
+    def test_edited_while_synced(self, *mocks):
+        """
+        Verify that a sheet edited while it is synced, after the fingerprints, is synced again by the next sync
+        """
+        spreadsheet = FakeSpreadsheet()
+        state = {}
+        config = {"skip_unchanged_sheets": "true"}
+        self.sync(spreadsheet, state, config)
+        self.sync(spreadsheet, state, config)
+        self.assertEqual(self.sync(spreadsheet, state, config), [])
+
+        spreadsheet.cells['Sheet0'][5] = 'changed'
+        spreadsheet.edits = [('Sheet0', 6, 'edited while synced')]
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet0"])
+        self.assertEqual(self.sync(spreadsheet, state, config), ["Sheet0"])
+        self.assertEqual(self.sync(spreadsheet, state, config), [])
+
+    def test_fingerprints_disabled(self, *mocks):
+        """
+        Verify that without skip_unchanged_sheets the sheets are synced without fingerprints
+        """
+        spreadsheet = FakeSpreadsheet()
+        state = {}
+        self.assertEqual(self.sync(spreadsheet, state, {}), ["Sheet0", "Sheet1"])
+        self.assertEqual(self.sync(spreadsheet, state, {}), ["Sheet0", "Sheet1"])
+        self.assertNotIn('sheet_fingerprints', state)
+        self.assertNotIn('sheet_fingerprints', spreadsheet.calls)
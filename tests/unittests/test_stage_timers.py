@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+from singer import metadata
+from singer.catalog import Catalog
+from tap_google_sheets.stage_timers import StageTimers, STAGE_TIMERS
+from tap_google_sheets.streams import SheetsLoadData
+from tap_google_sheets.client import GoogleClient
+
+sheet_schema = {'type': 'object', 'additionalProperties': False, 'properties': {'__sdc_spreadsheet_id': {'type': ['null', 'string']}, '__sdc_sheet_id': {'type': ['null', 'integer']}, '__sdc_row': {'type': ['null', 'integer']}, 'a': {'type': ['null', 'string']}}}
+columns = [{'columnIndex': 1, 'columnLetter': 'A', 'columnName': 'a', 'columnType': 'stringValue', 'columnSkipped': False}]
+
+def get_catalog():
+    mdata = metadata.get_standard_metadata(schema=sheet_schema, key_properties=['__sdc_row'], replication_method='FULL_TABLE')
+    return Catalog.from_dict({'streams': [{'tap_stream_id': 'Sheet1', 'stream': 'Sheet1', 'schema': sheet_schema, 'metadata': mdata}]})
+
+class TestStageTimers(unittest.TestCase):
+
+    @mock.patch('tap_google_sheets.stage_timers.LOGGER.info')
+    def test_summary(self, mocked_logger):
+        """
+        Verify that each stage is emitted as a metric with its tags, and the summary lists the slowest sheets and the stages
+        """
+        stage_timers = StageTimers()
+        stage_timers.add('network', 2, 'Sheet1', 2)
+        stage_timers.add('transform', 1, 'Sheet1', 2)
+        stage_timers.add('sheet', 3.5, 'Sheet1')
+        stage_timers.add('network', 5, 'Sheet2', 2)
+        stage_timers.add('schema', 0.5)
+        metric = mocked_logger.call_args_list[0][0]
+        self.assertEqual(metric[0], 'METRIC: %s')
+        self.assertIn('"tags": {"stage": "network", "sheet": "Sheet1", "page": 2}', metric[1])
+
+        mocked_logger.reset_mock()
+        stage_timers.log_summary()
+        self.assertEqual([call[0][0] for call in mocked_logger.call_args_list], [
+            'Slowest sheet: Sheet2, 5.000 seconds, stages: network 5.000s',
+            'Slowest sheet: Sheet1, 3.500 seconds, stages: network 2.000s, transform 1.000s',
+            'Stage durations: network 7.000s, sheet 3.500s, transform 1.000s, schema 0.500s'])
+        self.assertEqual(stage_timers.totals, {})
+
+    @mock.patch('tap_google_sheets.client.GoogleClient.get', return_value={'values': [['x'], ['y']]})
+    @mock.patch('tap_google_sheets.streams.schema.get_sheet_metadata', return_value = [sheet_schema, columns])
+    @mock.patch('tap_google_sheets.streams.write_schema')
+    @mock.patch('tap_google_sheets.streams.singer.write_message')
+    @mock.patch('tap_google_sheets.streams.write_record')
+    def test_load_data_stages(self, mocked_write_record, *mocks):
+        """
+        Verify that the stages of the sync of a sheet are timed per sheet
+        """
+        STAGE_TIMERS.totals.clear()
+        client = GoogleClient("dummy_client_id", "dummy_client_secret", "dummy_refresh_token", 300)
+        sheets = [{"properties": {"sheetId": 0, "title": "Sheet1", "gridProperties": {"rowCount": 100, "columnCount": 1}}}]
+        sheets_load_data = SheetsLoadData(client, "id", "2019-01-01T00:00:00Z", {})
+        sheets_load_data.load_data(get_catalog(), {}, ["Sheet1"], sheets, "time")
+        self.assertEqual(mocked_write_record.call_count, 2)
+        self.assertEqual(sorted(stage for sheet, stage in STAGE_TIMERS.totals if sheet == 'Sheet1'),
+                         ['decode', 'network', 'sheet', 'transform', 'validate', 'write'])
+        self.assertIn((None, 'schema'), STAGE_TIMERS.totals)
+        STAGE_TIMERS.totals.clear()
@@ -0,0 +1,110 @@
+import io
+import json
+import zipfile
+import unittest
+import contextlib
+from unittest import mock
+from tap_google_sheets import message_writer
+from tap_google_sheets.client import GoogleClient, GoogleError
+from tap_google_sheets.discover import discover
+from tap_google_sheets.sync import sync
+from tap_google_sheets.xlsx_export import XlsxWorkbook, get_pages
+from benchmarks.generator import SyntheticSpreadsheet
+from benchmarks.fake_api import FakeGoogleApi
+from benchmarks.run import BENCHMARK_CONFIG, get_client, select_all
+
+WORKBOOK = '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets><sheet name="Sheet 1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+WORKBOOK_RELS = '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="/xl/worksheets/sheet1.xml"/></Relationships>'
+SHARED_STRINGS = '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><si><t>name</t></si><si><r><t>rich </t></r><r><t>text</t></r><rPh><t>phonetic</t></rPh></si></sst>'
+SHEET = ('<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+         '<row r="1"><c r="A1" t="s"><v>0</v></c></row>'
+         '<row r="2"><c r="A2" t="s"><v>1</v></c><c r="B2"><v>1.5</v></c><c r="C2" t="b"><v>1</v></c><c r="D2"><v>4.2E+1</v></c></row>'
+         '<row r="4"><c r="B4" t="inlineStr"><is><t>inline</t></is></c><c r="C4" t="e"><v>#N/A</v></c><c r="D4" s="1"/><c r="E4"><v>5</v></c></row>'
+         '<row r="5"><c r="A5" s="1"/></row>'
+         '</sheetData></worksheet>')
+
+def get_xlsx():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as xlsx:
+        xlsx.writestr('xl/workbook.xml', WORKBOOK)
+        xlsx.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        xlsx.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+        xlsx.writestr('xl/worksheets/sheet1.xml', SHEET)
+    buffer.seek(0)
+    return buffer
+
+def get_records(spreadsheet, config):
+    """
+    Sync all the sheets of the spreadsheet through the fake API, return the records of the sheets and the requests
+    """
+    config = dict(BENCHMARK_CONFIG, spreadsheet_id=spreadsheet.spreadsheet_id, **config)
+    fake_api = FakeGoogleApi(spreadsheet)
+    output = io.StringIO()
+    with fake_api.serve():
+        with get_client(config) as client:
+            catalog = select_all(discover(client, spreadsheet.spreadsheet_id))
+        fake_api.requests.clear()
+        with get_client(config) as client, contextlib.redirect_stdout(output):
+            sync(client=client, config=config, catalog=catalog, state={})
+            message_writer.MESSAGE_WRITER.flush()
+    messages = [json.loads(line) for line in output.getvalue().splitlines()]
+    records = [(message['stream'], message['record']) for message in messages
+               if message['type'] == 'RECORD' and message['stream'] in spreadsheet.sheet_titles]
+    return records, fake_api.requests
+
+class TestXlsxExport(unittest.TestCase):
+
+    def test_iter_rows(self):
+        """
+        Verify that the rows are parsed as the unformatted values of the values API
+        """
+        workbook = XlsxWorkbook(get_xlsx())
+        self.assertEqual(list(workbook.sheet_paths), ['Sheet 1'])
+        self.assertEqual(list(workbook.iter_rows('Sheet 1')), [
+            (1, ['name']),
+            (2, ['rich text', 1.5, True, 42]),
+            (4, ['', 'inline', '#N/A', '', 5]),
+            (5, [])])
+        self.assertEqual(list(workbook.iter_rows('Sheet 1', max_column=2))[2], (4, ['', 'inline']))
+        workbook.close()
+
+    def test_get_pages(self):
+        """
+        Verify that the rows are cut in pages from the start row, with the empty rows, until a whole blank page
+        """
+        rows = [(1, ['header']), (2, ['a']), (4, ['b']), (5, []), (6, ['c']), (20, ['d'])]
+        self.assertEqual(list(get_pages(iter(rows), 3)), [
+            (2, [['a'], [], ['b']]),
+            (5, [[], ['c']]),
+            (8, [])])
+        self.assertEqual(list(get_pages(iter(rows), 3, start_row=5)), [
+            (5, [[], ['c']]),
+            (8, [])])
+        self.assertEqual(list(get_pages(iter(rows), 10)), [
+            (2, [['a'], [], ['b'], [], ['c']]),
+            (12, [[]] * 8 + [['d']]),
+            (22, [])])
+
+    def test_export_sync(self):
+        """
+        Verify that the sheets synced from the export have the same records as the sheets synced with the values API,
+            with 1 export request instead of the values requests
+        """
+        spreadsheet = SyntheticSpreadsheet(sheets=2, rows=450, columns=8)
+        expected_records, _ = get_records(spreadsheet, {})
+        for config in ({}, {'max_workers': 3}, {'async_requests': True}):
+            records, requests = get_records(spreadsheet, dict(config, export_min_cells=1000))
+            self.assertEqual(records, expected_records)
+            self.assertEqual(requests['export'], 1)
+            self.assertNotIn('values', requests)
+
+    def test_export_failed(self):
+        """
+        Verify that the sheets are synced with the values API when the export fails
+        """
+        spreadsheet = SyntheticSpreadsheet(sheets=1, rows=50, columns=4)
+        expected_records, _ = get_records(spreadsheet, {})
+        with mock.patch.object(GoogleClient, 'download', side_effect=GoogleError('exportSizeLimitExceeded')):
+            records, requests = get_records(spreadsheet, {'export_min_cells': 10})
+        self.assertEqual(records, expected_records)
+        self.assertEqual(requests['values'], 2)